@@ -1,49 +1,223 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import (Flask, Blueprint, current_app, g, has_app_context, request, jsonify, send_from_directory,
+                   make_response, Response, stream_with_context, url_for)
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, exc, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+import click
 import os
+import re
+import json
+import hashlib
+import hmac
+import random
+import time
+import threading
+import base64
+import socket
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import jwt
+from contextlib import contextmanager
 from functools import wraps
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
+import migrations
+from config import load_config
+from database import (GroupCommitter, ReplicaRouter, RollbackWrite, RoutingSession, REPLICA_BIND_PREFIX,
+                      begin_write, configure_sqlite, sqlite_pragmas)
+from auth_cache import TokenUserCache, TokenVersionMap
+from metrics import Metrics, QueryLog, SamplingProfiler, instrument_engine, slow_request_report
+from ratelimit import ConcurrencyLimit, MemoryBuckets, RateLimiter, SQLiteBuckets
+from trending import TrendingCounters, BOARD_KINDS as TRENDING_KINDS
+from jobs import JobQueue, JobRegistry, Worker, STATES as JOB_STATES, run_pool, worker_process_signals
+from responses import (ENCODINGS, OrjsonProvider, compress, compress_stream, encoded_etag, json_bytes,
+                       json_response, negotiate_encoding)
+from hashing import PasswordHasher, HasherBusy
+from catalog import CatalogCache, TMDBFetcher, FixtureFetcher, UpstreamError
+from search import SearchIndex
+from recommend import ModelStore, build_matrix, top_k_similar, write_model
+from library_io import export_lines, parse_import, UnknownFormat, EXPORT_FORMATS
+from photos import (PhotoProcessor, InvalidImage, inspect_image, process_photo, save_upload, variant_name,
+                    variant_paths, has_variants, VARIANT_SIZES, PHOTO_ID_RE, VARIANT_RE)
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///filmix.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads/profile_photos'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Toplu puan sorgusunda tek istekte izin verilen en fazla film sayısı
+MAX_LOOKUP_IDS = 500
 
-# İzin verilen dosya uzantıları
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+# Toplu favori/puan yazımında tek istekte izin verilen en fazla kayıt
+MAX_BULK_ITEMS = 500
 
-# Veritabanı başlatma
-db = SQLAlchemy(app)
-CORS(app)
+# İçe aktarmada her transaction'da yazılan kayıt sayısı, dışa aktarmada bir
+# sorguda okunan satır sayısı
+IMPORT_BATCH_SIZE = 500
+IMPORT_RESULT_ERRORS = 100  # kuyruktaki içe aktarmanın sonucunda saklanan en fazla hata satırı
+EXPORT_BATCH_SIZE = 1000
 
-# Upload klasörünü oluştur
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Liste endpoint'lerinde sayfalama ayarları
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 200
+
+# Veritabanı ve API (create_app içinde uygulamaya bağlanır)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+api = Blueprint('api', __name__, cli_group=None)
+
+# Uygulamaya ait servisler create_app içinde kurulur; modül içinden
+# current_app üzerinden erişilir
+def service(name):
+    return LocalProxy(lambda: current_app.extensions['filmix'][name])
+
+auth_cache = service('auth_cache')
+token_versions = service('token_versions')
+password_hasher = service('password_hasher')
+catalog_cache = service('catalog_cache')
+search_index = service('search_index')
+recommendation_store = service('recommendation_store')
+photo_processor = service('photo_processor')
+metrics = service('metrics')
+job_queue = service('job_queue')
+trending = service('trending')
+
+# Arka plan iş türleri; fonksiyonlar aşağıda @job_types.handler ile kaydedilir
+job_types = JobRegistry()
+
+def init_services(app):
+    config = app.config
+    os.makedirs(app.instance_path, exist_ok=True)
+    
+    # Katalog upstream'i: gerçek TMDB veya yerel fixture JSON dosyaları
+    if config['CATALOG_UPSTREAM'] == 'tmdb':
+        catalog_fetcher = TMDBFetcher(config['TMDB_API_KEY'])
+    else:
+        catalog_fetcher = FixtureFetcher(config['CATALOG_UPSTREAM'])
+    catalog = CatalogCache(
+        catalog_fetcher,
+        os.path.join(app.instance_path, 'catalog_cache.db'),
+        stale_ttl=config['CATALOG_STALE_TTL']
+    )
+    
+    # Film arama indeksi (katalog + favori/puan başlıkları)
+    index = SearchIndex(os.path.join(app.instance_path, 'search_index.db'))
+    
+    # Upstream'den gelen katalog sayfalarını arama indeksine ekle
+    # (arka plan yenilemesinde uygulama bağlamı olmadığından nesneler doğrudan kullanılır)
+    def index_catalog_response(path, params, data):
+        try:
+            if path == 'genre/movie/list':
+                index.set_genres(data.get('genres', []))
+                return
+            if 'results' in data:
+                index.add_catalog_results(data['results'])
+        except Exception:
+            app.logger.exception('Katalog yanıtı arama indeksine eklenemedi')
+    
+    catalog.on_fetch = index_catalog_response
+    
+    # Upload klasörünü oluştur
+    os.makedirs(config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(os.path.join(config['UPLOAD_FOLDER'], 'originals'), exist_ok=True)
+    
+    app.extensions['filmix'] = {
+        # Doğrulanmış token -> kullanıcı önbelleği
+        'auth_cache': TokenUserCache(config['AUTH_CACHE_SIZE'], config['AUTH_CACHE_TTL']),
+        # Kullanıcının güncel token sürümü; kayıt AUTH_CACHE_TTL dolunca veritabanından
+        # yeniden okunur, böylece başka worker'daki iptaller de bu süre içinde görülür
+        'token_versions': TokenVersionMap(load_token_version, config['TOKEN_VERSION_CACHE_SIZE'],
+                                          config['AUTH_CACHE_TTL']),
+        # Şifre hash'leri ayrı process havuzunda hesaplanır
+        'password_hasher': PasswordHasher(
+            config['PASSWORD_HASH_METHOD'],
+            workers=config['PASSWORD_HASH_WORKERS'],
+            max_pending=config['PASSWORD_HASH_MAX_PENDING']
+        ),
+        'catalog_cache': catalog,
+        'search_index': index,
+        # Öneri modeli (flask --app app build-recommendations ile oluşturulur)
+        'recommendation_store': ModelStore(os.path.join(app.instance_path, 'recommendations')),
+        # Profil fotoğrafı varyantları arka plandaki process havuzunda üretilir
+        'photo_processor': PhotoProcessor(config['PHOTO_WORKERS']),
+        # Küçük yazımları tek transaction'da toplayan grup commit (kapalıysa None)
+        'group_committer': GroupCommitter(
+            group_commit_session(app),
+            window=config['GROUP_COMMIT_WINDOW'],
+            max_batch=config['GROUP_COMMIT_MAX_BATCH']
+        ) if config['GROUP_COMMIT'] else None,
+        # Okuma replikaları (DATABASE_REPLICA_URIS boşsa hiç replika yok)
+        'replica_router': ReplicaRouter(replica_engines(app)),
+        # İstek/SQL histogramları ve servis sayaçları (/metrics)
+        'metrics': Metrics(),
+        # IP/kullanıcı başına token bucket hız sınırı (kapalıysa None)
+        'rate_limiter': RateLimiter(
+            SQLiteBuckets(config['RATE_LIMIT_DATABASE']) if config['RATE_LIMIT_DATABASE']
+            else MemoryBuckets(config['RATE_LIMIT_MAX_KEYS']),
+            config['RATE_LIMITS']
+        ) if config['RATE_LIMIT_ENABLED'] else None,
+        # Eşzamanlı istek sınırları (yük atma)
+        'request_slots': ConcurrencyLimit(config['MAX_CONCURRENT_REQUESTS']),
+        'expensive_slots': ConcurrencyLimit(config['MAX_CONCURRENT_EXPENSIVE']),
+        # Web ve worker process'lerinin paylaştığı kalıcı iş kuyruğu
+        'job_queue': JobQueue(config['JOB_QUEUE_DATABASE'] or os.path.join(app.instance_path, 'jobs.db')),
+        # Saatlik/günlük/haftalık trend listeleri (bellekte, worker'lar arasında dosya üzerinden birleşir)
+        'trending': TrendingCounters(
+            config['TRENDING_DATABASE'] or os.path.join(app.instance_path, 'trending.db'),
+            config['TRENDING_WINDOWS'], config['TRENDING_WEIGHTS'],
+            size=config['TRENDING_SIZE'],
+            checkpoint_interval=config['TRENDING_CHECKPOINT_INTERVAL'],
+            logger=app.logger
+        ),
+    }
+    
+    services = app.extensions['filmix']
+    services['metrics'].add_collector('filmix_auth_cache', 'Token önbelleği', services['auth_cache'].stats)
+    services['metrics'].add_collector('filmix_catalog_cache', 'Katalog önbelleği', lambda: catalog.stats)
+    services['metrics'].add_collector('filmix_replica', 'Okuma replikası yönlendirme',
+                                      lambda: services['replica_router'].stats)
+    if services['group_committer'] is not None:
+        services['metrics'].add_collector('filmix_group_commit', 'Grup commit',
+                                          lambda: services['group_committer'].stats)
+    if services['rate_limiter'] is not None:
+        services['metrics'].add_collector('filmix_rate_limit', 'Hız sınırı',
+                                          lambda: services['rate_limiter'].stats)
+    services['metrics'].add_collector('filmix_request_slots', 'Eşzamanlı istek sınırı',
+                                      lambda: services['request_slots'].stats)
+    services['metrics'].add_collector('filmix_expensive_slots', 'Pahalı endpoint eşzamanlılık sınırı',
+                                      lambda: services['expensive_slots'].stats)
+    services['metrics'].add_collector('filmix_jobs', 'İş kuyruğu', lambda: services['job_queue'].stats)
+    services['metrics'].add_collector('filmix_trending', 'Trend sayaçları', lambda: services['trending'].stats)
+
+def replica_engines(app):
+    with app.app_context():
+        return [engine for key, engine in db.engines.items()
+                if key is not None and key.startswith(REPLICA_BIND_PREFIX)]
 
 # Kullanıcı modeli
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     profile_photo = db.Column(db.String(200), default='default.png')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Şifre değişince artırılır, eski sürümlü token'lar geçersiz olur
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     favorites = db.relationship('Favorite', backref='user', lazy=True, cascade='all, delete-orphan')
     ratings = db.relationship('Rating', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    # Hash eski algoritma/maliyetle üretildiyse doğru şifreyle yeniden hash'le
+    def rehash_password_if_needed(self, password):
+        if password_hasher.needs_rehash(self.password_hash):
+            self.set_password(password)
+            return True
+        return False
     
     def to_dict(self):
         return {
@@ -63,9 +237,17 @@ class Favorite(db.Model):
     movie_poster = db.Column(db.String(500), nullable=True)
     movie_year = db.Column(db.String(10), nullable=True)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Satırın son yazıldığı koleksiyon sürümü (delta senkronizasyonu için)
+    sync_version = db.Column(db.Integer, nullable=True)
     
     # Unique constraint to prevent duplicate favorites
-    __table_args__ = (db.UniqueConstraint('user_id', 'movie_id', name='unique_user_movie'),)
+    # İndeksler migrations.py içindeki 1 ve 6 numaralı migration'larla aynıdır
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'movie_id', name='unique_user_movie'),
+        db.Index('ix_favorite_user_added', 'user_id', 'added_at'),
+        db.Index('ix_favorite_movie', 'movie_id'),
+        db.Index('ix_favorite_user_sync', 'user_id', 'sync_version'),
+    )
     
     def to_dict(self):
         return {
@@ -86,9 +268,15 @@ class Rating(db.Model):
     movie_title = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = db.Column(db.Integer, nullable=True)
     
     # Unique constraint to prevent duplicate ratings
-    __table_args__ = (db.UniqueConstraint('user_id', 'movie_id', name='unique_user_movie_rating'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'movie_id', name='unique_user_movie_rating'),
+        db.Index('ix_rating_user_updated', 'user_id', 'updated_at'),
+        db.Index('ix_rating_movie', 'movie_id'),
+        db.Index('ix_rating_user_sync', 'user_id', 'sync_version'),
+    )
     
     def to_dict(self):
         return {
@@ -100,6 +288,552 @@ class Rating(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
+# Film bazında puan istatistikleri (rate_movie/delete_rating ile aynı transaction'da güncellenir)
+class MovieStats(db.Model):
+    __tablename__ = 'movie_stats'
+    
+    movie_id = db.Column(db.String(20), primary_key=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Float, nullable=False, default=0)
+    rating_sum_sq = db.Column(db.Float, nullable=False, default=0)
+    # Yıldız histogramı, puan aşağı yuvarlanır (4.5 -> 4 yıldız)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+    
+    STAR_COLUMNS = ('stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+    
+    @staticmethod
+    def star_column(rating):
+        return MovieStats.STAR_COLUMNS[min(int(rating), 5) - 1]
+    
+    @staticmethod
+    def empty_dict():
+        return {'rating_count': 0, 'average': None, 'stddev': None,
+                'histogram': {str(star): 0 for star in range(1, 6)}}
+    
+    def to_dict(self):
+        count = self.rating_count
+        if not count:
+            return self.empty_dict()
+        average = self.rating_sum / count
+        variance = max(self.rating_sum_sq / count - average * average, 0.0)
+        return {
+            'rating_count': count,
+            'average': round(average, 3),
+            'stddev': round(variance ** 0.5, 3),
+            'histogram': {str(star): getattr(self, column) for star, column in enumerate(self.STAR_COLUMNS, 1)}
+        }
+
+# Veritabanına uygun INSERT ... ON CONFLICT ifadesi
+def dialect_insert(table, bind=None):
+    dialect = (bind or db.engine).dialect.name
+    return (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(table)
+
+# Puan değişikliklerini [(movie_id, eski, yeni), ...] movie_stats satırlarına
+# uygular (count/sum farkları); aynı filmin değişiklikleri tek satırda toplanır.
+# Tek satırlık INSERT ... ON CONFLICT ifadesi executemany ile çalışır: derlenmiş
+# ifade önbellekten gelir, satırları SQLAlchemy çok satırlı VALUES gruplarına böler
+def apply_rating_deltas(connection, changes):
+    deltas = {}
+    for movie_id, old_rating, new_rating in changes:
+        delta = deltas.get(movie_id)
+        if delta is None:
+            delta = deltas[movie_id] = {'rating_count': 0, 'rating_sum': 0.0, 'rating_sum_sq': 0.0}
+            delta.update({column: 0 for column in MovieStats.STAR_COLUMNS})
+        for rating, sign in ((old_rating, -1), (new_rating, 1)):
+            if rating is None:
+                continue
+            delta['rating_count'] += sign
+            delta['rating_sum'] += sign * rating
+            delta['rating_sum_sq'] += sign * rating * rating
+            delta[MovieStats.star_column(rating)] += sign
+    if not deltas:
+        return
+    
+    table = MovieStats.__table__
+    columns = ['rating_count', 'rating_sum', 'rating_sum_sq', *MovieStats.STAR_COLUMNS]
+    statement = dialect_insert(table, connection)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.movie_id],
+        set_={name: table.c[name] + statement.excluded[name] for name in columns}
+    )
+    connection.execute(statement, [{'movie_id': movie_id, **delta} for movie_id, delta in deltas.items()])
+
+def apply_rating_delta(connection, movie_id, old_rating=None, new_rating=None):
+    apply_rating_deltas(connection, [(movie_id, old_rating, new_rating)])
+
+# Puan eklenince, değişince veya silinince (kullanıcı silme cascade'i dahil)
+# istatistikler flush sırasında aynı bağlantı ve transaction üzerinden güncellenir
+@event.listens_for(Rating, 'after_insert')
+def rating_inserted(mapper, connection, target):
+    apply_rating_delta(connection, target.movie_id, new_rating=target.rating)
+
+@event.listens_for(Rating, 'after_update')
+def rating_updated(mapper, connection, target):
+    history = inspect(target).attrs.rating.history
+    if history.has_changes() and history.deleted:
+        apply_rating_delta(connection, target.movie_id, history.deleted[0], target.rating)
+
+@event.listens_for(Rating, 'after_delete')
+def rating_deleted(mapper, connection, target):
+    apply_rating_delta(connection, target.movie_id, old_rating=target.rating)
+
+# Kullanıcı koleksiyonlarının sürüm sayacı; her favori/puan yazımında artar
+# ve koleksiyon okunmadan ETag üretmeye yarar
+class CollectionVersion(db.Model):
+    __tablename__ = 'collection_version'
+    
+    user_id = db.Column(db.Integer, primary_key=True)
+    collection = db.Column(db.String(20), primary_key=True)  # 'favorites' veya 'ratings'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+# Silinen favori/puanların kaydı; delta senkronizasyonunda istemciye bildirilir.
+# Film başına tek kayıt tutulur, SYNC_TOMBSTONE_TTL dolunca temizlenir
+class SyncTombstone(db.Model):
+    __tablename__ = 'sync_tombstone'
+    
+    user_id = db.Column(db.Integer, primary_key=True)
+    collection = db.Column(db.String(20), primary_key=True)
+    movie_id = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_sync_tombstone_user_version', 'user_id', 'collection', 'version'),
+        db.Index('ix_sync_tombstone_deleted', 'deleted_at'),
+    )
+
+# Koleksiyon sürümünü flush bağlantısı üzerinden artırır ve yeni sürümü döndürür
+# (count > 1 ise toplu yazım için count adet ardışık sürüm ayrılır).
+# Satırlar kullanıcı silinince de kalır, böylece aynı id tekrar kullanılsa bile sürüm geri dönmez
+def bump_collection_version(connection, user_id, collection, count=1):
+    table = CollectionVersion.__table__
+    now = datetime.utcnow()
+    statement = dialect_insert(table, connection).values(
+        user_id=user_id, collection=collection, version=count, updated_at=now
+    ).on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.collection],
+        set_={'version': table.c.version + count, 'updated_at': now}
+    ).returning(table.c.version)
+    return connection.execute(statement).scalar()
+
+# Yazılan satır, koleksiyonun yeni sürümünü taşır
+def stamp_sync_version(collection):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is not None and not session.is_modified(target):
+            return
+        target.sync_version = bump_collection_version(connection, target.user_id, collection)
+    return listener
+
+# Silinen satır yerine (kullanıcı silme cascade'i dahil) bir silme kaydı yazılır
+def record_tombstone(collection):
+    def listener(mapper, connection, target):
+        version = bump_collection_version(connection, target.user_id, collection)
+        table = SyncTombstone.__table__
+        connection.execute(dialect_insert(table, connection).values(
+            user_id=target.user_id, collection=collection, movie_id=target.movie_id,
+            version=version, deleted_at=datetime.utcnow()
+        ).on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.collection, table.c.movie_id],
+            set_={'version': version, 'deleted_at': datetime.utcnow()}
+        ))
+    return listener
+
+for model, collection in ((Favorite, 'favorites'), (Rating, 'ratings')):
+    event.listen(model, 'before_insert', stamp_sync_version(collection))
+    event.listen(model, 'before_update', stamp_sync_version(collection))
+    event.listen(model, 'after_delete', record_tombstone(collection))
+
+# Toplu favori/puan yazımı (INSERT ... ON CONFLICT ... RETURNING, executemany).
+# İfade tek satırlıktır; değerler bind parametresi olarak verildiği için derlenmiş
+# ifade önbelleğe alınır (values(rows) her çağrıda satır sayısı kadar parametreyle
+# yeniden derlenirdi).
+# Core ifadeleri mapper event'lerini tetiklemez; sürüm, istatistik ve arama
+# indeksi güncellemeleri burada aynı transaction içinde açıkça yapılır.
+# Puanlarda önce koleksiyon sürümü artırılır: bu yazım kilidi aynı kullanıcının
+# diğer yazımlarını sıraya sokar, böylece ardından okunan eski değerler
+# güvenilirdir. Favorilerde eski değer okunmaz; sürüm yalnızca gerçekten eklenen
+# satır varsa ve o sayıda artırılır, tekrar gönderilen favoriler ETag'i değiştirmez.
+
+# Her kayıt için (index, durum, mesaj) üretir; aynı film tekrar ederse son kayıt geçerlidir
+def dedupe_items(items):
+    results = [None] * len(items)
+    latest = {}
+    for index, item in enumerate(items):
+        if item['movie_id'] in latest:
+            results[latest[item['movie_id']]] = {'status': 'duplicate'}
+        latest[item['movie_id']] = index
+    return results, [items[index] for index in sorted(latest.values())]
+
+def queue_search_documents(session, docs):
+    docs = [doc for doc in docs if doc[1] and doc[1] != 'Unknown']
+    if docs:
+        session.info.setdefault('search_docs', []).extend(docs)
+
+def upsert_favorites(user_id, items):
+    """Favorileri tek ifadeyle ekler; zaten favoride olanlara dokunmaz."""
+    session = db.session
+    connection = session.connection()
+    table = Favorite.__table__
+    results, items = dedupe_items(items)
+    
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': user_id,
+        'movie_id': item['movie_id'],
+        'movie_title': clip(table.c.movie_title, item.get('movie_title') or 'Unknown'),
+        'movie_poster': clip(table.c.movie_poster, item.get('movie_poster', '')),
+        'movie_year': clip(table.c.movie_year, item.get('movie_year', '')),
+        'added_at': now,
+        'sync_version': None
+    } for item in items]
+    
+    # RETURNING satırları model sütun adlarını taşır; to_dict ORM nesnesi kurmadan çalışır
+    statement = dialect_insert(table, connection).on_conflict_do_nothing(
+        index_elements=[table.c.user_id, table.c.movie_id]
+    ).returning(*table.c)
+    inserted = {row.movie_id: row for row in connection.execute(statement, rows)}
+    
+    if inserted:
+        # Eklenen satırlara ardışık sürümler verilir (eklemeyle aynı transaction'da)
+        last_version = bump_collection_version(connection, user_id, 'favorites', len(inserted))
+        connection.execute(
+            table.update().where(table.c.id == db.bindparam('row_id')).values(
+                sync_version=db.bindparam('version')
+            ),
+            [{'row_id': row.id, 'version': last_version - len(inserted) + offset + 1}
+             for offset, row in enumerate(inserted.values())]
+        )
+    
+    queue_search_documents(session, [
+        (row.movie_id, row.movie_title, row.movie_year, None) for row in inserted.values()
+    ])
+    by_movie = {}
+    for row in rows:
+        created = inserted.get(row['movie_id'])
+        by_movie[row['movie_id']] = (
+            {'status': 'created', 'favorite': Favorite.to_dict(created)}
+            if created is not None else {'status': 'exists'}
+        )
+    return results, by_movie
+
+def upsert_ratings(user_id, items):
+    """Puanları tek ifadeyle ekler veya günceller, film istatistiklerini de uygular."""
+    session = db.session
+    connection = session.connection()
+    table = Rating.__table__
+    results, items = dedupe_items(items)
+    
+    last_version = bump_collection_version(connection, user_id, 'ratings', len(items))
+    previous = dict(connection.execute(
+        db.select(table.c.movie_id, table.c.rating).where(
+            table.c.user_id == user_id,
+            table.c.movie_id.in_([item['movie_id'] for item in items])
+        )
+    ).all())
+    
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': user_id,
+        'movie_id': item['movie_id'],
+        'rating': item['rating'],
+        'movie_title': clip(table.c.movie_title, item.get('movie_title') or 'Unknown'),
+        'created_at': now,
+        'updated_at': now,
+        'sync_version': last_version - len(items) + offset + 1
+    } for offset, item in enumerate(items)]
+    
+    statement = dialect_insert(table, connection)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.movie_id],
+        set_={name: statement.excluded[name] for name in ('rating', 'updated_at', 'sync_version')}
+    ).returning(*table.c)
+    written = {row.movie_id: row for row in connection.execute(statement, rows)}
+    
+    apply_rating_deltas(connection, [
+        (movie_id, previous.get(movie_id), row.rating) for movie_id, row in written.items()
+    ])
+    by_movie = {}
+    for movie_id, row in written.items():
+        old_rating = previous.get(movie_id)
+        by_movie[movie_id] = {
+            'status': 'created' if old_rating is None else 'updated',
+            # SQLite RETURNING kolon tipini uygulamadan döner (4.0 yerine 4)
+            'rating': {**Rating.to_dict(row), 'rating': float(row.rating)}
+        }
+    queue_search_documents(session, [
+        (row.movie_id, row.movie_title, None, None) for row in written.values()
+    ])
+    return results, by_movie
+
+# Doğrulanmış kayıtlar toplu yazılır, hatalı kayıtlar yanıtta işaretlenir
+def bulk_write(items, validate, upsert, user_id):
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        error = validate(item)
+        if error:
+            results[index] = {'status': 'error', 'message': error}
+        else:
+            valid.append((index, item))
+    
+    if valid:
+        duplicates, by_movie = upsert(user_id, [item for _, item in valid])
+        db.session.commit()
+        for (index, item), duplicate in zip(valid, duplicates):
+            results[index] = duplicate or by_movie[item['movie_id']]
+    
+    for index, item in enumerate(items):
+        movie_id = item.get('movie_id') if isinstance(item, dict) else None
+        results[index] = {'index': index, 'movie_id': movie_id, **results[index]}
+    return results
+
+# Grup commit işleri kendi uygulama bağlamında ve oturumunda çalışır;
+# db.session orada grup commit thread'inin oturumudur
+def group_commit_session(app):
+    @contextmanager
+    def scope():
+        with app.app_context():
+            yield db.session
+    return scope
+
+# Tek favori/puan yazımını çalıştırıp commit eder. GROUP_COMMIT açıksa iş
+# eşzamanlı yazımlarla aynı transaction'da başka bir thread'de çalışır; bu
+# yüzden istek oturumundaki nesnelere değil yalnızca id'lere ve istek verisine
+# dayanmalıdır. İş RollbackWrite fırlatırsa yazdıkları geri alınır.
+def commit_write(work):
+    committer = current_app.extensions['filmix']['group_committer']
+    if committer is not None:
+        return committer.submit(work)
+    try:
+        result = work()
+    except RollbackWrite as e:
+        db.session.rollback()
+        return e.value
+    db.session.commit()
+    return result
+
+# Film id'si metin olarak saklanır (istemci sayı da gönderebilir). Kolon
+# uzunluğunu aşan id reddedilir, başlık gibi görünen alanlar kırpılır:
+# PostgreSQL uzun değeri hata ile reddeder, SQLite olduğu gibi saklar
+def normalize_movie_id(item):
+    item['movie_id'] = str(item['movie_id']).strip()
+    max_length = Favorite.movie_id.type.length
+    if not item['movie_id'] or len(item['movie_id']) > max_length:
+        return f'Film ID 1-{max_length} karakter olmalı!'
+    return None
+
+# Toplu sorgulanan id listesi yazma uçlarıyla aynı kurallarla normalleştirilir
+# (sayı olarak yazılan film sayı olarak da sorgulanabilir); tekrarlar atılır
+def normalize_lookup_ids(movie_ids):
+    if not isinstance(movie_ids, list):
+        return None, 'movie_ids bir film ID listesi olmalı!'
+    if len(movie_ids) > MAX_LOOKUP_IDS:
+        return None, f'Tek istekte en fazla {MAX_LOOKUP_IDS} film sorgulanabilir!'
+    items = [{'movie_id': movie_id} for movie_id in movie_ids]
+    for index, item in enumerate(items):
+        error = validate_favorite_item(item)
+        if error:
+            return None, f'{index}. öğe: {error}'
+    return list(dict.fromkeys(item['movie_id'] for item in items)), None
+
+def clip(column, value):
+    return value[:column.type.length] if isinstance(value, str) else value
+
+def validate_favorite_item(item):
+    if not isinstance(item, dict) or not item.get('movie_id'):
+        return 'Film ID gerekli!'
+    return normalize_movie_id(item)
+
+def validate_rating_item(item):
+    if not isinstance(item, dict) or not item.get('movie_id') or 'rating' not in item:
+        return 'Film ID ve puan gerekli!'
+    error = normalize_movie_id(item)
+    if error:
+        return error
+    try:
+        item['rating'] = float(item['rating'])
+    except (TypeError, ValueError):
+        return 'Puan sayı olmalı!'
+    if item['rating'] < 1.0 or item['rating'] > 5.0:
+        return 'Puan 1.0 ile 5.0 arasında olmalı!'
+    return None
+
+# İçerik adresli profil fotoğrafı (sha256), aynı resim kaç kullanıcıda olursa olsun bir kez saklanır
+class PhotoBlob(db.Model):
+    __tablename__ = 'photo_blob'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    upload_bytes = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Referans sayısı sıfıra düştüğü an; temizlik bu alana göre yapılır
+    unreferenced_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (db.Index('ix_photo_blob_unreferenced', 'unreferenced_at'),)
+
+def load_token_version(user_id):
+    return db.session.query(User.token_version).filter_by(id=user_id).scalar()
+
+# Kullanıcı güncellendiğinde veya silindiğinde önbellekteki token'larını düşür
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    auth_cache.invalidate_user(target.id)
+    token_versions.discard(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+# Fotoğraf referans sayısını flush bağlantısı üzerinden değiştir
+def change_photo_ref(connection, photo_id, delta):
+    if not photo_id or not PHOTO_ID_RE.fullmatch(photo_id):
+        return
+    
+    table = PhotoBlob.__table__
+    now = datetime.utcnow()
+    if delta > 0:
+        statement = dialect_insert(table, connection).values(
+            sha256=photo_id, ref_count=delta, created_at=now
+        ).on_conflict_do_update(
+            index_elements=[table.c.sha256],
+            set_={'ref_count': table.c.ref_count + delta, 'unreferenced_at': None}
+        )
+    else:
+        statement = table.update().where(table.c.sha256 == photo_id).values(
+            ref_count=table.c.ref_count + delta,
+            unreferenced_at=db.case((table.c.ref_count + delta <= 0, now), else_=None)
+        )
+    connection.execute(statement)
+
+# Kullanıcı satırındaki güncel fotoğraf, flush bağlantısı (aynı transaction)
+# üzerinden okunur. Nesnedeki eski değer güvenilmez: token önbelleğinden kurulan
+# kullanıcı başka bir worker'daki değişikliği görmemiş olabilir
+def stored_profile_photo(connection, user_id):
+    table = User.__table__
+    return connection.execute(
+        db.select(table.c.profile_photo).where(table.c.id == user_id).with_for_update()
+    ).scalar()
+
+# Profil fotoğrafı değişince veya kullanıcı silinince referanslar aynı transaction'da güncellenir
+@event.listens_for(User, 'before_update')
+def user_photo_changed(mapper, connection, target):
+    history = inspect(target).attrs.profile_photo.history
+    if not history.has_changes():
+        return
+    old_photo = stored_profile_photo(connection, target.id)
+    if old_photo == target.profile_photo:
+        return
+    change_photo_ref(connection, old_photo, -1)
+    change_photo_ref(connection, target.profile_photo, 1)
+
+@event.listens_for(User, 'before_delete')
+def user_photo_released(mapper, connection, target):
+    change_photo_ref(connection, stored_profile_photo(connection, target.id), -1)
+
+# Commit öncesinde eski satırı okuyup önbelleğe yazan istekler olabilir,
+# bu yüzden commit sonrasında aynı kullanıcılar bir kez daha düşürülür
+@event.listens_for(Session, 'after_commit')
+def invalidate_committed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        auth_cache.invalidate_user(user_id)
+        token_versions.discard(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+    session.info.pop('search_docs', None)
+
+# Yazılan favori/puan başlıkları commit sonrasında arama indeksine eklenir
+@event.listens_for(Favorite, 'after_insert')
+@event.listens_for(Rating, 'after_insert')
+@event.listens_for(Rating, 'after_update')
+def queue_search_document(mapper, connection, target):
+    if not target.movie_title or target.movie_title == 'Unknown':
+        return
+    session = object_session(target)
+    if session is not None:
+        year = getattr(target, 'movie_year', None)
+        session.info.setdefault('search_docs', []).append(
+            (target.movie_id, target.movie_title, year, None)
+        )
+
+@event.listens_for(Session, 'after_commit')
+def index_committed_documents(session):
+    docs = session.info.pop('search_docs', None)
+    if docs:
+        try:
+            search_index.add_movies(docs)
+        except Exception:
+            # İndeks güncellenemese de kayıt işlemi başarılı sayılır
+            current_app.logger.exception('Arama indeksi güncellenemedi')
+
+def user_cache_values(user):
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+# Erişim (kısa ömürlü) veya yenileme token'ı üretir
+def create_token(user, token_type):
+    ttl = current_app.config['ACCESS_TOKEN_TTL'] if token_type == 'access' else current_app.config['REFRESH_TOKEN_TTL']
+    return jwt.encode({
+        'user_id': user.id,
+        'username': user.username,
+        'type': token_type,
+        'ver': user.token_version,
+        'exp': datetime.utcnow() + ttl
+    }, current_app.config['SECRET_KEY'], algorithm='HS256')
+
+def token_response(user):
+    return {
+        'token': create_token(user, 'access'),
+        'refresh_token': create_token(user, 'refresh'),
+        'expires_in': int(current_app.config['ACCESS_TOKEN_TTL'].total_seconds())
+    }
+
+# Token'ı çözer; süresi dolmuşsa veya türü yanlışsa None döner
+def decode_token(token, token_type):
+    data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'],
+                      options={'require': ['exp']})
+    if data.get('type') != token_type:
+        return None
+    return data
+
+# Token'ın kullanıcısını veritabanından okur; kullanıcı yoksa veya token iptal
+# edilmişse (sürüm uyuşmuyorsa) None döner. Okunan sürüm eşlemeye de yazılır.
+def load_token_owner(data):
+    user = User.query.get(data['user_id'])
+    if user is None:
+        token_versions.discard(data['user_id'])
+        return None
+    token_versions.set(user.id, user.token_version)
+    if user.token_version != data.get('ver'):
+        return None
+    return user
+
+# Token'ı doğrulayıp kullanıcıyı döndürür, önbellekteyse veritabanına gitmez
+def load_token_user(token):
+    values = auth_cache.get(token)
+    if values is not None:
+        # İptal kontrolü: bellekteki sürüm eşlemesinde tek bir sözlük okuması
+        if token_versions.get(values['id']) != values['token_version']:
+            return None
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    data = decode_token(token, 'access')
+    if data is None:
+        return None
+    user = load_token_owner(data)
+    if user:
+        remaining = data['exp'] - time.time()
+        auth_cache.set(token, user.id, user_cache_values(user), ttl=remaining)
+    return user
+
 # Token doğrulama decorator'ı
 def token_required(f):
     @wraps(f)
@@ -112,8 +846,7 @@ def token_required(f):
         try:
             if token.startswith('Bearer '):
                 token = token[7:]
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user = User.query.get(data['user_id'])
+            current_user = load_token_user(token)
             if not current_user:
                 return jsonify({'message': 'Geçersiz token!'}), 401
         except:
@@ -122,12 +855,373 @@ def token_required(f):
         return f(current_user, *args, **kwargs)
     return decorated
 
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# İzleme uçları (/metrics, /stats/*): METRICS_TOKEN ayarlıysa
+# 'Authorization: Bearer <METRICS_TOKEN>' ile, ayarlı değilse yalnızca
+# sunucunun kendisinden gelen (proxy'den geçmemiş) isteklerle erişilir
+def is_internal_request():
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        header = request.headers.get('Authorization', '')
+        return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    return (request.remote_addr in ('127.0.0.1', '::1')
+            and 'X-Forwarded-For' not in request.headers and 'Forwarded' not in request.headers)
+
+def internal_only(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not is_internal_request():
+            return jsonify({'message': 'Bu adrese erişim izniniz yok!'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+# Sayfalama cursor'ı: son satırın zaman damgası ve id'si
+def encode_cursor(timestamp, row_id):
+    raw = f'{timestamp.isoformat()}|{row_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    timestamp, row_id = raw.split('|')
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+# Liste yanıtlarında ORM nesnesi kurulmadan seçilen kolonlar (to_dict ile aynı alanlar)
+LIST_COLUMNS = {
+    'favorites': (Favorite.id, Favorite.movie_id, Favorite.movie_title, Favorite.movie_poster,
+                  Favorite.movie_year, Favorite.added_at),
+    'ratings': (Rating.id, Rating.movie_id, Rating.movie_title, Rating.rating,
+                Rating.created_at, Rating.updated_at),
+}
+
+# Liste endpoint'leri için keyset sayfalama ve NDJSON akışı
+# limit/cursor verilmezse eskisi gibi tüm liste tek parça döner
+def list_response(query, ts_column, id_column, key):
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    stream = request.args.get('format') == 'ndjson'
+    
+    try:
+        if limit is not None:
+            limit = int(limit)
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                raise ValueError(limit)
+        elif cursor is not None:
+            limit = DEFAULT_PAGE_SIZE
+        
+        if cursor:
+            last_ts, last_id = decode_cursor(cursor)
+            query = query.filter(db.or_(
+                ts_column < last_ts,
+                db.and_(ts_column == last_ts, id_column < last_id)
+            ))
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return jsonify({'message': f'Geçersiz limit veya cursor! (limit 1-{MAX_PAGE_SIZE} arası olmalı)'}), 400
+    
+    # Satırlar kolon demeti olarak okunur ve doğrudan orjson ile kodlanır
+    columns = LIST_COLUMNS[key]
+    names = [column.key for column in columns]
+    query = query.with_entities(*columns).order_by(ts_column.desc(), id_column.desc())
+    
+    if stream:
+        if limit is not None:
+            query = query.limit(limit)
+        
+        def generate():
+            # Satırlar veritabanından parça parça okunur, bellek kullanımı sabit kalır
+            for row in query.yield_per(STREAM_CHUNK_SIZE):
+                yield json_bytes(dict(zip(names, row))) + b'\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    if limit is None:
+        rows = [dict(zip(names, row)) for row in query.all()]
+        return json_response({key: rows, 'count': len(rows)})
+    
+    # Bir fazla satır okuyarak sonraki sayfanın varlığını anla
+    rows = [dict(zip(names, row)) for row in query.limit(limit + 1).all()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[ts_column.key], last['id'])
+    
+    return json_response({key: rows, 'count': len(rows), 'next_cursor': next_cursor})
+
+# ETag'li yanıtı önbellekte tutan istemci her seferinde sunucuya sormalıdır
+def conditional_response(etag, build, last_modified=None):
+    # Her kodlamanın kendi güçlü ETag'i vardır (sıkıştırmasız, "-gzip", "-br");
+    # karşılaştırma güçlü yapılır ve 304 yanıtı istemcinin elindeki ETag'i taşır
+    matched = next((tag for tag in (etag, *(encoded_etag(etag, encoding) for encoding in ENCODINGS))
+                    if request.if_none_match.contains(tag)), None)
+    if matched is not None:
+        response = Response(status=304)
+        response.set_etag(matched)
+        response.vary.add('Accept-Encoding')
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+        response.set_etag(etag)
+    # Last-Modified bilgi amaçlıdır; saniye çözünürlüğü aynı saniyedeki iki
+    # yazımı ayırt edemediği için doğrulama yalnızca ETag ile yapılır
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Koşullu GET: koleksiyon sürümü değişmediyse satırlar okunmadan 304 döner.
+# Sürüm satırlardan önce okunur; arada yazım olursa yanıt yeni sürümle
+# tekrar doğrulanır, eski içerik hiçbir zaman yeni ETag ile eşleşmez
+def collection_cached(collection):
+    def decorator(f):
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+            state = db.session.query(CollectionVersion.version, CollectionVersion.updated_at).filter_by(
+                user_id=current_user.id, collection=collection
+            ).first()
+            version, updated_at = state or (0, None)
+            etag = f'{collection}-{current_user.id}-{version}'
+            
+            def build():
+                use_replica(current_user.id, collection, version)
+                return f(current_user, *args, **kwargs)
+            return conditional_response(etag, build, last_modified=updated_at)
+        return decorated
+    return decorator
+
+# Okuma replikası: koleksiyonun replikadaki sürümü birincildekine (yukarıda
+# okunan sürüm) yetişmişse istek boyunca SELECT'ler replikaya gider. Yetişmemişse
+# (kullanıcının replikaya henüz ulaşmamış kendi yazımı dahil) birincilden okunur,
+# böylece kullanıcı her zaman kendi yazdığını görür
+def use_replica(user_id, collection, version):
+    router = current_app.extensions['filmix']['replica_router']
+    engine = router.choose()
+    if engine is None:
+        return False
+    
+    session = db.session
+    session.info['replica'] = engine
+    try:
+        replica_version = session.query(CollectionVersion.version).filter_by(
+            user_id=user_id, collection=collection
+        ).scalar() or 0
+    except exc.DBAPIError:
+        replica_version = None
+        router.errors += 1
+        current_app.logger.warning('Okuma replikasına ulaşılamadı, birincil kullanılıyor', exc_info=True)
+    
+    if replica_version is None or replica_version < version:
+        session.info.pop('replica')
+        router.primary_reads += 1
+        return False
+    router.replica_reads += 1
+    return True
+
+# Hash kuyruğu doluysa istemciye tekrar denemesini söyle
+def retry_later_response(message, status, retry_after):
+    response = jsonify({'message': message})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, status
+
+def hasher_busy_response(error):
+    return retry_later_response('Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin!', 429, error.retry_after)
+
+def original_photo_path(photo_id):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'originals', photo_id)
+
+# İçerik adresli depolamadan önce varyantlar uuid id ile üretiliyordu
+UUID_PHOTO_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+def remove_files(paths):
+    freed = 0
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            freed += size
+        except FileNotFoundError:
+            pass
+    return freed
+
+def file_is_older_than(path, cutoff):
+    try:
+        return datetime.utcfromtimestamp(os.path.getmtime(path)) < cutoff
+    except FileNotFoundError:
+        return False
+
+# Referansı kalmayan fotoğrafları ve yarım kalmış yüklemeleri gruplar halinde sil
+def collect_photo_garbage():
+    folder = current_app.config['UPLOAD_FOLDER']
+    originals = os.path.join(folder, 'originals')
+    cutoff = datetime.utcnow() - current_app.config['PHOTO_GC_GRACE']
+    batch_size = current_app.config['PHOTO_GC_BATCH']
+    table = PhotoBlob.__table__
+    result = {'blobs': 0, 'orphans': 0, 'reprocessed': 0, 'freed_bytes': 0}
+    
+    # 1. Referans sayısı sıfır olan blob'lar. Dosyalar satırla aynı yazma
+    # transaction'ı içinde silinir; aynı resmi yeniden yükleyen istek commit'i
+    # beklediği için silinmek üzere olan dosyalara güvenemez
+    while True:
+        candidates = db.session.query(PhotoBlob.sha256).filter(
+            PhotoBlob.unreferenced_at < cutoff, PhotoBlob.ref_count <= 0
+        ).limit(batch_size).all()
+        if not candidates:
+            break
+        for (photo_id,) in candidates:
+            deleted = db.session.execute(
+                table.delete().where(table.c.sha256 == photo_id, table.c.ref_count <= 0)
+            ).rowcount
+            if deleted:
+                result['blobs'] += 1
+                result['freed_bytes'] += remove_files(
+                    variant_paths(folder, photo_id) + [original_photo_path(photo_id)]
+                )
+        db.session.commit()
+    
+    # 2. Yarım kalmış yüklemeler ve işlenmemiş orijinaller
+    for name in os.listdir(originals):
+        path = os.path.join(originals, name)
+        if not file_is_older_than(path, cutoff):
+            continue
+        blob = db.session.get(PhotoBlob, name) if PHOTO_ID_RE.fullmatch(name) else None
+        if blob is not None and blob.ref_count > 0:
+            # Kullanılan ama varyantları üretilmemiş fotoğraf: tekrar işle
+            if not has_variants(folder, name):
+                schedule_photo_processing(name)
+                result['reprocessed'] += 1
+            continue
+        result['orphans'] += 1
+        result['freed_bytes'] += remove_files([path])
+    
+    # 3. Kayıtsız varyantlar ve hiçbir kullanıcının kullanmadığı eski tek dosyalar
+    names = [n for n in os.listdir(folder) if os.path.isfile(os.path.join(folder, n))]
+    for start in range(0, len(names), batch_size):
+        batch = [n for n in names[start:start + batch_size]
+                 if file_is_older_than(os.path.join(folder, n), cutoff)]
+        variants = {n: VARIANT_RE.fullmatch(n) for n in batch}
+        blob_ids = {m.group(1) for m in variants.values() if m}
+        legacy = [n for n, m in variants.items() if not m and n != 'default.png']
+        known = {row[0] for row in db.session.query(PhotoBlob.sha256).filter(PhotoBlob.sha256.in_(blob_ids))}
+        # Önceki sürümün uuid adlı varyantları (<id>_<boyut>.<uzantı>) da kullanıcıya bağlıdır
+        stems = {n: n.split('_')[0] for n in legacy}
+        used = {row[0] for row in db.session.query(User.profile_photo).filter(
+            User.profile_photo.in_(set(legacy) | set(stems.values()))
+        )}
+        for name, match in variants.items():
+            if match and match.group(1) not in known:
+                orphan = True
+            else:
+                orphan = name in stems and name not in used and stems[name] not in used
+            if orphan:
+                result['orphans'] += 1
+                result['freed_bytes'] += remove_files([os.path.join(folder, name)])
+    
+    return result
+
+# Disk kullanımı ve tekilleştirme kazancı
+def photo_storage_usage():
+    folder = current_app.config['UPLOAD_FOLDER']
+    usage = {'blobs': 0, 'references': 0, 'stored_bytes': 0,
+             'stored_bytes_without_dedup': 0, 'uploaded_bytes': 0,
+             'uploaded_bytes_without_dedup': 0, 'unreferenced_blobs': 0}
+    
+    rows = db.session.query(PhotoBlob.sha256, PhotoBlob.ref_count, PhotoBlob.upload_bytes).yield_per(1000)
+    for photo_id, ref_count, upload_bytes in rows:
+        if ref_count <= 0:
+            usage['unreferenced_blobs'] += 1
+            continue
+        stored = sum(os.path.getsize(p) for p in variant_paths(folder, photo_id) if os.path.exists(p))
+        usage['blobs'] += 1
+        usage['references'] += ref_count
+        usage['stored_bytes'] += stored
+        usage['stored_bytes_without_dedup'] += stored * ref_count
+        usage['uploaded_bytes'] += upload_bytes
+        usage['uploaded_bytes_without_dedup'] += upload_bytes * ref_count
+    
+    usage['dedup_saved_bytes'] = usage['stored_bytes_without_dedup'] - usage['stored_bytes']
+    return usage
+
+# Süresi dolan silme kayıtlarını temizle
+def prune_tombstones():
+    cutoff = datetime.utcnow() - current_app.config['SYNC_TOMBSTONE_TTL']
+    deleted = SyncTombstone.query.filter(SyncTombstone.deleted_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+# Birden fazla worker process'i varsa periyodik temizliği yalnızca bu dosya
+# kilidini alan process yapar; kilidi tutan process ölürse bir sonraki turda
+# başka bir process devralır
+def acquire_maintenance_lock(path):
+    try:
+        import fcntl
+    except ImportError:
+        # Windows: başlatıcı tek process çalıştırır
+        return True
+    handle = open(path, 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    app_locks.append(handle)  # Kilit process yaşadığı sürece açık kalır
+    return True
+
+app_locks = []
+
+# Arka planda periyodik fotoğraf ve silme kaydı temizliği
+def start_maintenance(app):
+    lock_path = os.path.join(app.instance_path, 'maintenance.lock')
+    
+    def run():
+        holder = False
+        while True:
+            time.sleep(app.config['PHOTO_GC_INTERVAL'])
+            holder = holder or acquire_maintenance_lock(lock_path)
+            if not holder:
+                continue
+            with app.app_context():
+                if app.config['JOB_QUEUE_ENABLED']:
+                    # Temizlik worker'larda çalışır; önceki tur bitmediyse aynı iş tekrar eklenmez
+                    for kind in MAINTENANCE_JOBS:
+                        try:
+                            enqueue_job(kind, key=f'maintenance:{kind}')
+                        except Exception:
+                            app.logger.exception(f'Periyodik temizlik kuyruğa eklenemedi: {kind}')
+                    continue
+                for task in (collect_photo_garbage, prune_tombstones, prune_finished_jobs):
+                    try:
+                        task()
+                    except Exception:
+                        db.session.rollback()
+                        app.logger.exception(f'Periyodik temizlik başarısız: {task.__name__}')
+    
+    threading.Thread(target=run, name='maintenance', daemon=True).start()
+
+# Process havuzu callback'i istek bağlamı dışında çalışır, logger önceden alınır
+def log_photo_failure(logger):
+    def callback(future):
+        if future.exception() is not None:
+            logger.error('Profil fotoğrafı işlenemedi: %s', future.exception())
+    return callback
+
+# İşi türünün görünürlük süresi ve deneme hakkıyla kuyruğa ekler, iş id'sini döndürür
+def enqueue_job(kind, payload=None, key=None, delay=0):
+    job_type = job_types[kind]
+    job_id, _ = job_queue.enqueue(kind, payload, key=key, delay=delay,
+                                  timeout=job_type.timeout, max_attempts=job_type.max_attempts)
+    return job_id
+
+# Orijinali originals/ altına taşınmış fotoğrafın varyantlarını üret: iş kuyruğu
+# açıksa worker'lara bırakılır, değilse bu process'in havuzuna gönderilir
+def schedule_photo_processing(photo_id):
+    if current_app.config['JOB_QUEUE_ENABLED']:
+        enqueue_job('process_photo', {'photo_id': photo_id}, key=f'photo:{photo_id}')
+        return
+    future = photo_processor.submit(original_photo_path(photo_id), current_app.config['UPLOAD_FOLDER'], photo_id)
+    if future is not None:
+        future.add_done_callback(log_photo_failure(current_app.logger))
 
 # Ana sayfa
-@app.route('/')
+@api.route('/')
 def index():
     return jsonify({
         'message': 'FilMix Backend API',
@@ -141,7 +1235,7 @@ def index():
     })
 
 # Kullanıcı kaydı
-@app.route('/register', methods=['POST'])
+@api.route('/register', methods=['POST'])
 def register():
     try:
         data = request.get_json()
@@ -177,11 +1271,13 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HasherBusy as e:
+        return hasher_busy_response(e)
     except Exception as e:
         return jsonify({'message': f'Kayıt sırasında hata oluştu: {str(e)}'}), 500
 
 # Kullanıcı girişi
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -200,31 +1296,65 @@ def login():
         if not user or not user.check_password(password):
             return jsonify({'message': 'Kullanıcı adı veya şifre hatalı!'}), 401
         
-        # JWT token oluştur
-        token = jwt.encode({
-            'user_id': user.id,
-            'username': user.username
-        }, app.config['SECRET_KEY'], algorithm='HS256')
+        # Hash ayarları değiştiyse şifreyi yeni ayarlarla sessizce yeniden hash'le
+        if user.rehash_password_if_needed(password):
+            db.session.commit()
         
+        # Kısa ömürlü erişim token'ı ve yenileme token'ı oluştur
         return jsonify({
             'message': 'Giriş başarılı!',
-            'token': token,
+            **token_response(user),
             'user': user.to_dict()
         }), 200
         
+    except HasherBusy as e:
+        return hasher_busy_response(e)
     except Exception as e:
         return jsonify({'message': f'Giriş sırasında hata oluştu: {str(e)}'}), 500
 
+# Erişim token'ını yenileme
+@api.route('/token/refresh', methods=['POST'])
+def refresh_token():
+    data = request.get_json(silent=True) or {}
+    token = data.get('refresh_token')
+    
+    if not token:
+        return jsonify({'message': 'Yenileme token\'ı gerekli!'}), 400
+    
+    try:
+        # Yenileme token'ı her zaman veritabanındaki sürümle karşılaştırılır
+        payload = decode_token(token, 'refresh')
+        user = load_token_owner(payload) if payload else None
+    except jwt.InvalidTokenError:
+        user = None
+    
+    if not user:
+        return jsonify({'message': 'Geçersiz yenileme token\'ı!'}), 401
+    
+    return jsonify({
+        'message': 'Token yenilendi!',
+        **token_response(user)
+    }), 200
+
+# Token önbelleği sayaçları
+@api.route('/stats/auth_cache', methods=['GET'])
+@internal_only
+def auth_cache_stats():
+    return jsonify({**auth_cache.stats(), 'token_versions': len(token_versions)}), 200
+
 # Profil bilgilerini getir
-@app.route('/profile', methods=['GET'])
+@api.route('/profile', methods=['GET'])
 @token_required
 def get_profile(current_user):
-    return jsonify({
-        'user': current_user.to_dict()
-    }), 200
+    # Profil zaten bellekte; ETag içeriğin özetinden üretilir
+    user = current_user.to_dict()
+    digest = hashlib.sha256(json.dumps(user, sort_keys=True).encode()).hexdigest()[:32]
+    return conditional_response(f'profile-{current_user.id}-{digest}', lambda: (jsonify({
+        'user': user
+    }), 200))
 
 # Profil bilgilerini güncelle
-@app.route('/profile', methods=['PUT'])
+@api.route('/profile', methods=['PUT'])
 @token_required
 def update_profile(current_user):
     try:
@@ -257,7 +1387,7 @@ def update_profile(current_user):
         return jsonify({'message': f'Profil güncellenirken hata oluştu: {str(e)}'}), 500
 
 # Şifre değiştir
-@app.route('/change_password', methods=['POST'])
+@api.route('/change_password', methods=['POST'])
 @token_required
 def change_password(current_user):
     try:
@@ -277,17 +1407,23 @@ def change_password(current_user):
         if len(new_password) < 6:
             return jsonify({'message': 'Yeni şifre en az 6 karakter olmalıdır!'}), 400
         
-        # Şifreyi güncelle
+        # Şifreyi güncelle, eski token'ların hepsini iptal et
         current_user.set_password(new_password)
+        current_user.token_version += 1
         db.session.commit()
         
-        return jsonify({'message': 'Şifre başarıyla değiştirildi!'}), 200
+        return jsonify({
+            'message': 'Şifre başarıyla değiştirildi!',
+            **token_response(current_user)
+        }), 200
         
+    except HasherBusy as e:
+        return hasher_busy_response(e)
     except Exception as e:
         return jsonify({'message': f'Şifre değiştirilirken hata oluştu: {str(e)}'}), 500
 
 # Profil fotoğrafı yükle
-@app.route('/upload_photo', methods=['POST'])
+@api.route('/upload_photo', methods=['POST'])
 @token_required
 def upload_photo(current_user):
     try:
@@ -299,53 +1435,95 @@ def upload_photo(current_user):
         if file.filename == '':
             return jsonify({'message': 'Dosya seçilmedi!'}), 400
         
-        if file and allowed_file(file.filename):
-            # Eski fotoğrafı sil (default değilse)
-            if current_user.profile_photo != 'default.png':
-                old_photo_path = os.path.join(app.config['UPLOAD_FOLDER'], current_user.profile_photo)
-                if os.path.exists(old_photo_path):
-                    os.remove(old_photo_path)
-            
-            # Yeni dosya adı oluştur
-            filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4().hex}_{filename}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            # Dosyayı kaydet
-            file.save(file_path)
-            
-            # Veritabanını güncelle
-            current_user.profile_photo = unique_filename
-            db.session.commit()
-            
-            return jsonify({
-                'message': 'Profil fotoğrafı başarıyla güncellendi!',
-                'profile_photo': unique_filename,
-                'user': current_user.to_dict()
-            }), 200
+        # Dosyayı yazarken SHA-256'sını hesapla, sonra içeriğine bakarak doğrula
+        originals = os.path.join(current_app.config['UPLOAD_FOLDER'], 'originals')
+        temp_path, photo_id, size = save_upload(file.stream, originals)
         
-        return jsonify({'message': 'Geçersiz dosya formatı! (png, jpg, jpeg, gif)'}), 400
+        try:
+            inspect_image(temp_path)
+        except InvalidImage:
+            os.remove(temp_path)
+            return jsonify({'message': 'Geçersiz dosya formatı! (png, jpg, jpeg, gif, webp)'}), 400
+        
+        # Blob kaydı yoksa oluştur; referans sayısı profile_photo değişince artar,
+        # eski fotoğrafın referansı düşer ve dosyaları arka plandaki temizlikte silinir.
+        # Yazım kilidi önce alınır: eski fotoğraf commit'e kadar değişmeden okunur
+        begin_write(db.session)
+        table = PhotoBlob.__table__
+        db.session.execute(
+            dialect_insert(table).values(
+                sha256=photo_id, ref_count=0, upload_bytes=size,
+                created_at=datetime.utcnow(), unreferenced_at=datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=[table.c.sha256])
+        )
+        current_user.profile_photo = photo_id
+        db.session.commit()
+        
+        # Commit'ten sonra referans > 0, temizlik bu dosyalara dokunmaz
+        original_path = original_photo_path(photo_id)
+        if has_variants(current_app.config['UPLOAD_FOLDER'], photo_id) or os.path.exists(original_path):
+            # Aynı resim daha önce yüklenmiş (veya işleniyor)
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, original_path)
+            # Boyutlandırma ve yeniden kodlama arka planda yapılır
+            schedule_photo_processing(photo_id)
+        
+        return jsonify({
+            'message': 'Profil fotoğrafı başarıyla güncellendi!',
+            'profile_photo': photo_id,
+            'user': current_user.to_dict()
+        }), 200
         
     except Exception as e:
         return jsonify({'message': f'Dosya yüklenirken hata oluştu: {str(e)}'}), 500
 
 # Profil fotoğraflarını serve et
-@app.route('/profile_photos/<filename>')
+# size: istenen kenar uzunluğu (px), format: webp/jpg (verilmezse Accept başlığına göre)
+@api.route('/profile_photos/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    if not (PHOTO_ID_RE.fullmatch(filename) or UUID_PHOTO_ID_RE.fullmatch(filename)):
+        # Eski yüklemeler tek dosya olarak saklanıyor; adları uuid içerdiği için onlar da değişmez
+        response = send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+        if filename != 'default.png':
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+    
+    try:
+        requested = int(request.args.get('size', 256))
+    except ValueError:
+        requested = 256
+    size = next((s for s in sorted(VARIANT_SIZES) if s >= requested), max(VARIANT_SIZES))
+    
+    extension = request.args.get('format')
+    if extension not in ('webp', 'jpg'):
+        extension = 'webp' if request.accept_mimetypes['image/webp'] else 'jpg'
+    
+    name = variant_name(filename, size, extension)
+    if not os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], name)):
+        # Varyantlar henüz üretilmedi. Orijinal EXIF/GPS verisi taşıdığı için
+        # hiçbir zaman gönderilmez; istemci varsayılan fotoğrafı gösterip tekrar dener
+        response = jsonify({'message': 'Profil fotoğrafı henüz hazır değil!'})
+        response.status_code = 404
+        response.headers['Cache-Control'] = 'no-cache'
+        if os.path.exists(original_photo_path(filename)):
+            response.headers['Retry-After'] = '1'
+        return response
+    
+    # URL içeriğin hash'i olduğu için yanıt hiç değişmez
+    response = send_from_directory(current_app.config['UPLOAD_FOLDER'], name)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['Vary'] = 'Accept'
+    return response
 
 # Varsayılan profil fotoğrafını sil
-@app.route('/reset_photo', methods=['POST'])
+@api.route('/reset_photo', methods=['POST'])
 @token_required
 def reset_photo(current_user):
     try:
-        # Eski fotoğrafı sil (default değilse)
-        if current_user.profile_photo != 'default.png':
-            old_photo_path = os.path.join(app.config['UPLOAD_FOLDER'], current_user.profile_photo)
-            if os.path.exists(old_photo_path):
-                os.remove(old_photo_path)
-        
-        # Varsayılan fotoğrafa dön
+        # Varsayılan fotoğrafa dön; eski fotoğrafın dosyaları referansı
+        # kalmazsa arka plandaki temizlikte silinir
+        begin_write(db.session)
         current_user.profile_photo = 'default.png'
         db.session.commit()
         
@@ -357,67 +1535,86 @@ def reset_photo(current_user):
     except Exception as e:
         return jsonify({'message': f'Fotoğraf sıfırlanırken hata oluştu: {str(e)}'}), 500
 
+# Yeni favori ve puanlar commit'ten sonra trend sayaçlarına eklenir; sayaç
+# hatası yazımı geri almaz, kayıp sayım rebuild-trending ile geri gelir
+def record_trending(kind, row):
+    try:
+        trending.record(kind, row['movie_id'], row.get('movie_title'), row.get('movie_poster'),
+                        row.get('movie_year'))
+    except Exception:
+        current_app.logger.exception('Trend sayacı güncellenemedi')
+
 # ==================== FAVORİLER API ====================
 
 # Favorilere film ekleme
-@app.route('/favorites', methods=['POST'])
+@api.route('/favorites', methods=['POST'])
 @token_required
 def add_favorite(current_user):
     try:
         data = request.get_json()
         
-        if not data or 'movie_id' not in data:
-            return jsonify({'message': 'Film ID gerekli!'}), 400
+        error = validate_favorite_item(data)
+        if error:
+            return jsonify({'message': error}), 400
         
-        movie_id = data['movie_id']
-        movie_title = data.get('movie_title', 'Unknown')
-        movie_poster = data.get('movie_poster', '')
-        movie_year = data.get('movie_year', '')
+        user_id = current_user.id
         
-        # Zaten favorilerde mi kontrol et
-        existing_favorite = Favorite.query.filter_by(
-            user_id=current_user.id, 
-            movie_id=movie_id
-        ).first()
+        # Tek ifade: zaten favorideyse hiçbir şey yazılmaz (kontrol ve ekleme arasında yarış yok)
+        def write():
+            _, by_movie = upsert_favorites(user_id, [data])
+            result = by_movie[data['movie_id']]
+            if result['status'] == 'exists':
+                # Hiçbir şey yazılmadı (sürüm de artmadı); açılan transaction geri alınır
+                raise RollbackWrite(result)
+            return result
         
-        if existing_favorite:
+        result = commit_write(write)
+        if result['status'] == 'exists':
             return jsonify({'message': 'Film zaten favorilerde!'}), 400
-        
-        # Yeni favori oluştur
-        new_favorite = Favorite(
-            user_id=current_user.id,
-            movie_id=movie_id,
-            movie_title=movie_title,
-            movie_poster=movie_poster,
-            movie_year=movie_year
-        )
-        
-        db.session.add(new_favorite)
-        db.session.commit()
+        record_trending('favorites', result['favorite'])
         
         return jsonify({
             'message': 'Film favorilere eklendi!',
-            'favorite': new_favorite.to_dict()
+            'favorite': result['favorite']
         }), 201
         
     except Exception as e:
         return jsonify({'message': f'Favorilere ekleme hatası: {str(e)}'}), 500
 
+# Birden fazla filmi tek transaction'da favorilere ekleme (içe aktarma, çevrimdışı kuyruk)
+@api.route('/favorites/bulk', methods=['POST'])
+@token_required
+def add_favorites_bulk(current_user):
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else None
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'message': 'items listesi gerekli!'}), 400
+        if len(items) > MAX_BULK_ITEMS:
+            return jsonify({'message': f'Tek istekte en fazla {MAX_BULK_ITEMS} kayıt gönderilebilir!'}), 400
+        
+        results = bulk_write(items, validate_favorite_item, upsert_favorites, current_user.id)
+        return jsonify({'results': results, 'count': len(results)}), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'Toplu favori ekleme hatası: {str(e)}'}), 500
+
 # Favorilerden film çıkarma
-@app.route('/favorites/<movie_id>', methods=['DELETE'])
+@api.route('/favorites/<movie_id>', methods=['DELETE'])
 @token_required
 def remove_favorite(current_user, movie_id):
     try:
-        favorite = Favorite.query.filter_by(
-            user_id=current_user.id,
-            movie_id=movie_id
-        ).first()
+        user_id = current_user.id
         
-        if not favorite:
-            return jsonify({'message': 'Film favorilerde bulunamadı!'}), 404
+        def write():
+            favorite = Favorite.query.filter_by(user_id=user_id, movie_id=movie_id).first()
+            if favorite is not None:
+                db.session.delete(favorite)
+            return favorite is not None
         
-        db.session.delete(favorite)
-        db.session.commit()
+        if not commit_write(write):
+            return jsonify({'message': 'Film favorilerde bulunamadı!'}), 404
         
         return jsonify({'message': 'Film favorilerden çıkarıldı!'}), 200
         
@@ -425,23 +1622,21 @@ def remove_favorite(current_user, movie_id):
         return jsonify({'message': f'Favorilerden çıkarma hatası: {str(e)}'}), 500
 
 # Kullanıcının favori filmlerini listeleme
-@app.route('/favorites', methods=['GET'])
+@api.route('/favorites', methods=['GET'])
 @token_required
+@collection_cached('favorites')
 def get_favorites(current_user):
     try:
-        favorites = Favorite.query.filter_by(user_id=current_user.id).order_by(Favorite.added_at.desc()).all()
-        
-        return jsonify({
-            'favorites': [favorite.to_dict() for favorite in favorites],
-            'count': len(favorites)
-        }), 200
+        query = Favorite.query.filter_by(user_id=current_user.id)
+        return list_response(query, Favorite.added_at, Favorite.id, 'favorites')
         
     except Exception as e:
         return jsonify({'message': f'Favoriler alınırken hata: {str(e)}'}), 500
 
 # Film favoride mi kontrol et
-@app.route('/favorites/check/<movie_id>', methods=['GET'])
+@api.route('/favorites/check/<movie_id>', methods=['GET'])
 @token_required
+@collection_cached('favorites')
 def check_favorite(current_user, movie_id):
     try:
         favorite = Favorite.query.filter_by(
@@ -457,7 +1652,7 @@ def check_favorite(current_user, movie_id):
 # ==================== PUANLAMA API ====================
 
 # Film puanlama
-@app.route('/ratings', methods=['POST'])
+@api.route('/ratings', methods=['POST'])
 @token_required
 def rate_movie(current_user):
     try:
@@ -466,49 +1661,54 @@ def rate_movie(current_user):
         if not data or 'movie_id' not in data or 'rating' not in data:
             return jsonify({'message': 'Film ID ve puan gerekli!'}), 400
         
-        movie_id = data['movie_id']
-        rating_value = float(data['rating'])
-        movie_title = data.get('movie_title', 'Unknown')
-        
         # Puan aralığı kontrolü
-        if rating_value < 1.0 or rating_value > 5.0:
-            return jsonify({'message': 'Puan 1.0 ile 5.0 arasında olmalı!'}), 400
+        error = validate_rating_item(data)
+        if error:
+            return jsonify({'message': error}), 400
         
-        # Mevcut puanı kontrol et
-        existing_rating = Rating.query.filter_by(
-            user_id=current_user.id,
-            movie_id=movie_id
-        ).first()
+        user_id = current_user.id
         
-        if existing_rating:
-            # Puanı güncelle
-            existing_rating.rating = rating_value
-            existing_rating.updated_at = datetime.utcnow()
-            message = 'Film puanı güncellendi!'
-        else:
-            # Yeni puan oluştur
-            existing_rating = Rating(
-                user_id=current_user.id,
-                movie_id=movie_id,
-                rating=rating_value,
-                movie_title=movie_title
-            )
-            db.session.add(existing_rating)
-            message = 'Film puanlandı!'
+        # Tek ifadeyle ekle veya güncelle (kontrol ve ekleme arasında yarış yok)
+        def write():
+            _, by_movie = upsert_ratings(user_id, [data])
+            return by_movie[data['movie_id']]
         
-        db.session.commit()
+        result = commit_write(write)
+        # Puan güncellemesi değil yalnızca yeni puan sayılır (tekrar tekrar puanlama listeyi şişirmez)
+        if result['status'] == 'created':
+            record_trending('ratings', result['rating'])
         
         return jsonify({
-            'message': message,
-            'rating': existing_rating.to_dict()
+            'message': 'Film puanlandı!' if result['status'] == 'created' else 'Film puanı güncellendi!',
+            'rating': result['rating']
         }), 201
         
     except Exception as e:
         return jsonify({'message': f'Puanlama hatası: {str(e)}'}), 500
 
+# Birden fazla puanı tek transaction'da ekleme/güncelleme
+@api.route('/ratings/bulk', methods=['POST'])
+@token_required
+def rate_movies_bulk(current_user):
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else None
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'message': 'items listesi gerekli!'}), 400
+        if len(items) > MAX_BULK_ITEMS:
+            return jsonify({'message': f'Tek istekte en fazla {MAX_BULK_ITEMS} kayıt gönderilebilir!'}), 400
+        
+        results = bulk_write(items, validate_rating_item, upsert_ratings, current_user.id)
+        return jsonify({'results': results, 'count': len(results)}), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'Toplu puanlama hatası: {str(e)}'}), 500
+
 # Film puanını alma
-@app.route('/ratings/<movie_id>', methods=['GET'])
+@api.route('/ratings/<movie_id>', methods=['GET'])
 @token_required
+@collection_cached('ratings')
 def get_movie_rating(current_user, movie_id):
     try:
         rating = Rating.query.filter_by(
@@ -524,64 +1724,1012 @@ def get_movie_rating(current_user, movie_id):
     except Exception as e:
         return jsonify({'message': f'Puan alınırken hata: {str(e)}'}), 500
 
+# Birden fazla filmin puanını tek sorguda alma
+@api.route('/ratings/lookup', methods=['POST'])
+@token_required
+def lookup_ratings(current_user):
+    data = request.get_json(silent=True) or {}
+    movie_ids = data.get('movie_ids')
+    
+    query = Rating.query.filter(Rating.user_id == current_user.id)
+    
+    if movie_ids is None:
+        # Film listesi verilmezse kullanıcının tüm favorilerinin puanları döner
+        favorite_ids = db.select(Favorite.movie_id).filter_by(user_id=current_user.id)
+        query = query.filter(Rating.movie_id.in_(favorite_ids))
+    else:
+        movie_ids, error = normalize_lookup_ids(movie_ids)
+        if error:
+            return jsonify({'message': error}), 400
+        if not movie_ids:
+            return jsonify({'ratings': {}, 'count': 0}), 200
+        query = query.filter(Rating.movie_id.in_(movie_ids))
+    
+    query = query.with_entities(*LIST_COLUMNS['ratings'])
+    names = [column.key for column in LIST_COLUMNS['ratings']]
+    
+    def generate():
+        # Satırları parça parça okuyup JSON nesnesini akış halinde yaz
+        yield b'{"ratings": {'
+        count = 0
+        for row in query.yield_per(100):
+            if count:
+                yield b', '
+            yield json_bytes(row.movie_id) + b': ' + json_bytes(dict(zip(names, row)))
+            count += 1
+        yield f'}}, "count": {count}}}'.encode()
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 # Kullanıcının tüm puanlarını listeleme
-@app.route('/ratings', methods=['GET'])
+@api.route('/ratings', methods=['GET'])
 @token_required
+@collection_cached('ratings')
 def get_user_ratings(current_user):
     try:
-        ratings = Rating.query.filter_by(user_id=current_user.id).order_by(Rating.updated_at.desc()).all()
-        
-        return jsonify({
-            'ratings': [rating.to_dict() for rating in ratings],
-            'count': len(ratings)
-        }), 200
+        query = Rating.query.filter_by(user_id=current_user.id)
+        return list_response(query, Rating.updated_at, Rating.id, 'ratings')
         
     except Exception as e:
         return jsonify({'message': f'Puanlar alınırken hata: {str(e)}'}), 500
 
 # Film puanını silme
-@app.route('/ratings/<movie_id>', methods=['DELETE'])
+@api.route('/ratings/<movie_id>', methods=['DELETE'])
 @token_required
 def delete_rating(current_user, movie_id):
     try:
-        rating = Rating.query.filter_by(
-            user_id=current_user.id,
-            movie_id=movie_id
-        ).first()
+        user_id = current_user.id
         
-        if not rating:
-            return jsonify({'message': 'Film puanı bulunamadı!'}), 404
+        def write():
+            rating = Rating.query.filter_by(user_id=user_id, movie_id=movie_id).first()
+            if rating is not None:
+                db.session.delete(rating)
+            return rating is not None
         
-        db.session.delete(rating)
-        db.session.commit()
+        if not commit_write(write):
+            return jsonify({'message': 'Film puanı bulunamadı!'}), 404
         
         return jsonify({'message': 'Film puanı silindi!'}), 200
         
     except Exception as e:
         return jsonify({'message': f'Puan silme hatası: {str(e)}'}), 500
 
-if __name__ == '__main__':
+# ==================== SENKRONİZASYON API ====================
+
+SYNC_COLLECTIONS = (('favorites', Favorite), ('ratings', Rating))
+
+# Sync token'ı: koleksiyon başına son görülen sürüm ve token'ın üretildiği an
+def encode_sync_token(versions):
+    raw = json.dumps({**versions, 'issued': int(time.time())}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_sync_token(token):
+    data = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    versions = {name: int(data.get(name, 0)) for name, _ in SYNC_COLLECTIONS}
+    return versions, int(data['issued'])
+
+# Bir koleksiyonun since sürümünden sonraki değişiklikleri (en fazla limit kadar)
+def collection_changes(user_id, name, model, since, limit, include_deleted):
+    current = db.session.query(CollectionVersion.version).filter_by(
+        user_id=user_id, collection=name
+    ).scalar() or 0
+    if current <= since:
+        return {'changed': [], 'deleted': []}, since, False
+    
+    rows = model.query.filter(
+        model.user_id == user_id, model.sync_version > since
+    ).order_by(model.sync_version).limit(limit + 1).all()
+    changes = [(row.sync_version, row) for row in rows]
+    if include_deleted:
+        tombstones = db.session.query(SyncTombstone.version, SyncTombstone.movie_id).filter(
+            SyncTombstone.user_id == user_id,
+            SyncTombstone.collection == name,
+            SyncTombstone.version > since
+        ).order_by(SyncTombstone.version).limit(limit + 1).all()
+        changes.extend(tombstones)
+    
+    # Sürümler koleksiyon içinde benzersizdir; iki listeyi sürüme göre birleştir
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    next_version = changes[-1][0] if has_more else max(current, changes[-1][0] if changes else since)
+    
+    # Aynı sayfada hem silme hem yeniden ekleme varsa satır daha yenidir;
+    # istemci önce deleted listesini, sonra changed listesini uygular
+    return {
+        'changed': [item.to_dict() for _, item in changes if not isinstance(item, str)],
+        'deleted': [item for _, item in changes if isinstance(item, str)]
+    }, next_version, has_more
+
+# Son senkronizasyondan bu yana eklenen, değişen ve silinen favori/puanlar
+@api.route('/sync', methods=['GET'])
+@token_required
+def sync_library(current_user):
+    try:
+        since = request.args.get('since')
+        reset = since is None
+        versions = {name: 0 for name, _ in SYNC_COLLECTIONS}
+        if since:
+            try:
+                versions, issued = decode_sync_token(since)
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+                return jsonify({'message': 'Geçersiz sync token!'}), 400
+            # Silme kayıtları temizlenmiş olabilir: baştan senkronize et
+            if time.time() - issued > current_app.config['SYNC_TOMBSTONE_TTL'].total_seconds():
+                versions = {name: 0 for name, _ in SYNC_COLLECTIONS}
+                reset = True
+        
+        try:
+            limit = int(request.args.get('limit', current_app.config['SYNC_PAGE_SIZE']))
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                raise ValueError(limit)
+        except ValueError:
+            return jsonify({'message': f'Geçersiz limit! (1-{MAX_PAGE_SIZE} arası olmalı)'}), 400
+        
+        response = {'reset': reset}
+        has_more = False
+        for name, model in SYNC_COLLECTIONS:
+            response[name], versions[name], more = collection_changes(
+                current_user.id, name, model, versions[name], limit, include_deleted=not reset
+            )
+            has_more = has_more or more
+        
+        response['has_more'] = has_more
+        response['next_token'] = encode_sync_token(versions)
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'Senkronizasyon hatası: {str(e)}'}), 500
+
+# ==================== İÇE / DIŞA AKTARMA API ====================
+
+# Kullanıcının satırlarını id sırasıyla gruplar halinde okur; her grup ayrı
+# bir sorgudur, uzun süren aktarım veritabanında okuma kilidi tutmaz
+def iter_user_rows(model, columns, user_id):
+    last_id = 0
+    while True:
+        rows = db.session.query(model.id, *columns).filter(
+            model.user_id == user_id, model.id > last_id
+        ).order_by(model.id).limit(EXPORT_BATCH_SIZE).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+def export_records(user_id, include):
+    if 'ratings' in include:
+        columns = (Rating.movie_id, Rating.movie_title, Rating.rating, Rating.updated_at)
+        for row in iter_user_rows(Rating, columns, user_id):
+            yield {'type': 'rating', 'movie_id': row.movie_id, 'movie_title': row.movie_title,
+                   'rating': row.rating, 'date': row.updated_at.isoformat()}
+    if 'favorites' in include:
+        columns = (Favorite.movie_id, Favorite.movie_title, Favorite.movie_year,
+                   Favorite.movie_poster, Favorite.added_at)
+        for row in iter_user_rows(Favorite, columns, user_id):
+            yield {'type': 'favorite', 'movie_id': row.movie_id, 'movie_title': row.movie_title,
+                   'movie_year': row.movie_year or '', 'movie_poster': row.movie_poster or '',
+                   'date': row.added_at.isoformat()}
+
+# Puanları ve favorileri CSV veya NDJSON olarak indir
+@api.route('/export', methods=['GET'])
+@token_required
+def export_library(current_user):
+    fmt = request.args.get('format', 'csv')
+    include = request.args.get('include', 'ratings,favorites').split(',')
+    if fmt not in EXPORT_FORMATS or not set(include) <= {'ratings', 'favorites'}:
+        return jsonify({'message': 'Geçersiz format veya include! (format: csv/ndjson, include: ratings,favorites)'}), 400
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    lines = export_lines(export_records(current_user.id, include), fmt)
+    response = Response(stream_with_context(lines), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=filmix-{current_user.username}.{fmt}'
+    return response
+
+# Okunan kayıtları türlerine göre gruplar, her grubu ayrı transaction'da yazar
+# ve ilerlemeyi NDJSON satırları olarak bildirir
+def import_records(user_id, records):
+    writers = {
+        'rating': (validate_rating_item, upsert_ratings),
+        'favorite': (validate_favorite_item, upsert_favorites),
+    }
+    batches = {kind: [] for kind in writers}
+    counts = {'rows': 0, 'created': 0, 'updated': 0, 'exists': 0, 'duplicate': 0, 'errors': 0}
+    
+    def flush(kind):
+        _, upsert = writers[kind]
+        duplicates, by_movie = upsert(user_id, batches[kind])
+        db.session.commit()
+        for duplicate, item in zip(duplicates, batches[kind]):
+            counts[(duplicate or by_movie[item['movie_id']])['status']] += 1
+        batches[kind] = []
+        return json.dumps({'type': 'progress', **counts}) + '\n'
+    
+    try:
+        for line_no, kind, item in records:
+            counts['rows'] += 1
+            error = item if kind is None else writers[kind][0](item)
+            if error:
+                counts['errors'] += 1
+                yield json.dumps({'type': 'error', 'line': line_no, 'message': error}, ensure_ascii=False) + '\n'
+                continue
+            
+            batches[kind].append(item)
+            if len(batches[kind]) >= IMPORT_BATCH_SIZE:
+                yield flush(kind)
+        
+        for kind in writers:
+            if batches[kind]:
+                yield flush(kind)
+    except Exception as e:
+        # Önceki gruplar yazılmış durumda; yalnızca yarım kalan grup geri alınır
+        db.session.rollback()
+        yield json.dumps({'type': 'failed', 'message': f'İçe aktarma hatası: {str(e)}', **counts},
+                         ensure_ascii=False) + '\n'
+        return
+    
+    yield json.dumps({'type': 'done', **counts}) + '\n'
+
+# IMDb puan/liste CSV'si veya FilMix dışa aktarma dosyasını içe aktar
+@api.route('/import', methods=['POST'])
+@token_required
+def import_library(current_user):
+    if 'file' not in request.files:
+        return jsonify({'message': 'Dosya bulunamadı!'}), 400
+    
+    file = request.files['file']
+    config = current_app.config
+    if config['JOB_QUEUE_ENABLED'] and (request.content_length or 0) >= config['IMPORT_QUEUE_MIN_BYTES']:
+        return queue_import(current_user, file)
+    try:
+        records = parse_import(file.stream, file.filename or '')
+    except UnknownFormat as e:
+        return jsonify({'message': str(e)}), 400
+    
+    response = Response(
+        stream_with_context(import_records(current_user.id, records)),
+        mimetype='application/x-ndjson'
+    )
+    # İlerleme satırları istemciye hemen ulaşmalı, sıkıştırma tamponlamasın
+    response.headers['Cache-Control'] = 'no-transform'
+    return response
+
+# Büyük dosya: yüklemeyi instance/imports altına kaydedip işi kuyruğa ekler.
+# Biçim istekte kontrol edilir; satırlar worker'da aynı import_records ile yazılır
+def queue_import(current_user, file):
+    directory = import_folder()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, uuid.uuid4().hex)
+    file.save(path)
+    try:
+        with open(path, 'rb') as f:
+            parse_import(f, file.filename or '')
+    except UnknownFormat as e:
+        os.remove(path)
+        return jsonify({'message': str(e)}), 400
+    
+    job_id = enqueue_job('import_library', {
+        'user_id': current_user.id, 'path': path, 'filename': file.filename or ''
+    })
+    return jsonify({
+        'message': 'İçe aktarma kuyruğa alındı.',
+        'job_id': job_id,
+        'status_url': url_for('api.import_status', job_id=job_id)
+    }), 202
+
+def import_folder():
+    return os.path.join(current_app.instance_path, 'imports')
+
+# Kuyruğa alınmış içe aktarmanın durumu; bittiğinde sayılar ve ilk hatalar döner
+@api.route('/import/<int:job_id>', methods=['GET'])
+@token_required
+def import_status(current_user, job_id):
+    job = job_queue.get(job_id)
+    payload = json.loads(job['payload']) if job and job['kind'] == 'import_library' else {}
+    if payload.get('user_id') != current_user.id:
+        return jsonify({'message': 'İçe aktarma bulunamadı!'}), 404
+    
+    body = {'job_id': job_id, 'state': job['state'], 'attempts': job['attempts']}
+    if job['state'] == 'failed':
+        body['error'] = (job['last_error'] or '').strip().splitlines()[-1:]
+    try:
+        with open(payload['path'] + '.json', encoding='utf-8') as f:
+            body['result'] = json.load(f)
+    except FileNotFoundError:
+        pass
+    return jsonify(body), 200
+
+# ==================== FİLM İSTATİSTİKLERİ API ====================
+
+# Bir filmin ortalama puanı, puan sayısı ve yıldız dağılımı
+@api.route('/movies/<movie_id>/stats', methods=['GET'])
+def get_movie_stats(movie_id):
+    try:
+        stats = db.session.get(MovieStats, movie_id)
+        return jsonify({
+            'movie_id': movie_id,
+            'stats': stats.to_dict() if stats else MovieStats.empty_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'İstatistik alınırken hata: {str(e)}'}), 500
+
+# Bir sayfadaki filmlerin istatistiklerini tek sorguda alma
+@api.route('/movies/stats', methods=['POST'])
+def lookup_movie_stats():
+    data = request.get_json(silent=True) or {}
+    movie_ids = data.get('movie_ids')
+    
+    movie_ids, error = normalize_lookup_ids(movie_ids)
+    if error:
+        return jsonify({'message': error}), 400
+    
+    try:
+        rows = MovieStats.query.filter(MovieStats.movie_id.in_(set(movie_ids))).all() if movie_ids else []
+        found = {row.movie_id: row.to_dict() for row in rows}
+        return jsonify({
+            'stats': {movie_id: found.get(movie_id) or MovieStats.empty_dict() for movie_id in movie_ids}
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'İstatistik alınırken hata: {str(e)}'}), 500
+
+# movie_stats tablosunu rating tablosundan baştan hesapla
+def rebuild_movie_stats():
+    with db.engine.begin() as connection:
+        for statement in migrations.MOVIE_STATS_REBUILD:
+            connection.execute(text(statement))
+    return MovieStats.query.count()
+
+# Kullanım: flask --app app rebuild-stats
+@api.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    print(f'{rebuild_movie_stats()} film için istatistik yeniden hesaplandı.')
+
+# ==================== TREND API ====================
+
+# Son bir saatte, günde veya haftada en çok favorilenen ve puanlanan filmler
+# window: hour/day/week, kind: all (favori + puan ağırlıklı), favorites, ratings
+@api.route('/trending', methods=['GET'])
+def get_trending():
+    window = request.args.get('window', 'day')
+    kind = request.args.get('kind', 'all')
+    if window not in current_app.config['TRENDING_WINDOWS']:
+        return jsonify({'message': f"window: {', '.join(current_app.config['TRENDING_WINDOWS'])}"}), 400
+    if kind not in TRENDING_KINDS:
+        return jsonify({'message': f"kind: {', '.join(TRENDING_KINDS)}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), current_app.config['TRENDING_SIZE'])
+    except ValueError:
+        return jsonify({'message': 'limit bir sayı olmalı!'}), 400
+    
+    try:
+        results = [
+            {'movie_id': movie_id, 'movie_title': title, 'movie_poster': poster, 'movie_year': year,
+             'score': round(score, 3)}
+            for movie_id, score, (title, poster, year) in trending.top(window, kind, limit)
+        ]
+        response = jsonify({'window': window, 'kind': kind, 'results': results, 'count': len(results)})
+        # Liste kullanıcıya özel değil; diğer worker'ların sayımları zaten birkaç saniye gecikir
+        response.headers['Cache-Control'] = 'public, max-age=30'
+        return response, 200
+    except Exception as e:
+        return jsonify({'message': f'Trend listesi alınırken hata: {str(e)}'}), 500
+
+# Trend sayaçlarını favori ve puan tablolarından baştan kur (en uzun pencere kadar geçmiş okunur)
+def rebuild_trending():
+    longest = max(seconds * count for seconds, count, _ in current_app.config['TRENDING_WINDOWS'].values())
+    cutoff = datetime.utcnow() - timedelta(seconds=longest)
+    
+    def timestamp(value):
+        return value.replace(tzinfo=timezone.utc).timestamp()
+    
+    def events():
+        for movie_id, title, poster, year, added_at in db.session.query(
+            Favorite.movie_id, Favorite.movie_title, Favorite.movie_poster, Favorite.movie_year, Favorite.added_at
+        ).filter(Favorite.added_at >= cutoff).yield_per(10000):
+            yield 'favorites', movie_id, timestamp(added_at), title, poster, year
+        for movie_id, title, created_at in db.session.query(
+            Rating.movie_id, Rating.movie_title, Rating.created_at
+        ).filter(Rating.created_at >= cutoff).yield_per(10000):
+            yield 'ratings', movie_id, timestamp(created_at), title, None, None
+    
+    return trending.rebuild(events())
+
+# Kullanım: flask --app app rebuild-trending
+@api.cli.command('rebuild-trending')
+def rebuild_trending_command():
+    print(f'Trend sayaçları {rebuild_trending()} favori/puan kaydından yeniden kuruldu.')
+
+# ==================== ÖNERİ API ====================
+
+# "X'i beğendiğin için" film önerileri
+# movie_id verilirse o filme benzer filmler, verilmezse kullanıcının puan ve favorilerine göre
+@api.route('/recommendations', methods=['GET'])
+@token_required
+def get_recommendations(current_user):
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'message': 'limit bir sayı olmalı!'}), 400
+    
+    try:
+        model = recommendation_store.get()
+        if model is None:
+            return jsonify({'message': 'Öneri modeli henüz oluşturulmadı!'}), 503
+        
+        movie_id = request.args.get('movie_id')
+        if movie_id:
+            results = model.similar(movie_id, limit)
+            return jsonify({'recommendations': results, 'count': len(results)}), 200
+        
+        max_seeds = current_app.config['RECOMMENDATIONS_MAX_SEEDS']
+        ratings = db.session.query(Rating.movie_id, Rating.rating).filter_by(
+            user_id=current_user.id
+        ).order_by(Rating.updated_at.desc()).limit(max_seeds).all()
+        favorites = db.session.query(Favorite.movie_id).filter_by(
+            user_id=current_user.id
+        ).order_by(Favorite.added_at.desc()).limit(max_seeds).all()
+        
+        # Yüksek puanlar ve favoriler öneriyi besler, düşük puanlar sadece hariç tutulur
+        seeds = {m: r - 2.5 for m, r in ratings if r >= 3.5}
+        for (m,) in favorites:
+            seeds[m] = max(seeds.get(m, 0), 1.0)
+        seen = {m for m, _ in ratings} | {m for (m,) in favorites}
+        
+        results = model.for_user(seeds, exclude=seen, n=limit)
+        return jsonify({'recommendations': results, 'count': len(results)}), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'Öneriler alınırken hata: {str(e)}'}), 500
+
+# Öneri modelini Rating ve Favorite tablolarından yeniden oluştur; özet metni döndürür
+def build_recommendations():
+    start = time.perf_counter()
+    titles = {}
+    
+    def ratings():
+        for user_id, movie_id, rating, title in db.session.query(
+            Rating.user_id, Rating.movie_id, Rating.rating, Rating.movie_title
+        ).yield_per(10000):
+            titles[movie_id] = title
+            yield user_id, movie_id, rating
+    
+    def favorites():
+        for user_id, movie_id, title in db.session.query(
+            Favorite.user_id, Favorite.movie_id, Favorite.movie_title
+        ).yield_per(10000):
+            titles.setdefault(movie_id, title)
+            yield user_id, movie_id
+    
+    matrix, movie_ids = build_matrix(ratings(), favorites())
+    if not movie_ids:
+        return 'Puan veya favori bulunamadı, model oluşturulmadı.'
+    neighbors, scores = top_k_similar(matrix, current_app.config['RECOMMENDATIONS_TOP_K'])
+    version = write_model(recommendation_store.directory, neighbors, scores, movie_ids, titles)
+    return (f'Öneri modeli {version}: {matrix.shape[0]} kullanıcı x {matrix.shape[1]} film, '
+            f'{matrix.nnz} etkileşim, {time.perf_counter() - start:.1f} sn')
+
+# Kullanım: flask --app app build-recommendations
+@api.cli.command('build-recommendations')
+def build_recommendations_command():
+    print(build_recommendations())
+
+# ==================== KATALOG API ====================
+
+# Önbellekteki (gerekirse TMDB'den alınan) yanıtı olduğu gibi döndür
+def catalog_response(path, params=None):
+    params = {'language': current_app.config['CATALOG_LANGUAGE'], **(params or {})}
+    try:
+        body, cache_status = catalog_cache.get(path, params, current_app.config['CATALOG_TTL'][path])
+    except UpstreamError as e:
+        return jsonify({'message': f'Katalog alınamadı: {str(e)}'}), 502
+    
+    response = Response(body, mimetype='application/json')
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def catalog_page():
+    try:
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        page = 1
+    return min(max(page, 1), 500)
+
+# Popüler filmler
+@api.route('/catalog/popular', methods=['GET'])
+def catalog_popular():
+    return catalog_response('movie/popular', {'page': catalog_page()})
+
+# Vizyondaki filmler
+@api.route('/catalog/now_playing', methods=['GET'])
+def catalog_now_playing():
+    return catalog_response('movie/now_playing', {'page': catalog_page()})
+
+# Film türleri
+@api.route('/catalog/genres', methods=['GET'])
+def catalog_genres():
+    return catalog_response('genre/movie/list')
+
+# Türe göre filmler
+@api.route('/catalog/discover', methods=['GET'])
+def catalog_discover():
+    params = {'page': catalog_page()}
+    if request.args.get('with_genres'):
+        params['with_genres'] = request.args['with_genres']
+    return catalog_response('discover/movie', params)
+
+# Popüler filmlerden rastgele seçim (istemci tüm sayfayı indirmez)
+@api.route('/catalog/random', methods=['GET'])
+def catalog_random():
+    try:
+        count = min(max(int(request.args.get('count', 10)), 1), 20)
+    except ValueError:
+        return jsonify({'message': 'count bir sayı olmalı!'}), 400
+    
+    params = {'language': current_app.config['CATALOG_LANGUAGE'], 'page': 1}
+    try:
+        body, cache_status = catalog_cache.get('movie/popular', params, current_app.config['CATALOG_TTL']['movie/popular'])
+    except UpstreamError as e:
+        return jsonify({'message': f'Katalog alınamadı: {str(e)}'}), 502
+    
+    results = json.loads(body).get('results', [])
+    response = jsonify({'results': random.sample(results, min(count, len(results)))})
+    response.headers['X-Cache'] = cache_status
+    return response, 200
+
+# ==================== ARAMA API ====================
+
+# Başlık, yıl ve tür adında arama (son kelime önek olarak eşleşir)
+@api.route('/search', methods=['GET'])
+def search_movies():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'message': 'Arama metni (q) gerekli!'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'message': 'limit bir sayı olmalı!'}), 400
+    
+    results = search_index.search(query, limit)
+    return jsonify({'results': results, 'count': len(results)}), 200
+
+# Profil fotoğrafı disk kullanımı ve tekilleştirme kazancı
+@api.route('/stats/photos', methods=['GET'])
+@internal_only
+def photo_stats():
+    return jsonify(photo_storage_usage()), 200
+
+# Kullanım: flask --app app photo-gc
+@api.cli.command('photo-gc')
+def photo_gc_command():
+    result = collect_photo_garbage()
+    print(f"{result['blobs']} fotoğraf ve {result['orphans']} sahipsiz dosya silindi, "
+          f"{result['freed_bytes']} bayt boşaldı, {result['reprocessed']} fotoğraf yeniden işlendi.")
+
+# Kullanım: flask --app app prune-tombstones
+@api.cli.command('prune-tombstones')
+def prune_tombstones_command():
+    print(f'{prune_tombstones()} silme kaydı temizlendi.')
+
+# Kullanım: flask --app app photo-usage
+@api.cli.command('photo-usage')
+def photo_usage_command():
+    for key, value in photo_storage_usage().items():
+        print(f'{key}: {value}')
+
+# Katalog önbelleği sayaçları
+@api.route('/stats/catalog', methods=['GET'])
+@internal_only
+def catalog_stats():
+    return jsonify(catalog_cache.stats), 200
+
+# Okuma replikası yönlendirme sayaçları
+@api.route('/stats/replicas', methods=['GET'])
+@internal_only
+def replica_stats():
+    return jsonify(current_app.extensions['filmix']['replica_router'].stats), 200
+
+# Grup commit sayaçları (kapalıysa yalnızca enabled: false)
+@api.route('/stats/group_commit', methods=['GET'])
+@internal_only
+def group_commit_stats():
+    committer = current_app.extensions['filmix']['group_committer']
+    if committer is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **committer.stats}), 200
+
+# ==================== ARKA PLAN İŞLERİ ====================
+
+# Her iş en az bir kez çalışır (görünürlük süresi dolan iş tekrar alınır);
+# fonksiyonlar aynı yükle iki kez çağrılmaya dayanıklı olmalıdır.
+# Worker'da iş, kendi uygulama bağlamında ve oturumunda çalışır
+
+# Profil fotoğrafı varyantları
+@job_types.handler('process_photo', timeout=300)
+def process_photo_job(payload):
+    photo_id = payload['photo_id']
+    source = original_photo_path(photo_id)
+    # Orijinal yoksa iş daha önce bitmiş ya da fotoğraf temizlikte silinmiştir
+    if not os.path.exists(source):
+        return
+    process_photo(source, current_app.config['UPLOAD_FOLDER'], photo_id)
+
+@job_types.handler('photo_gc', timeout=1800, max_attempts=3)
+def photo_gc_job(payload):
+    collect_photo_garbage()
+
+@job_types.handler('prune_tombstones', timeout=600, max_attempts=3)
+def prune_tombstones_job(payload):
+    prune_tombstones()
+
+@job_types.handler('rebuild_stats', timeout=1800, max_attempts=3)
+def rebuild_stats_job(payload):
+    rebuild_movie_stats()
+
+@job_types.handler('build_recommendations', timeout=3600, max_attempts=2)
+def build_recommendations_job(payload):
+    current_app.logger.info(build_recommendations())
+
+# İçe aktarma dosyasını yazar; sonuç, yükleme dosyasının yanına .json olarak kaydedilir.
+# İş tekrar çalışırsa (worker öldü) satırlar yeniden yazılır, upsert'ler bunu zararsız kılar
+@job_types.handler('import_library', timeout=1800, max_attempts=3)
+def import_library_job(payload):
+    path = payload['path']
+    if os.path.exists(path + '.json'):
+        return
+    result, errors = None, []
+    with open(path, 'rb') as f:
+        for line in import_records(payload['user_id'], parse_import(f, payload['filename'])):
+            record = json.loads(line)
+            if record['type'] == 'error':
+                if len(errors) < IMPORT_RESULT_ERRORS:
+                    errors.append(record)
+            else:
+                result = record
+    if result['type'] == 'failed':
+        raise RuntimeError(result['message'])
+    
+    with open(path + '.json.tmp', 'w', encoding='utf-8') as f:
+        json.dump({**result, 'error_lines': errors}, f, ensure_ascii=False)
+    os.replace(path + '.json.tmp', path + '.json')
+    os.remove(path)
+
+# Saklama süresi dolan bitmiş işleri sil (başarısız işler incelenmek üzere kalır).
+# İçe aktarma dosyaları ve sonuçları da aynı süre sonunda silinir
+def prune_finished_jobs():
+    retention = current_app.config['JOB_RETENTION'].total_seconds()
+    directory = import_folder()
+    if os.path.isdir(directory):
+        cutoff = time.time() - retention
+        for entry in os.scandir(directory):
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+    return job_queue.prune(retention)
+
+@job_types.handler('rebuild_trending', timeout=1800, max_attempts=3)
+def rebuild_trending_job(payload):
+    rebuild_trending()
+
+@job_types.handler('prune_jobs', timeout=600, max_attempts=3)
+def prune_jobs_job(payload):
+    prune_finished_jobs()
+
+# İş kuyruğu açıkken periyodik temizlikte kuyruğa eklenen işler
+MAINTENANCE_JOBS = ('photo_gc', 'prune_tombstones', 'prune_jobs')
+
+# Worker process'i: uygulamayı kendisi kurar ve durma isteği gelene kadar iş alır
+def run_job_worker(config, kinds, stop, burst):
+    worker_process_signals(stop)
+    app = create_app(config)
+    worker = Worker(
+        app.extensions['filmix']['job_queue'], job_types, f'{socket.gethostname()}:{os.getpid()}',
+        context=app.app_context, logger=app.logger, kinds=kinds,
+        poll_interval=app.config['JOB_POLL_INTERVAL'],
+        retry_base=app.config['JOB_RETRY_BASE'], retry_cap=app.config['JOB_RETRY_MAX']
+    )
+    worker.run(stop, burst)
+
+# İş kuyruğu sayaçları: duruma göre iş sayısı ve bekleyen en eski işin gecikmesi
+@api.route('/stats/jobs', methods=['GET'])
+@internal_only
+def job_stats():
+    return jsonify({'enabled': current_app.config['JOB_QUEUE_ENABLED'], **job_queue.stats}), 200
+
+# Kullanım: flask --app app jobs worker [--processes 4] [--kind process_photo] [--burst]
+#           flask --app app jobs stats | list | retry | enqueue <tür> | prune
+@api.cli.group('jobs')
+def jobs_command():
+    """Arka plan iş kuyruğu."""
+
+# Worker process'lerini başlat; --burst ile kuyruk boşalınca çıkar
+@jobs_command.command('worker')
+@click.option('--processes', type=int, default=None, help='Worker process sayısı (varsayılan: JOB_WORKERS)')
+@click.option('--kind', 'kinds', multiple=True, help='Yalnızca bu türdeki işleri al (tekrarlanabilir)')
+@click.option('--burst', is_flag=True, help='Kuyruk boşalınca çık')
+def jobs_worker_command(processes, kinds, burst):
+    unknown = [kind for kind in kinds if kind not in job_types]
+    if unknown:
+        raise click.BadParameter(f"Bilinmeyen iş türü: {', '.join(unknown)}", param_hint='--kind')
+    processes = processes or current_app.config['JOB_WORKERS']
+    print(f"{processes} worker başlatılıyor ({', '.join(kinds) or 'tüm işler'})")
+    run_pool(run_job_worker, (None, list(kinds) or None), processes, burst)
+
+@jobs_command.command('stats')
+def jobs_stats_command():
+    for key, value in job_queue.stats.items():
+        print(f'{key}: {value}')
+
+@jobs_command.command('list')
+@click.option('--state', type=click.Choice(JOB_STATES), default=None)
+@click.option('--kind', default=None)
+@click.option('--limit', type=int, default=20)
+def jobs_list_command(state, kind, limit):
+    for job in job_queue.jobs(state, kind, limit):
+        error = (job['last_error'] or '').strip().split('\n')[0]
+        print(f"{job['id']:>8} {job['kind']:<22} {job['state']:<8} {job['attempts']}/{job['max_attempts']} "
+              f"{datetime.utcfromtimestamp(job['created_at']):%Y-%m-%d %H:%M:%S} {job['payload']} {error}")
+
+# Başarısız işleri tekrar kuyruğa koy (id verilmezse hepsi)
+@jobs_command.command('retry')
+@click.argument('job_ids', type=int, nargs=-1)
+def jobs_retry_command(job_ids):
+    print(f'{job_queue.retry(list(job_ids) or None)} iş tekrar kuyruğa kondu.')
+
+@jobs_command.command('enqueue')
+@click.argument('kind')
+@click.option('--payload', default='{}', help='JSON yük')
+@click.option('--key', default=None, help='Tekillik anahtarı')
+@click.option('--delay', type=float, default=0, help='Saniye')
+def jobs_enqueue_command(kind, payload, key, delay):
+    if kind not in job_types:
+        raise click.BadParameter(f"Bilinmeyen iş türü. Türler: {', '.join(sorted(job_types.types))}",
+                                 param_hint='KIND')
+    print(f'İş {enqueue_job(kind, json.loads(payload), key=key, delay=delay)} kuyrukta.')
+
+@jobs_command.command('prune')
+@click.option('--failed', is_flag=True, help='Başarısız işleri de sil')
+def jobs_prune_command(failed):
+    deleted = job_queue.prune(current_app.config['JOB_RETENTION'].total_seconds(), include_failed=failed)
+    print(f'{deleted} iş silindi.')
+
+# ==================== YANIT SIKIŞTIRMA ====================
+
+# after_request fonksiyonları kayıt sırasının tersine çalışır; sıkıştırma
+# izleme (profiler yanıtı) ve diğer hook'lardan sonra çalışsın diye önce tanımlıdır.
+# Akış yanıtları boyutları bilinmediği için her zaman sıkıştırılır
+@api.after_app_request
+def compress_response(response):
+    config = current_app.config
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    levels = {'gzip_level': config['COMPRESS_GZIP_LEVEL'], 'brotli_quality': config['COMPRESS_BROTLI_QUALITY']}
+    
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, **levels)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(compress(data, encoding, **levels))
+    response.headers['Content-Encoding'] = encoding
+    
+    # Sıkıştırılmış gövde bayt bayt aynı değil; kodlamaya özel güçlü ETag verilir
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak=weak)
+    return response
+
+# ==================== İZLEME ====================
+
+# Her istekte SQL ifadeleri toplanır; profiler yalnızca açıkça istenirse çalışır
+@api.before_app_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.query_log = QueryLog()
+    if current_app.config['PROFILER_ENABLED'] and request.headers.get('X-Profile'):
+        g.profiler = SamplingProfiler(threading.get_ident(), current_app.config['PROFILER_INTERVAL']).start()
+
+# Profil istenmişse yanıt gövdesi örnekleme sürerken üretilir ve yanıtın yerine
+# folded yığınlar döner; asıl durum kodu başlıkta kalır. Dosya (send_from_directory)
+# ve akış yanıtlarının gövdesi burada okunmaz, onlarda yalnızca görünüm örneklenir
+@api.after_app_request
+def finish_request_metrics(response):
+    g.response_status = response.status_code
+    query_log = g.get('query_log')
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        if not (response.direct_passthrough or response.is_streamed):
+            response.get_data()
+        profiler.stop()
+        response = Response(profiler.folded(), mimetype='text/plain', headers={
+            'X-Profile-Status': str(g.response_status),
+            'X-Profile-Samples': str(sum(profiler.samples.values())),
+            'X-Profile-Interval': str(profiler.interval),
+        })
+    if query_log is not None:
+        response.headers['Server-Timing'] = f'db;dur={query_log.seconds * 1000:.1f};desc="{query_log.count} SQL"'
+    return response
+
+# Süre, akış yanıtının gövdesi de yazıldıktan sonra (istek bağlamı kapanırken) ölçülür
+@api.teardown_app_request
+def record_request_metrics(error):
+    start = g.pop('request_start', None)
+    query_log = g.pop('query_log', None)
+    if start is None or query_log is None:
+        return
+    seconds = time.perf_counter() - start
+    status = 500 if error is not None else g.get('response_status', 500)
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.observe_request(route, request.method, status, seconds, query_log)
+    if seconds >= current_app.config['SLOW_REQUEST_SECONDS']:
+        current_app.logger.warning(slow_request_report(request.method, request.full_path.rstrip('?'),
+                                                       status, seconds, query_log))
+
+def current_query_log():
+    return g.get('query_log') if has_app_context() else None
+
+# Prometheus metrikleri (process başına; gunicorn'da her worker ayrı seri raporlar)
+@api.route('/metrics', methods=['GET'])
+@internal_only
+def prometheus_metrics():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ==================== HIZ SINIRI VE YÜK ATMA ====================
+
+# İstemci kimliği: IP ve imzası geçerli token'daki kullanıcı. Veritabanına
+# gidilmez; token sürümü burada kontrol edilmez (token_required yapar).
+# Ters proxy arkasında remote_addr proxy'nin adresidir; PROXY_FIX_X_FOR
+# ayarlanmazsa tüm anonim istemciler tek bir IP kovasını paylaşır
+def rate_limit_identities():
+    identities = {'ip': request.remote_addr}
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        try:
+            identities['user'] = jwt.decode(header[7:], current_app.config['SECRET_KEY'],
+                                            algorithms=['HS256'])['user_id']
+        except (jwt.InvalidTokenError, KeyError):
+            pass
+    return identities
+
+# Gövde okunmadan ve view çalışmadan önce: önce hız sınırı, sonra eşzamanlılık
+# sınırları. Dolu sınırda beklenmez, istek hemen reddedilir
+@api.before_app_request
+def admit_request():
+    if request.endpoint is None or request.method == 'OPTIONS':
+        return None
+    services = current_app.extensions['filmix']
+    
+    limiter = services['rate_limiter']
+    if limiter is not None:
+        retry_after = limiter.check(request.endpoint, request.method, rate_limit_identities())
+        if retry_after:
+            return retry_later_response('Çok fazla istek, lütfen biraz sonra tekrar deneyin!', 429, retry_after)
+    
+    g.admission_slots = []
+    slots = [services['request_slots']]
+    if request.endpoint in current_app.config['EXPENSIVE_ENDPOINTS']:
+        slots.append(services['expensive_slots'])
+    for slot in slots:
+        if not slot.try_acquire():
+            release_admission_slots()
+            return retry_later_response('Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin!', 503, 1)
+        g.admission_slots.append(slot)
+    return None
+
+# Akış yanıtlarında slot, gövde yazılıp istek bağlamı kapanınca bırakılır
+@api.teardown_app_request
+def release_admission_slots(error=None):
+    for slot in g.pop('admission_slots', ()):
+        slot.release()
+
+# Hız sınırı ve yük atma sayaçları
+@api.route('/stats/rate_limit', methods=['GET'])
+@internal_only
+def rate_limit_stats():
+    services = current_app.extensions['filmix']
+    limiter = services['rate_limiter']
+    return jsonify({
+        'rate_limit': {'enabled': True, **limiter.stats} if limiter else {'enabled': False},
+        'requests': services['request_slots'].stats,
+        'expensive': services['expensive_slots'].stats,
+    }), 200
+
+# Uygulama fabrikası: flask --app app, gunicorn 'app:create_app()' ve testler bunu kullanır
+# instance_path: önbellek, arama indeksi, iş kuyruğu ve trend dosyalarının
+# klasörü (varsayılan backend/instance; testler geçici klasör verir)
+def create_app(config=None, instance_path=None):
+    app = Flask(__name__, instance_path=instance_path)
+    load_config(app, config)
+    
+    # jsonify orjson ile kodlar (çıktı stdlib json ile aynı)
+    app.json = OrjsonProvider(app)
+    
+    db.init_app(app)
+    CORS(app)
+    with app.app_context():
+        # SQLite eşzamanlılık modeli: WAL ile okuyucular yazarı ve yazar
+        # okuyucuları beklemez; aynı anda tek yazar olur, kilit doluysa
+        # busy_timeout süresince beklenir ("database is locked" yerine)
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                configure_sqlite(engine, sqlite_pragmas(app.config))
+    
+    # Ters proxy arkasında istemci IP'si (hız sınırı için) X-Forwarded-For'dan alınır
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    
+    init_services(app)
+    with app.app_context():
+        # Her SQL ifadesi ölçülür, istek içindekiler o isteğin sorgu listesine yazılır
+        for engine in db.engines.values():
+            instrument_engine(engine, app.extensions['filmix']['metrics'], current_query_log)
+    app.register_blueprint(api)
+    return app
+
+# Tabloları oluşturup eksik migration'ları uygular; worker'lar başlamadan bir kez çalışır
+def prepare_database(app):
     with app.app_context():
         db.create_all()
-        print("Veritabanı tabloları oluşturuldu!")
+        applied = migrations.migrate(db.engine)
+    return applied
+
+if __name__ == '__main__':
+    # Geliştirme sunucusu; production için serve.py kullanılır
+    app = create_app()
+    applied = prepare_database(app)
+    print("Veritabanı tabloları oluşturuldu!")
+    if applied:
+        print(f"Şema migration'ları uygulandı: {applied}")
     
+    start_maintenance(app)
     print("FilMix Backend başlatılıyor...")
     print("API Endpoints:")
     print("- POST /register - Kullanıcı kaydı")
     print("- POST /login - Kullanıcı girişi")
+    print("- POST /token/refresh - Erişim token'ını yenileme")
     print("- GET /profile - Profil bilgileri")
+    print("- GET /stats/auth_cache - Token önbelleği sayaçları")
+    print("- GET /stats/photos - Profil fotoğrafı disk kullanımı")
+    print("- GET /stats/group_commit - Grup commit sayaçları")
+    print("- GET /stats/replicas - Okuma replikası yönlendirme sayaçları")
+    print("- GET /metrics - Prometheus metrikleri (istek ve SQL süreleri)")
+    print("- GET /stats/rate_limit - Hız sınırı ve yük atma sayaçları")
+    print("- GET /stats/jobs - Arka plan iş kuyruğu sayaçları")
     print("- PUT /profile - Profil güncelle")
     print("- POST /change_password - Şifre değiştir")
     print("- POST /upload_photo - Profil fotoğrafı yükle")
     print("- POST /reset_photo - Profil fotoğrafını sıfırla")
     print("- GET /profile_photos/<filename> - Profil fotoğraflarını görüntüle")
     print("- POST /favorites - Favorilere film ekleme")
+    print("- POST /favorites/bulk - Toplu favori ekleme")
     print("- DELETE /favorites/<movie_id> - Favorilerden film çıkarma")
     print("- GET /favorites - Favori filmleri listeleme")
     print("- GET /favorites/check/<movie_id> - Film favoride mi kontrol")
     print("- POST /ratings - Film puanlama")
+    print("- POST /ratings/bulk - Toplu film puanlama")
     print("- GET /ratings/<movie_id> - Film puanını alma")
+    print("- POST /ratings/lookup - Birden fazla filmin puanını alma")
     print("- GET /ratings - Kullanıcı puanlarını listeleme")
     print("- DELETE /ratings/<movie_id> - Film puanını silme")
+    print("- GET /sync?since=<token> - Favori ve puanlarda değişenler")
+    print("- GET /export?format=csv - Puan ve favorileri dışa aktar")
+    print("- POST /import - IMDb CSV veya FilMix dosyasını içe aktar")
+    print("- GET /import/<job_id> - Kuyruktaki içe aktarmanın durumu")
+    print("- GET /movies/<movie_id>/stats - Film puan istatistikleri")
+    print("- POST /movies/stats - Birden fazla filmin puan istatistikleri")
+    print("- GET /recommendations - Film önerileri")
+    print("- GET /trending?window=day - En çok favorilenen/puanlanan filmler")
+    print("- GET /search?q=<metin> - Film arama")
+    print("- GET /catalog/popular, /catalog/now_playing, /catalog/genres, /catalog/discover, /catalog/random - TMDB katalog önbelleği")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=5000)
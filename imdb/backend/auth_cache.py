@@ -0,0 +1,145 @@
+"""Doğrulanmış token -> kullanıcı önbelleği.
+
+``token_required`` her istekte JWT çözüp ``User`` tablosundan birincil anahtar
+ile okuma yapıyordu. Bu modül doğrulanmış token'ları kullanıcının kolon
+değerleriyle birlikte sınırlı boyutlu bir LRU/TTL önbellekte tutar. Kullanıcı
+değiştiğinde veya silindiğinde ``invalidate_user`` ile o kullanıcıya ait tüm
+kayıtlar düşürülür.
+
+``TokenVersionMap`` ise token iptali için kullanıcı başına token sürümünü
+bellekte tutar; sürüm ilk ihtiyaçta veritabanından okunur.
+
+Her iki yapı da process'e özeldir ve ``invalidate_user``/``discard`` yalnızca
+değişikliği yapan process'te çağrılır. Diğer worker'lar değişikliği kayıtların
+TTL'i dolunca görür; şifre değişikliği (token iptali) en geç TTL kadar sonra
+her worker'da geçerli olur.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenUserCache:
+    def __init__(self, maxsize=1024, ttl=60, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # token -> (user_id, kolon değerleri, son geçerlilik zamanı)
+        self._entries = OrderedDict()
+        # user_id -> bu kullanıcıya ait önbellekteki token'lar
+        self._tokens_by_user = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token):
+        """Token önbellekteyse kullanıcının kolon değerlerini döndürür."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= self._clock():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token, user_id, values, ttl=None):
+        # ttl verilirse (ör. token'ın kalan ömrü) varsayılan TTL'den kısa olanı kullanılır
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (user_id, values, self._clock() + ttl)
+            self._tokens_by_user.setdefault(user_id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, token):
+        user_id = self._entries.pop(token)[0]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+class TokenVersionMap:
+    """user_id -> token sürümü eşlemesi.
+
+    ``loader(user_id)`` kullanıcının güncel sürümünü (kullanıcı yoksa None)
+    döndürür ve yalnızca eşlemede olmayan veya kaydı ``ttl`` saniyeden eski
+    kullanıcılar için çağrılır. Eşleme ``maxsize`` kullanıcıyla sınırlı bir
+    LRU'dur; her eklemede süresi dolmuş en eski kayıtlar da atılır.
+    """
+
+    def __init__(self, loader, maxsize=10000, ttl=60, clock=time.monotonic):
+        self._loader = loader
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # user_id -> (sürüm, son geçerlilik zamanı)
+        self._versions = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is not None and entry[1] > self._clock():
+                self._versions.move_to_end(user_id)
+                return entry[0]
+        # Veritabanı okuması kilit dışında yapılır
+        version = self._loader(user_id)
+        self.set(user_id, version)
+        return version
+
+    def set(self, user_id, version):
+        """Veritabanından yeni okunmuş sürümü kaydeder."""
+        now = self._clock()
+        with self._lock:
+            self._versions.pop(user_id, None)
+            self._versions[user_id] = (version, now + self.ttl)
+            while self._versions:
+                oldest_id, (_, expires_at) = next(iter(self._versions.items()))
+                if expires_at > now and len(self._versions) <= self.maxsize:
+                    break
+                del self._versions[oldest_id]
+
+    def discard(self, user_id):
+        with self._lock:
+            self._versions.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._versions)
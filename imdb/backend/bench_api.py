@@ -0,0 +1,515 @@
+"""FilMix API yük testi: sentetik veritabanı + endpoint bazında gecikme ölçümü.
+
+Önce sentetik bir veritabanı hazırlanır: ``--users`` kullanıcı kaydedilir ve
+her birine API üzerinden ``--favorites`` favori ve ``--ratings`` puan eklenir
+(popüler filmler daha sık seçilir). Ardından her endpoint sırayla
+``--clients`` eşzamanlı istemciyle ``--requests`` kez çağrılır. Beklenmeyen
+durum kodları hata sayılır; ölçüm aynı zamanda bir duman testidir.
+
+Her endpoint için istek/sn ve p50/p95/p99 gecikme yazdırılır, sonuçlar
+commit bilgisiyle birlikte JSON olarak kaydedilir. ``--compare`` ile önceki
+bir sonuç dosyasına göre değişim gösterilir.
+
+Varsayılan olarak sunucu gerekmez: uygulama bu process'te Flask test client
+ile geçici bir SQLite veritabanına karşı çalışır. Şifre hash'i ucuz ayarla
+yapılır (register/login/change_password süreleri bu yüzden gerçekçi değildir;
+``--real-hash`` config'deki ayarı kullanır). ``--url`` verilirse çalışan bir
+sunucuya (ör. ``python serve.py``) HTTP ile istek gönderilir; bu durumda
+öneri modeli oluşturulamaz ve ``/recommendations`` 503 dönebilir. Tüm yük tek
+IP'den geldiği için sunucu ``FILMIX_RATE_LIMIT_ENABLED=false`` ve
+``FILMIX_MAX_CONCURRENT_EXPENSIVE=null`` ile başlatılmalıdır, yoksa 429/503
+yanıtları hata olarak sayılır.
+
+Kullanım:
+    python bench_api.py
+    python bench_api.py --users 200 --favorites 50 --ratings 100 --clients 8 --requests 500
+    python bench_api.py --url http://localhost:5000 --output sunucu.json
+    python bench_api.py --endpoints favorites,ratings --compare onceki.json
+"""
+import argparse
+import http.client
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'tmdb')
+PASSWORD = 'benchpass'
+BULK_SIZE = 500
+
+
+# ==================== İSTEMCİLER ====================
+
+class LocalTransport:
+    """İstekleri bu process'teki uygulamaya Flask test client ile gönderir."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        response = self.local.client.open(path, method=method, data=body, headers=headers or {})
+        return response.status_code, response.get_data(), response.headers
+
+
+class HttpTransport:
+    """Çalışan bir sunucuya thread başına tek keep-alive bağlantıyla istek gönderir."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=120)
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.read(), response.headers
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self.local.connection = None
+            raise
+
+
+def encode_request(request):
+    """İstek tanımını (json / files / headers) gövde ve başlıklara çevirir."""
+    headers = dict(request.get('headers', {}))
+    token = request.get('token')
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+
+    if 'json' in request:
+        headers['Content-Type'] = 'application/json'
+        return json.dumps(request['json']).encode(), headers
+
+    if 'files' in request:
+        boundary = uuid.uuid4().hex
+        body = io.BytesIO()
+        for field, (filename, content) in request['files'].items():
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                       f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode())
+            body.write(content)
+            body.write(b'\r\n')
+        body.write(f'--{boundary}--\r\n'.encode())
+        headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        return body.getvalue(), headers
+
+    return None, headers
+
+
+def call(transport, request):
+    body, headers = encode_request(request)
+    return transport.request(request['method'], request['path'], body, headers)
+
+
+def parse_json(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return {}
+
+
+# ==================== SENTETİK VERİ ====================
+
+def movie_id(number):
+    return f'tt{number:07d}'
+
+
+def pick_movies(rng, pool, count):
+    """Popüler filmler (küçük numaralar) daha sık seçilir."""
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(int(pool * rng.random() ** 2))
+    return [movie_id(number) for number in chosen]
+
+
+def png_bytes(rng):
+    from PIL import Image
+
+    image = Image.new('RGB', (256, 256), tuple(rng.randrange(256) for _ in range(3)))
+    output = io.BytesIO()
+    image.save(output, 'PNG')
+    return output.getvalue()
+
+
+def register_user(transport, username):
+    status, body, _ = call(transport, {'method': 'POST', 'path': '/register', 'json': {
+        'username': username, 'email': f'{username}@bench.local', 'password': PASSWORD}})
+    if status != 201:
+        raise RuntimeError(f'{username} kaydedilemedi ({status}): {body[:200]!r}')
+    status, body, _ = call(transport, {'method': 'POST', 'path': '/login', 'json': {
+        'username': username, 'password': PASSWORD}})
+    if status != 200:
+        raise RuntimeError(f'{username} giriş yapamadı ({status}): {body[:200]!r}')
+    data = parse_json(body)
+    return {'username': username, 'password': PASSWORD, 'token': data['token'],
+            'refresh_token': data['refresh_token'], 'etags': {}}
+
+
+def seed(transport, args, pool, prefix):
+    """Kullanıcıları, favorilerini ve puanlarını API üzerinden oluşturur."""
+    def create(index):
+        user = register_user(transport, f'{prefix}u{index}')
+        rng = random.Random(f'{args.seed}-user-{index}')
+        for kind, count in (('favorites', args.favorites), ('ratings', args.ratings)):
+            items = []
+            for movie in pick_movies(rng, pool, count):
+                item = {'movie_id': movie, 'movie_title': f'Film {movie}', 'year': str(rng.randint(1960, 2024))}
+                if kind == 'ratings':
+                    item['rating'] = rng.randint(2, 10) / 2
+                items.append(item)
+            for start in range(0, len(items), BULK_SIZE):
+                status, body, _ = call(transport, {'method': 'POST', 'path': f'/{kind}/bulk',
+                                                   'token': user['token'], 'json': {'items': items[start:start + BULK_SIZE]}})
+                if status != 200:
+                    raise RuntimeError(f'/{kind}/bulk başarısız ({status}): {body[:200]!r}')
+        return user
+
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        users = list(executor.map(create, range(args.users)))
+        # İstemci başına ayrı hesap: şifre ve kullanıcı adı değiştiren senaryolar
+        # diğer istemcilerin token'larını bozmasın
+        accounts = list(executor.map(lambda index: register_user(transport, f'{prefix}c{index}'), range(args.clients)))
+
+    # 304 senaryoları için mevcut ETag'ler
+    for user in users:
+        for path in ('/profile', '/favorites', '/ratings'):
+            _, _, headers = call(transport, {'method': 'GET', 'path': path, 'token': user['token']})
+            user['etags'][path] = headers.get('ETag')
+
+    _, export, _ = call(transport, {'method': 'GET', 'path': '/export?format=csv', 'token': users[0]['token']})
+    _, sync, _ = call(transport, {'method': 'GET', 'path': '/sync', 'token': users[0]['token']})
+    return users, accounts, export, parse_json(sync).get('next_token', '')
+
+
+# ==================== SENARYOLAR ====================
+
+class Client:
+    """Bir istemci thread'inin durumu: rastgele üretici ve kendi hesabı."""
+
+    def __init__(self, index, state):
+        self.index = index
+        self.state = state
+        self.rng = random.Random(f"{state['seed']}-client-{index}")
+        self.account = state['accounts'][index]
+
+    @property
+    def user(self):
+        return self.rng.choice(self.state['users'])
+
+    def movie(self):
+        return movie_id(int(self.state['pool'] * self.rng.random() ** 2))
+
+    def movies(self, count):
+        return pick_movies(self.rng, self.state['pool'], count)
+
+
+def request(method, path, client=None, **options):
+    if client is not None:
+        options.setdefault('token', client.user['token'])
+    return dict(options, method=method, path=path)
+
+
+def etag_request(client, path):
+    user = client.user
+    return request('GET', path, token=user['token'], headers={'If-None-Match': user['etags'][path]})
+
+
+def login(client):
+    user = client.user
+    return request('POST', '/login', json={'username': user['username'], 'password': user['password']})
+
+
+def register(client):
+    username = f"{client.state['prefix']}r{next(client.state['counter'])}"
+    return request('POST', '/register', json={
+        'username': username, 'email': f'{username}@bench.local', 'password': PASSWORD})
+
+
+def update_profile(client):
+    username = f"{client.account['username']}_{next(client.state['counter'])}"
+    return request('PUT', '/profile', token=client.account['token'], json={'username': username})
+
+
+def change_password(client):
+    account = client.account
+    new_password = f"{PASSWORD}{next(client.state['counter'])}"
+
+    def done(status, body):
+        if status == 200:
+            account['password'] = new_password
+            account['token'] = parse_json(body)['token']
+
+    return request('POST', '/change_password', token=account['token'], done=done, json={
+        'current_password': account['password'], 'new_password': new_password})
+
+
+def favorite_item(client):
+    movie = client.movie()
+    return {'movie_id': movie, 'movie_title': f'Film {movie}'}
+
+
+def rating_item(client):
+    return dict(favorite_item(client), rating=client.rng.randint(2, 10) / 2)
+
+
+# (ad, beklenen durum kodları, istek oranı, istek üreten fonksiyon)
+# Okumalar yazımlardan önce çalışır; 304 senaryolarının ETag'leri hâlâ geçerlidir
+SCENARIOS = [
+    ('GET /', {200}, 1, lambda c: request('GET', '/')),
+    ('GET /profile', {200}, 1, lambda c: request('GET', '/profile', c)),
+    ('GET /profile (304)', {304}, 1, lambda c: etag_request(c, '/profile')),
+    ('GET /favorites', {200}, 1, lambda c: request('GET', '/favorites', c)),
+    ('GET /favorites (304)', {304}, 1, lambda c: etag_request(c, '/favorites')),
+    ('GET /favorites?limit=20', {200}, 1, lambda c: request('GET', '/favorites?limit=20', c)),
+    ('GET /favorites?format=ndjson', {200}, 1, lambda c: request('GET', '/favorites?format=ndjson', c)),
+    ('GET /favorites/check/<id>', {200}, 1, lambda c: request('GET', f'/favorites/check/{c.movie()}', c)),
+    ('GET /ratings', {200}, 1, lambda c: request('GET', '/ratings', c)),
+    ('GET /ratings (304)', {304}, 1, lambda c: etag_request(c, '/ratings')),
+    ('GET /ratings/<id>', {200}, 1, lambda c: request('GET', f'/ratings/{c.movie()}', c)),
+    ('POST /ratings/lookup', {200}, 1, lambda c: request('POST', '/ratings/lookup', c, json={'movie_ids': c.movies(50)})),
+    ('POST /ratings/lookup (favoriler)', {200}, 1, lambda c: request('POST', '/ratings/lookup', c, json={})),
+    ('GET /sync', {200}, 1, lambda c: request('GET', '/sync', c)),
+    ('GET /sync?since=', {200}, 1, lambda c: request('GET', f"/sync?since={quote(c.state['sync_token'])}", c)),
+    ('GET /export?format=csv', {200}, 0.5, lambda c: request('GET', '/export?format=csv', c)),
+    ('GET /movies/<id>/stats', {200}, 1, lambda c: request('GET', f'/movies/{c.movie()}/stats')),
+    ('POST /movies/stats', {200}, 1, lambda c: request('POST', '/movies/stats', json={'movie_ids': c.movies(50)})),
+    ('GET /recommendations', {200, 503}, 1, lambda c: request('GET', '/recommendations', c)),
+    ('GET /recommendations?movie_id=', {200, 503}, 1,
+     lambda c: request('GET', f'/recommendations?movie_id={c.movie()}', c)),
+    ('GET /trending', {200}, 1, lambda c: request('GET', f"/trending?window={c.rng.choice(['hour', 'day', 'week'])}")),
+    ('GET /catalog/popular', {200}, 1, lambda c: request('GET', f'/catalog/popular?page={c.rng.randint(1, 3)}')),
+    ('GET /catalog/genres', {200}, 1, lambda c: request('GET', '/catalog/genres')),
+    ('GET /catalog/random', {200}, 1, lambda c: request('GET', '/catalog/random?count=10')),
+    ('GET /search', {200}, 1, lambda c: request('GET', f"/search?q={c.rng.choice(['film', 'the', 'tt00', 'dram'])}")),
+    ('POST /login', {200}, 0.2, login),
+    ('POST /token/refresh', {200}, 1, lambda c: request('POST', '/token/refresh', json={
+        'refresh_token': c.user['refresh_token']})),
+    ('POST /register', {201}, 0.2, register),
+    ('PUT /profile', {200}, 0.5, update_profile),
+    ('POST /change_password', {200}, 0.2, change_password),
+    ('POST /upload_photo', {200, 202}, 0.2, lambda c: request('POST', '/upload_photo', token=c.account['token'], files={
+        'file': ('bench.png', png_bytes(c.rng))})),
+    ('POST /reset_photo', {200}, 0.5, lambda c: request('POST', '/reset_photo', token=c.account['token'])),
+    ('POST /favorites', {201, 400}, 1, lambda c: request('POST', '/favorites', c, json=favorite_item(c))),
+    ('POST /favorites/bulk', {200}, 0.5, lambda c: request('POST', '/favorites/bulk', c, json={
+        'items': [favorite_item(c) for _ in range(20)]})),
+    ('DELETE /favorites/<id>', {200, 404}, 1, lambda c: request('DELETE', f'/favorites/{c.movie()}', c)),
+    ('POST /ratings', {201}, 1, lambda c: request('POST', '/ratings', c, json=rating_item(c))),
+    ('POST /ratings/bulk', {200}, 0.5, lambda c: request('POST', '/ratings/bulk', c, json={
+        'items': [rating_item(c) for _ in range(20)]})),
+    ('DELETE /ratings/<id>', {200, 404}, 1, lambda c: request('DELETE', f'/ratings/{c.movie()}', c)),
+    ('POST /import', {200}, 0.2, lambda c: request('POST', '/import', c, files={
+        'file': ('filmix.csv', c.state['export'])})),
+]
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+
+
+def run_scenario(transport, executor, clients, scenario, total):
+    """Senaryoyu ``total`` kez, istemciler arasında paylaştırarak çalıştırır."""
+    name, expected, _, build = scenario
+    remaining = itertools.count()
+    latencies, statuses, errors = [], Counter(), Counter()
+    lock = threading.Lock()
+
+    def worker(client):
+        while next(remaining) < total:
+            spec = build(client)
+            start = time.perf_counter()
+            try:
+                status, body, _ = call(transport, spec)
+            except Exception as e:
+                status, body = 0, str(e).encode()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+                if status not in expected:
+                    errors[f'{status}: {parse_json(body).get("message", body[:80].decode(errors="replace"))}'] += 1
+            if status in expected and spec.get('done'):
+                spec['done'](status, body)
+
+    start = time.perf_counter()
+    list(executor.map(worker, clients))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'errors': dict(errors.most_common()),
+    }
+
+
+# ==================== ÇALIŞTIRMA ====================
+
+def git_revision():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=directory,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def local_app(args, directory):
+    from app import create_app, prepare_database
+
+    config = {
+        'SECRET_KEY': 'bench-api',
+        'SQLALCHEMY_DATABASE_URI': args.database or f"sqlite:///{os.path.join(directory, 'filmix.db')}",
+        'UPLOAD_FOLDER': os.path.join(directory, 'uploads'),
+        'CATALOG_UPSTREAM': FIXTURES,
+        # Ölçülen endpoint maliyeti; tek IP'den gelen yük hız ve eşzamanlılık sınırına takılmasın
+        'RATE_LIMIT_ENABLED': False,
+        'MAX_CONCURRENT_EXPENSIVE': None,
+    }
+    if not args.real_hash:
+        config.update({'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000', 'PASSWORD_HASH_WORKERS': 0})
+    app = create_app(config, instance_path=os.path.join(os.path.abspath(directory), 'instance'))
+    prepare_database(app)
+    return app
+
+
+def build_recommendations(app):
+    result = app.test_cli_runner().invoke(args=['build-recommendations'])
+    if result.exit_code != 0:
+        raise RuntimeError(f'Öneri modeli oluşturulamadı: {result.output}')
+
+
+def print_comparison(results, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\n{previous.get('commit')} -> {results['commit']} karşılaştırması (p50 / p99 / istek/sn değişimi)")
+    for name, current in results['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p99_ms', 'throughput'):
+            change = (current[key] - before[key]) / before[key] * 100 if before[key] else 0
+            changes.append(f'{change:+7.1f}%')
+        print(f"{name:<36}{'  '.join(changes)}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='FilMix API yük testi')
+    parser.add_argument('--users', type=int, default=50, help='sentetik kullanıcı sayısı')
+    parser.add_argument('--favorites', type=int, default=30, help='kullanıcı başına favori')
+    parser.add_argument('--ratings', type=int, default=60, help='kullanıcı başına puan')
+    parser.add_argument('--clients', type=int, default=4, help='eşzamanlı istemci (thread) sayısı')
+    parser.add_argument('--requests', type=int, default=200, help='endpoint başına istek sayısı')
+    parser.add_argument('--url', help='çalışan sunucu adresi (verilmezse Flask test client)')
+    parser.add_argument('--database', help='test client için veritabanı URI (varsayılan: geçici SQLite)')
+    parser.add_argument('--real-hash', action='store_true', help="config'deki şifre hash ayarını kullan")
+    parser.add_argument('--endpoints', help='yalnızca adında bu metinlerden biri geçen senaryolar (virgülle)')
+    parser.add_argument('--output', help='sonuç dosyası (varsayılan: bench_api-<commit>.json)')
+    parser.add_argument('--compare', help='karşılaştırılacak önceki sonuç dosyası')
+    parser.add_argument('--seed', type=int, default=1, help='rastgele üretici tohumu')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = SCENARIOS
+    if args.endpoints:
+        filters = args.endpoints.split(',')
+        scenarios = [s for s in SCENARIOS if any(f in s[0] for f in filters)]
+
+    directory = tempfile.mkdtemp(prefix='filmix-bench-')
+    try:
+        app = None
+        if args.url:
+            transport = HttpTransport(args.url)
+        else:
+            app = local_app(args, directory)
+            transport = LocalTransport(app)
+
+        prefix = f'b{uuid.uuid4().hex[:6]}'
+        pool = max(500, max(args.favorites, args.ratings) * 4)
+        start = time.perf_counter()
+        users, accounts, export, sync_token = seed(transport, args, pool, prefix)
+        if app is not None:
+            build_recommendations(app)
+        seed_seconds = time.perf_counter() - start
+        print(f'Veri hazırlandı: {args.users} kullanıcı x ({args.favorites} favori + {args.ratings} puan), '
+              f'{seed_seconds:.1f} sn\n')
+
+        state = {'users': users, 'accounts': accounts, 'pool': pool, 'prefix': prefix, 'export': export,
+                 'sync_token': sync_token, 'counter': itertools.count(), 'seed': args.seed}
+        clients = [Client(index, state) for index in range(args.clients)]
+        endpoints = {}
+        print(f"{'endpoint':<36}{'istek':>7}{'istek/sn':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'hata':>6}")
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            for scenario in scenarios:
+                total = max(1, int(args.requests * scenario[2]))
+                result = endpoints[scenario[0]] = run_scenario(transport, executor, clients, scenario, total)
+                errors = sum(result['errors'].values())
+                print(f"{scenario[0]:<36}{result['requests']:>7}{result['throughput']:>10.1f}{result['p50_ms']:>9.1f}"
+                      f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}{errors:>6}")
+                for message, count in result['errors'].items():
+                    print(f'    {count} x {message[:100]}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    commit, dirty = git_revision()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'target': args.url or 'test-client',
+        'database': args.database or ('sunucu' if args.url else 'sqlite (geçici)'),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'settings': {key: getattr(args, key) for key in ('users', 'favorites', 'ratings', 'clients',
+                                                         'requests', 'real_hash', 'seed')},
+        'seed_seconds': round(seed_seconds, 2),
+        'endpoints': endpoints,
+    }
+    output = args.output or f"bench_api-{commit or 'nogit'}{'-dirty' if dirty else ''}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f'\nSonuçlar kaydedildi: {output}')
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    failed = sum(sum(result['errors'].values()) for result in endpoints.values())
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Şifre hash ayarları için mikro benchmark.
+
+Her ayar için tek çekirdekte saniyedeki doğrulama (= login) sayısını ve
+PasswordHasher havuzuyla tüm çekirdeklerdeki toplam hızı ölçer.
+
+Kullanım:
+    python bench_hashing.py [süre_saniye]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from hashing import PasswordHasher
+
+METHODS = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+PASSWORD = 'benchmark-sifre-123'
+
+
+def single_core_rate(method, duration):
+    """Tek çekirdekte saniyedeki login (check_password_hash) sayısı"""
+    password_hash = generate_password_hash(PASSWORD, method)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        check_password_hash(password_hash, PASSWORD)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def pool_rate(method, duration, workers):
+    """PasswordHasher havuzuyla tüm çekirdeklerde saniyedeki login sayısı"""
+    hasher = PasswordHasher(method, workers=workers)
+    password_hash = generate_password_hash(PASSWORD, method)
+    hasher.verify(password_hash, PASSWORD)  # havuzu ısıt
+    count = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers * 2) as clients:
+        while time.perf_counter() - start < duration:
+            batch = [clients.submit(hasher.verify, password_hash, PASSWORD) for _ in range(workers * 2)]
+            count += sum(1 for f in batch if f.result())
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return count / elapsed
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    cores = os.cpu_count() or 1
+    
+    print(f'Çekirdek sayısı: {cores}, ölçüm süresi: {duration} sn\n')
+    print(f"{'method':<24}{'login/sn/çekirdek':>20}{'login/sn (havuz)':>20}")
+    for method in METHODS:
+        single = single_core_rate(method, duration)
+        pooled = pool_rate(method, duration, cores)
+        print(f'{method:<24}{single:>20.1f}{pooled:>20.1f}')
+
+
+if __name__ == '__main__':
+    main()
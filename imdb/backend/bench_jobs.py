@@ -0,0 +1,67 @@
+"""İş kuyruğu verim benchmark'ı: worker process sayısına göre saniyede iş.
+
+Geçici bir kuyruğa ``iş_sayısı`` iş eklenir ve ``--burst`` kipindeki
+worker havuzu kuyruğu boşaltır. Her iş ``iş_ms`` milisaniye bekler (dosya
+yazma, HTTP gibi G/Ç ağırlıklı işler); ``--cpu`` ile bekleme yerine aynı
+süre CPU harcanır. Kuyruğun kendi maliyetini görmek için ``iş_ms`` 0 verilir.
+
+Kullanım:
+    python bench_jobs.py [iş_sayısı] [iş_ms] [process sayıları...] [--cpu]
+    python bench_jobs.py 2000 20 1 2 4 8
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from jobs import JobQueue, JobRegistry, Worker, run_pool, worker_process_signals
+
+registry = JobRegistry()
+
+
+@registry.handler('sleep')
+def sleep_job(payload):
+    time.sleep(payload['ms'] / 1000)
+
+
+@registry.handler('cpu')
+def cpu_job(payload):
+    end = time.process_time() + payload['ms'] / 1000
+    while time.process_time() < end:
+        pass
+
+
+def run_worker(path, stop, burst):
+    worker_process_signals(stop)
+    Worker(JobQueue(path), registry, str(os.getpid()), poll_interval=0.05).run(stop, burst)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--cpu']
+    kind = 'cpu' if '--cpu' in sys.argv else 'sleep'
+    count = int(args[0]) if args else 2000
+    milliseconds = float(args[1]) if len(args) > 1 else 20
+    process_counts = [int(arg) for arg in args[2:]] or [1, 2, 4, 8]
+
+    print(f'{count} iş, iş başına {milliseconds:g} ms ({kind}), {os.cpu_count()} CPU\n')
+    print(f"{'process':>8}{'süre sn':>10}{'iş/sn':>10}{'hata':>6}")
+    for processes in process_counts:
+        directory = tempfile.mkdtemp(prefix='filmix-jobs-')
+        try:
+            path = os.path.join(directory, 'jobs.db')
+            queue = JobQueue(path)
+            for _ in range(count):
+                queue.enqueue(kind, {'ms': milliseconds})
+            start = time.perf_counter()
+            run_pool(run_worker, (path,), processes, burst=True)
+            elapsed = time.perf_counter() - start
+            stats = queue.stats
+            errors = count - stats['done']
+            print(f'{processes:>8}{elapsed:>10.2f}{count / elapsed:>10.0f}{errors:>6}')
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Öneri motoru benchmark'ı.
+
+Sentetik kullanıcı x film verisi (popülerlik Zipf dağılımlı) üretir, modeli
+kurar, diske yazıp mmap ile açar ve öneri gecikmesini (p50/p99, ms) ölçer.
+
+Kullanım:
+    python bench_recommend.py [kullanıcı] [film] [kullanıcı_başına_puan]
+    python bench_recommend.py 100000 50000 20
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from recommend import RecommendationModel, build_matrix, top_k_similar, write_model
+
+
+def synthetic_interactions(users, movies, per_user, seed=7):
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, movies + 1) ** 0.8
+    popularity /= popularity.sum()
+    for user_id in range(users):
+        picked = np.unique(rng.choice(movies, size=per_user, p=popularity))
+        ratings = rng.integers(2, 11, size=len(picked)) / 2.0
+        for movie, rating in zip(picked, ratings):
+            yield user_id, f'tt{movie:07d}', float(rating)
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    movies = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    per_user = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    
+    start = time.perf_counter()
+    matrix, movie_ids = build_matrix(synthetic_interactions(users, movies, per_user), [])
+    print(f'Matris: {matrix.shape[0]} x {matrix.shape[1]}, {matrix.nnz} etkileşim '
+          f'({time.perf_counter() - start:.1f} sn)')
+    
+    start = time.perf_counter()
+    neighbors, scores = top_k_similar(matrix)
+    print(f'Top-K benzerlik: {time.perf_counter() - start:.1f} sn')
+    
+    with tempfile.TemporaryDirectory() as directory:
+        version = write_model(directory, neighbors, scores, movie_ids)
+        model = RecommendationModel(f'{directory}/{version}')
+        
+        rng = np.random.default_rng(1)
+        # Endpoint en fazla RECOMMENDATIONS_MAX_SEEDS puan + aynı sayıda favori kullanır
+        for seeds_per_user in (10, 50, 100, 200):
+            samples = []
+            for _ in range(2000):
+                picked = rng.choice(len(movie_ids), size=seeds_per_user, replace=False)
+                seeds = {movie_ids[i]: 1.0 + (i % 3) for i in picked}
+                t0 = time.perf_counter()
+                model.for_user(seeds, exclude=seeds, n=20)
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            print(f'for_user ({seeds_per_user} seed): p50 {samples[len(samples) // 2]:.2f} ms, '
+                  f'p99 {samples[int(len(samples) * 0.99)]:.2f} ms')
+        
+        samples = []
+        for i in rng.choice(len(movie_ids), size=2000):
+            t0 = time.perf_counter()
+            model.similar(movie_ids[i], 20)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        print(f'similar: p50 {samples[len(samples) // 2]:.3f} ms, p99 {samples[int(len(samples) * 0.99)]:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
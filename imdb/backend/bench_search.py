@@ -0,0 +1,71 @@
+"""Arama indeksi benchmark'ı.
+
+Geçici bir indekse sentetik film başlıkları yükler ve farklı sorgu
+türlerinin gecikmesini (ortalama ve p99, ms) ölçer.
+
+Kullanım:
+    python bench_search.py [film_sayısı]    # varsayılan 1.000.000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from search import SearchIndex
+
+WORDS = [
+    'kara', 'şövalye', 'yıldız', 'gece', 'İstanbul', 'aşk', 'savaş', 'ölüm', 'hayalet',
+    'matrix', 'dark', 'night', 'star', 'love', 'war', 'ghost', 'city', 'river', 'ışık',
+    'gölge', 'deniz', 'dağ', 'son', 'ilk', 'büyük', 'küçük', 'kayıp', 'sır', 'ateş',
+    'king', 'queen', 'return', 'rise', 'fall', 'empire', 'çağ', 'zaman', 'yol', 'ev',
+]
+GENRES = ['Aksiyon', 'Macera', 'Komedi', 'Dram', 'Bilim-Kurgu', 'Gerilim', 'Romantik', 'Suç']
+
+QUERIES = ['kara şöv', 'istanbul', 'ISTANBUL ateş', 'yıldız savaş', 'gölge 1999',
+           'night ci', 'empire ri', 'dram aşk', 'xqzw', 'ka']
+
+
+def synthetic_movies(count, seed=42):
+    rng = random.Random(seed)
+    for i in range(count):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+        year = str(rng.randint(1920, 2025))
+        genres = rng.sample(GENRES, rng.randint(1, 3))
+        yield f'bench{i}', f'{title} {i}', year, genres
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    
+    with tempfile.TemporaryDirectory() as directory:
+        index = SearchIndex(os.path.join(directory, 'bench_search.db'))
+        
+        start = time.perf_counter()
+        batch = []
+        for movie in synthetic_movies(count):
+            batch.append(movie)
+            if len(batch) == 10_000:
+                index.add_movies(batch)
+                batch = []
+        index.add_movies(batch)
+        print(f'{count} film indekslendi: {time.perf_counter() - start:.1f} sn\n')
+        
+        print(f"{'sorgu':<18}{'sonuç':>8}{'ort (ms)':>12}{'p99 (ms)':>12}")
+        for query in QUERIES:
+            samples = []
+            for _ in range(50):
+                t0 = time.perf_counter()
+                results = index.search(query, 20)
+                samples.append((time.perf_counter() - t0) * 1000)
+            print(f'{query:<18}{len(results):>8}{sum(samples) / len(samples):>12.2f}'
+                  f'{percentile(samples, 0.99):>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""GET /favorites yanıtı başına CPU süresi (serileştirme benchmark'ı).
+
+Geçici bir veritabanında tek kullanıcıya ``favori_sayısı`` favori eklenir ve
+tam liste yanıtı ``tekrar`` kez üretilir. Her satırda yanıt başına CPU süresi
+(``time.process_time``) ve yanıt boyutu yazdırılır:
+
+- önce: ORM nesneleri + ``to_dict()`` + stdlib ``json`` (eski liste yolu)
+- kolon + orjson: ``list_response`` (ORM nesnesi kurulmadan seçilen kolonlar)
+- istek: test client ile uçtan uca GET /favorites (token, ETag, izleme dahil),
+  sıkıştırmasız, gzip ve (``brotli`` kuruluysa) brotli ile
+
+Kullanım:
+    python bench_serialize.py [favori_sayısı] [tekrar]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+CONFIG = {
+    'SECRET_KEY': 'bench-serialize',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'PASSWORD_HASH_WORKERS': 0,
+    'PHOTO_WORKERS': 0,
+    'RATE_LIMIT_ENABLED': False,
+    'CATALOG_UPSTREAM': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'tmdb'),
+}
+
+
+def cpu_per_call(function, repeat):
+    function()  # ısınma
+    start = time.process_time()
+    for _ in range(repeat):
+        size = function()
+    return (time.process_time() - start) / repeat * 1000, size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    from app import create_app, prepare_database, list_response, Favorite
+    from responses import brotli
+
+    directory = tempfile.mkdtemp(prefix='filmix-bench-')
+    try:
+        app = create_app(dict(CONFIG, SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(directory, 'filmix.db')}",
+                              UPLOAD_FOLDER=os.path.join(directory, 'uploads')))
+        prepare_database(app)
+        client = app.test_client()
+        client.post('/register', json={'username': 'bench', 'email': 'bench@bench.local', 'password': '123456'})
+        token = client.post('/login', json={'username': 'bench', 'password': '123456'}).get_json()['token']
+        headers = {'Authorization': f'Bearer {token}'}
+        for start in range(0, count, 500):
+            client.post('/favorites/bulk', headers=headers, json={'items': [
+                {'movie_id': f'tt{i:07d}', 'movie_title': f'Film {i}', 'movie_poster': f'/poster/{i}.jpg',
+                 'movie_year': str(1950 + i % 70)}
+                for i in range(start, min(start + 500, count))
+            ]})
+        stdlib_json = DefaultJSONProvider(app)
+
+        def before():
+            with app.test_request_context('/favorites'):
+                rows = Favorite.query.filter_by(user_id=1).order_by(
+                    Favorite.added_at.desc(), Favorite.id.desc()).all()
+                response = stdlib_json.response({'favorites': [row.to_dict() for row in rows], 'count': len(rows)})
+                return len(response.get_data())
+
+        def projected():
+            with app.test_request_context('/favorites'):
+                response = list_response(Favorite.query.filter_by(user_id=1), Favorite.added_at,
+                                         Favorite.id, 'favorites')
+                return len(response.get_data())
+
+        def request(encoding):
+            def call():
+                response = client.get('/favorites', headers={**headers, 'Accept-Encoding': encoding})
+                assert response.status_code == 200
+                return len(response.get_data())
+            return call
+
+        scenarios = [
+            ('önce: ORM + to_dict + json', before),
+            ('kolon + orjson', projected),
+            ('istek (sıkıştırmasız)', request('identity')),
+            ('istek (gzip)', request('gzip')),
+        ]
+        if brotli is not None:
+            scenarios.append(('istek (brotli)', request('br')))
+
+        print(f'{count} favori, {repeat} tekrar\n')
+        print(f"{'senaryo':<30}{'CPU ms/yanıt':>14}{'bayt':>10}")
+        for name, function in scenarios:
+            milliseconds, size = cpu_per_call(function, repeat)
+            print(f'{name:<30}{milliseconds:>14.2f}{size:>10}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
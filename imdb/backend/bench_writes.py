@@ -0,0 +1,193 @@
+"""Puanlama endpoint'i (POST /ratings) için yazma hızı benchmark'ı.
+
+Her senaryo boş bir veritabanında çalışır: ``process`` kadar worker process'i
+(gunicorn gibi) ve her birinde ``thread`` kadar kullanıcı aynı anda
+``istek_sayısı`` kadar puan gönderir (yıldıza art arda dokunma gibi).
+Saniyedeki yazım sayısı, gecikme, grup başına düşen ortalama yazım ve film
+istatistiklerinin puan tablosuyla tutarlılığı yazdırılır. İlk satır, bağlantı
+ayarları eklenmeden önceki durumdur (rollback journal, synchronous=FULL).
+
+fsync'in ucuz olduğu disklerde (yazma önbellekli SSD, tmpfs) FULL ve NORMAL
+arasındaki fark küçük kalır; fark asıl yazım kilidi için yarışan
+process'lerde görülür.
+
+``--import`` ile toplu yazım ölçülür: tek kullanıcının 500 satırlık
+POST /ratings/bulk ve POST /favorites/bulk isteği başına CPU süresi ve
+verilen satır sayılarında IMDb puan CSV'sinin POST /import ile içe aktarılma
+süresi (istekte, kuyruk kapalı).
+
+Kullanım:
+    python bench_writes.py [process] [thread] [istek_sayısı] [klasör]
+    python bench_writes.py --import [satır_sayısı...]
+    python bench_writes.py --import 5000 50000
+"""
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCENARIOS = [
+    ('önce: DELETE journal, FULL', {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'}),
+    ('WAL, FULL', {'SQLITE_SYNCHRONOUS': 'FULL'}),
+    ('WAL, NORMAL', {}),
+    ('WAL, FULL + grup commit', {'SQLITE_SYNCHRONOUS': 'FULL', 'GROUP_COMMIT': True}),
+    ('WAL, NORMAL + grup commit', {'GROUP_COMMIT': True}),
+]
+
+CONFIG = {
+    'SECRET_KEY': 'bench-writes',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'PASSWORD_HASH_WORKERS': 0,
+    'PHOTO_WORKERS': 0,
+    'RATE_LIMIT_ENABLED': False,
+    'CATALOG_UPSTREAM': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'tmdb'),
+}
+
+
+def make_app(database, settings):
+    from app import create_app
+
+    return create_app(dict(CONFIG, SQLALCHEMY_DATABASE_URI=f'sqlite:///{database}',
+                           TRENDING_DATABASE=os.path.join(os.path.dirname(database), 'trending.db'), **settings))
+
+
+def user_name(worker, thread):
+    return f'bench{worker}x{thread}'
+
+
+def run_worker(worker, database, settings, threads, requests):
+    app = make_app(database, settings)
+    client = app.test_client()
+    headers = []
+    for thread in range(threads):
+        response = client.post('/login', json={'username': user_name(worker, thread), 'password': '123456'})
+        headers.append({'Authorization': f"Bearer {response.get_json()['token']}"})
+    latencies = []
+    failures = []
+
+    def session(thread):
+        rng = random.Random(f'{worker}-{thread}')
+        for _ in range(requests):
+            movie_id = str(rng.randint(1, 500))
+            start = time.perf_counter()
+            response = client.post('/ratings', headers=headers[thread], json={
+                'movie_id': movie_id, 'movie_title': f'Film {movie_id}', 'rating': rng.randint(1, 5)})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 201:
+                failures.append(response.status_code)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(session, range(threads)))
+
+    committer = app.extensions['filmix']['group_committer']
+    stats = committer.stats if committer else {'batches': len(latencies), 'jobs': len(latencies)}
+    if committer:
+        committer.shutdown()
+    return latencies, len(failures), stats['batches'], stats['jobs']
+
+
+def run_scenario(settings, processes, threads, requests, directory):
+    from app import db, prepare_database, Rating, MovieStats
+
+    database = os.path.join(directory, 'filmix.db')
+    app = make_app(database, settings)
+    prepare_database(app)
+    client = app.test_client()
+    for worker in range(processes):
+        for thread in range(threads):
+            name = user_name(worker, thread)
+            client.post('/register', json={'username': name, 'email': f'{name}@bench.local', 'password': '123456'})
+
+    start = time.perf_counter()
+    with multiprocessing.get_context('spawn').Pool(processes) as pool:
+        results = pool.starmap(run_worker, [
+            (worker, database, settings, threads, requests) for worker in range(processes)
+        ])
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        # İstatistikler puan tablosuyla tutarlı olmalı
+        ratings = db.session.query(db.func.count(Rating.id), db.func.sum(Rating.rating)).one()
+        stats = db.session.query(db.func.sum(MovieStats.rating_count), db.func.sum(MovieStats.rating_sum)).one()
+        consistent = ratings[0] == stats[0] and abs((ratings[1] or 0) - (stats[1] or 0)) < 1e-6
+        db.session.remove()
+        db.engine.dispose()
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    batches = sum(result[2] for result in results)
+    return {
+        'rate': len(latencies) / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+        'batch': sum(result[3] for result in results) / batches if batches else 0,
+        'failures': sum(result[1] for result in results),
+        'consistent': consistent,
+    }
+
+
+def run_import_bench(sizes, parent=None):
+    from app import prepare_database
+
+    directory = tempfile.mkdtemp(prefix='filmix-bench-', dir=parent)
+    try:
+        app = make_app(os.path.join(directory, 'filmix.db'), {})
+        prepare_database(app)
+        client = app.test_client()
+        client.post('/register', json={'username': 'bench', 'email': 'bench@bench.local', 'password': '123456'})
+        token = client.post('/login', json={'username': 'bench', 'password': '123456'}).get_json()['token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        print(f"{'senaryo':<34}{'süre sn':>9}{'CPU ms':>9}{'satır/sn':>10}")
+        for path, key in (('/ratings/bulk', 'rating'), ('/favorites/bulk', None)):
+            for round_no in range(3):
+                items = [{'movie_id': f'tt{round_no}{i:06d}', 'movie_title': f'Film {i}',
+                          **({key: 1 + i % 5} if key else {})} for i in range(500)]
+                wall, cpu = time.perf_counter(), time.process_time()
+                response = client.post(path, headers=headers, json={'items': items})
+                wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+                assert response.status_code == 200, response.status_code
+                print(f"{f'POST {path} 500 (tur {round_no + 1})':<34}{wall:>9.2f}{cpu * 1000:>9.0f}{500 / wall:>10.0f}")
+
+        for rows in sizes:
+            body = 'Const,Your Rating,Date Rated,Title\n' + ''.join(
+                f'tt9{rows}{i:07d},{1 + i % 10},2024-01-01,Film {i}\n' for i in range(rows))
+            wall, cpu = time.perf_counter(), time.process_time()
+            response = client.post('/import', headers=headers, content_type='multipart/form-data',
+                                   data={'file': (io.BytesIO(body.encode()), 'ratings.csv')})
+            last = response.get_data(as_text=True).strip().splitlines()[-1]
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            assert '"done"' in last, last
+            print(f"{f'POST /import {rows} satır':<34}{wall:>9.2f}{cpu * 1000:>9.0f}{rows / wall:>10.0f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--import':
+        run_import_bench([int(arg) for arg in sys.argv[2:]] or [5000, 50000])
+        return
+
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    parent = sys.argv[4] if len(sys.argv) > 4 else None
+
+    print(f'{processes} process x {threads} thread x {requests} puan\n')
+    print(f"{'senaryo':<30}{'yazım/sn':>10}{'p50 ms':>9}{'p99 ms':>9}{'grup':>7}{'hata':>6}{'tutarlı':>9}")
+    for name, settings in SCENARIOS:
+        directory = tempfile.mkdtemp(prefix='filmix-bench-', dir=parent)
+        try:
+            result = run_scenario(settings, processes, threads, requests, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"{name:<30}{result['rate']:>10.0f}{result['p50']:>9.1f}{result['p99']:>9.1f}"
+              f"{result['batch']:>7.1f}{result['failures']:>6}{'evet' if result['consistent'] else 'HAYIR':>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""TMDB katalog önbelleği.
+
+Flutter istemcileri aynı TMDB sayfalarını tek tek indirmek yerine backend'in
+``/catalog/*`` endpoint'lerini kullanır. Yanıtlar kalıcı bir SQLite
+dosyasında TTL ile saklanır:
+
+- TTL içindeki kayıtlar doğrudan döner (HIT)
+- TTL dolmuş ama ``stale_ttl`` içindeki kayıtlar hemen döner ve arka planda
+  yenilenir (STALE, stale-while-revalidate)
+- Aynı anahtar için eşzamanlı ıskalamalarda upstream'e tek istek gider,
+  diğer istekler onun sonucunu bekler (request coalescing)
+
+Upstream ``fetch(path, params) -> dict`` metodu olan herhangi bir nesnedir:
+gerçek API için ``TMDBFetcher``, geliştirme/test için ``FixtureFetcher``.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+
+class UpstreamError(Exception):
+    """Upstream (TMDB) yanıt vermedi veya hata döndürdü."""
+
+
+class TMDBFetcher:
+    def __init__(self, api_key, base_url='https://api.themoviedb.org/3', timeout=10):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def fetch(self, path, params):
+        if not self.api_key:
+            raise UpstreamError('TMDB_API_KEY tanımlı değil')
+        query = urllib.parse.urlencode({'api_key': self.api_key, **params})
+        url = f'{self.base_url}/{path}?{query}'
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                return json.load(response)
+        except (OSError, ValueError) as e:
+            raise UpstreamError(str(e)) from e
+
+
+class FixtureFetcher:
+    """TMDB yerine ``directory`` içindeki fixture JSON dosyalarını sunar.
+
+    ``movie/popular`` isteği ``movie_popular.json`` dosyasından okunur;
+    ``page=2`` gibi bir parametre varsa önce ``movie_popular_page2.json``
+    aranır.
+    """
+
+    def __init__(self, directory, delay=0):
+        self.directory = directory
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, path, params):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        name = path.strip('/').replace('/', '_')
+        page = params.get('page')
+        candidates = [f'{name}_page{page}.json'] if page and str(page) != '1' else []
+        candidates.append(f'{name}.json')
+        for candidate in candidates:
+            file_path = os.path.join(self.directory, candidate)
+            if os.path.exists(file_path):
+                with open(file_path, encoding='utf-8') as f:
+                    return json.load(f)
+        raise UpstreamError(f'Fixture bulunamadı: {path}')
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.body = None
+        self.error = None
+
+
+class CatalogCache:
+    def __init__(self, fetcher, db_path, stale_ttl=24 * 3600, clock=time.time, on_fetch=None):
+        self.fetcher = fetcher
+        # Upstream'den yeni veri geldiğinde çağrılır: on_fetch(path, params, data)
+        self.on_fetch = on_fetch
+        self.db_path = db_path
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._local = threading.local()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hit': 0, 'stale': 0, 'miss': 0, 'upstream': 0, 'errors': 0}
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS catalog_cache ('
+            'key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL)'
+        )
+
+    def get(self, path, params, ttl):
+        """(JSON metni, 'HIT' | 'STALE' | 'MISS') döndürür."""
+        key = self.make_key(path, params)
+        row = self._connect().execute(
+            'SELECT body, fetched_at FROM catalog_cache WHERE key = ?', (key,)
+        ).fetchone()
+        
+        if row is not None:
+            body, fetched_at = row
+            age = self._clock() - fetched_at
+            if age < ttl:
+                self._count('hit')
+                return body, 'HIT'
+            if age < ttl + self.stale_ttl:
+                self._count('stale')
+                self._refresh_in_background(key, path, params)
+                return body, 'STALE'
+        
+        self._count('miss')
+        try:
+            return self._fetch_coalesced(key, path, params), 'MISS'
+        except UpstreamError:
+            # Upstream hata verirse süresi çok geçmiş olsa da eldeki kaydı kullan
+            if row is not None:
+                return row[0], 'STALE'
+            raise
+
+    def iter_entries(self):
+        """Önbellekteki tüm (anahtar, çözülmüş JSON) kayıtlarını sırayla döndürür."""
+        for key, body in self._connect().execute('SELECT key, body FROM catalog_cache'):
+            yield key, json.loads(body)
+
+    @staticmethod
+    def make_key(path, params):
+        return f'{path}?{urllib.parse.urlencode(sorted(params.items()))}'
+
+    def _fetch_coalesced(self, key, path, params):
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.body
+        
+        try:
+            self._count('upstream')
+            data = self.fetcher.fetch(path, params)
+            flight.body = json.dumps(data, ensure_ascii=False)
+            self._connect().execute(
+                'INSERT OR REPLACE INTO catalog_cache (key, body, fetched_at) VALUES (?, ?, ?)',
+                (key, flight.body, self._clock())
+            )
+            if self.on_fetch is not None:
+                self.on_fetch(path, params, data)
+            return flight.body
+        except Exception as e:
+            self._count('errors')
+            flight.error = e if isinstance(e, UpstreamError) else UpstreamError(str(e))
+            raise flight.error
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def _refresh_in_background(self, key, path, params):
+        with self._lock:
+            if key in self._inflight:
+                return
+        
+        def refresh():
+            try:
+                self._fetch_coalesced(key, path, params)
+            except UpstreamError:
+                pass
+        
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,80 @@
+"""pytest fixture'ları.
+
+Her test geçici bir klasörde kendi SQLite veritabanı, upload klasörü ve
+instance klasörüyle (katalog önbelleği, arama indeksi, iş kuyruğu, trend
+dosyası) kurulan uygulamayı kullanır. Katalog TMDB yerine ``fixtures/tmdb``
+altındaki JSON dosyalarından okunur (``FixtureFetcher``); şifre hash'i ucuz
+ayarla ve istek thread'inde hesaplanır.
+
+Çalıştırma:
+    python -m pytest -q
+"""
+import os
+
+import pytest
+
+from app import create_app, prepare_database
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'tmdb')
+PASSWORD = 'testpass123'
+
+
+def app_config(directory, **overrides):
+    config = {
+        'TESTING': True,
+        'SECRET_KEY': 'filmix-test',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'filmix.db')}",
+        'UPLOAD_FOLDER': os.path.join(directory, 'uploads'),
+        'CATALOG_UPSTREAM': FIXTURES,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PASSWORD_HASH_WORKERS': 0,
+        'PHOTO_WORKERS': 0,
+        # Hız sınırı testleri kendi kurallarıyla açar
+        'RATE_LIMIT_ENABLED': False,
+        # Trend sayaçları arka plan thread'i yerine testte elle diske yazılır
+        'TRENDING_CHECKPOINT_INTERVAL': 0,
+    }
+    config.update(overrides)
+    return config
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Aynı veritabanı ve instance klasörünü paylaşan uygulamalar kurar.
+
+    Her çağrı ayrı bir worker process'i gibidir: kendi önbellekleri, token
+    sürümü eşlemesi ve bağlantıları olur. Tablolar ve migration'lar her
+    çağrıda ``prepare_database`` ile kontrol edilir (yalnızca ilkinde uygulanır).
+    """
+    def factory(**overrides):
+        app = create_app(app_config(str(tmp_path), **overrides), instance_path=str(tmp_path / 'instance'))
+        prepare_database(app)
+        return app
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def signup():
+    """Kullanıcı kaydedip giriş yapar; giriş yanıtına 'headers' eklenmiş olarak döner."""
+    def factory(client, username, **environ):
+        response = client.post('/register', json={
+            'username': username, 'email': f'{username}@example.com', 'password': PASSWORD
+        }, environ_base=environ)
+        assert response.status_code == 201, response.get_json()
+        response = client.post('/login', json={'username': username, 'password': PASSWORD},
+                               environ_base=environ)
+        assert response.status_code == 200, response.get_json()
+        session = response.get_json()
+        session['headers'] = {'Authorization': f"Bearer {session['token']}"}
+        return session
+    return factory
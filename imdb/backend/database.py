@@ -0,0 +1,210 @@
+"""Veritabanı bağlantı ayarları, okuma replikası yönlendirmesi ve grup commit.
+
+Birincil veritabanı ``SQLALCHEMY_DATABASE_URI`` ile verilir; SQLite veya
+PostgreSQL olabilir. SQLite bağlantıları açılırken ``config.py``'deki ayarlar
+PRAGMA olarak uygulanır (WAL, synchronous, busy_timeout, önbellek ve mmap
+boyutu).
+
+``DATABASE_REPLICA_URIS`` ile verilen okuma replikaları ``replica<n>`` bind'ı
+olarak eklenir. ``RoutingSession``, oturumda bir replika seçilmişse yalnızca
+SELECT sorgularını oraya gönderir; yazımlar ve flush her zaman birincil
+veritabanına gider.
+
+Grup commit açıksa (``GROUP_COMMIT``) tek favori/puan gibi küçük yazımlar
+istek thread'inde commit edilmez; ``GroupCommitter`` kuyruğuna bırakılır. Ayrı
+bir thread, ilk işten sonra en fazla ``GROUP_COMMIT_WINDOW`` saniye boyunca
+gelen işleri toplar ve hepsini tek transaction ve tek commit (tek fsync) ile
+yazar. Her iş kendi SAVEPOINT'inde çalıştığı için bir işin hatası yalnızca
+kendi değişikliklerini geri alır.
+"""
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND_PREFIX = 'replica'
+
+
+def replica_binds(uris):
+    return {f'{REPLICA_BIND_PREFIX}{index}': uri for index, uri in enumerate(uris)}
+
+
+def sqlite_pragmas(config):
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT'])),
+        ('cache_size', int(config['SQLITE_CACHE_SIZE'])),
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE'])),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def configure_sqlite(engine, pragmas):
+    """Motorun açtığı her yeni bağlantıda PRAGMA'ları uygular."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    event.listen(engine, 'connect', on_connect)
+
+
+class RoutingSession(Session):
+    """``info['replica']`` ayarlıysa SELECT sorgularını o replika motoruna gönderir."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if (replica is not None and bind is None and not self._flushing
+                and getattr(clause, 'is_select', False)):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Okuma replikalarından birini seçer ve yönlendirme sayaçlarını tutar."""
+
+    def __init__(self, engines):
+        self.engines = list(engines)
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.errors = 0
+
+    def choose(self):
+        return random.choice(self.engines) if self.engines else None
+
+    @property
+    def stats(self):
+        return {
+            'replicas': len(self.engines),
+            'replica_reads': self.replica_reads,
+            'primary_reads': self.primary_reads,
+            'errors': self.errors,
+        }
+
+
+def begin_write(session):
+    """Yazım transaction'ını başlatır; SQLite'ta yazım kilidi hemen alınır.
+
+    pysqlite transaction'ı ilk yazma ifadesinde açar; SAVEPOINT'ler bundan
+    önce gelirse her biri ayrı commit olur. BEGIN IMMEDIATE hem transaction'ı
+    hemen açar hem de kilit için busy_timeout kadar bekler.
+    """
+    connection = session.connection()
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+class RollbackWrite(Exception):
+    """İşin değişiklikleri geri alınır, ``value`` yine de sonuç olarak döner."""
+
+    def __init__(self, value=None):
+        super().__init__(value)
+        self.value = value
+
+
+class GroupCommitter:
+    def __init__(self, session_scope, window=0.005, max_batch=64):
+        # session_scope: yazım oturumunu veren context manager fabrikası
+        self.session_scope = session_scope
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.jobs = 0
+        self.failed_batches = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, work):
+        """İşi sıradaki gruba ekler, commit edilince ``work()`` sonucunu döndürür."""
+        future = Future()
+        self._queue.put((work, future))
+        self._ensure_thread()
+        return future.result()
+
+    @property
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'jobs': self.jobs,
+            'failed_batches': self.failed_batches,
+            'average_batch': round(self.jobs / self.batches, 2) if self.batches else 0,
+            'window': self.window,
+            'max_batch': self.max_batch,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def _ensure_thread(self):
+        # Thread ilk yazımda başlar; worker process'leri fork'tan sonra kendi thread'ini açar
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            self._commit(batch)
+
+    def _collect(self):
+        job = self._queue.get()
+        if job is None:
+            return None
+        batch = [job]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            # Pencere dolsa da kuyrukta hazır bekleyen işler gruba alınır
+            timeout = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # Kapanış işareti: bu grup yazıldıktan sonra çık
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with self.session_scope() as session:
+                begin_write(session)
+                for work, future in batch:
+                    try:
+                        with session.begin_nested():
+                            outcomes.append((future, work(), None))
+                    except RollbackWrite as e:
+                        outcomes.append((future, e.value, None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+                session.commit()
+        except Exception as e:
+            self.failed_batches += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.jobs += len(batch)
+        for future, value, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
@@ -0,0 +1,76 @@
+"""Şifre hash'leme servisi.
+
+PBKDF2/scrypt hesaplaması istek thread'inde yapılınca /login veya /register
+yığılmalarında CPU kilitlenip diğer istekler bekliyordu. ``PasswordHasher``
+hash işlemlerini sınırlı boyutlu bir process havuzunda çalıştırır; havuzun
+kuyruğu dolduğunda beklemek yerine ``HasherBusy`` fırlatır (endpoint'ler
+bunu 429 + Retry-After olarak döndürür).
+
+Algoritma ve maliyet werkzeug'un ``method`` biçimiyle verilir, ör.
+``pbkdf2:sha256:600000`` veya ``scrypt:32768:8:1``.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+
+class HasherBusy(Exception):
+    """Hash kuyruğu dolu, istemci biraz sonra tekrar denemeli."""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Şifre işlemleri kuyruğu dolu')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, retry_after=1):
+        self.method = method
+        # workers=0 ise hash'ler çağıran thread'de hesaplanır (geliştirme/test)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending if max_pending is not None else max(self.workers, 1) * 4
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._prefix = None
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Saklanan hash'in algoritması/maliyeti güncel ayardan farklı mı?"""
+        if self._prefix is None:
+            # 'pbkdf2' gibi kısa yazımları werkzeug'un yazdığı tam biçime çevir
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy(self.retry_after)
+        try:
+            if self.workers == 0:
+                return func(*args)
+            return self._get_pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_pool(self):
+        # Havuz ilk kullanımda açılır, import sırasında process başlatılmaz
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
@@ -0,0 +1,383 @@
+"""SQLite tabanlı kalıcı iş kuyruğu ve worker process havuzu.
+
+İstekte yapılması gerekmeyen yavaş işler (profil fotoğrafı işleme, istatistik
+ve öneri modeli yeniden hesaplama, periyodik temizlik) kuyruğa yazılır ve
+istek hemen döner. İşler ayrı worker process'lerinde çalışır; harici bir
+broker gerekmez, kuyruk ``instance/jobs.db`` dosyasıdır.
+
+Bir iş şu durumlardan geçer::
+
+    queued -> running -> done
+                 |
+                 +-> queued (hata, geri çekilmeli yeniden deneme)
+                 +-> failed (deneme hakkı bitti)
+
+- **Görünürlük süresi**: worker işi alınca iş ``timeout`` saniye boyunca
+  başkasına görünmez. Worker bu sürede bitiremezse (process öldü, takıldı)
+  iş başka bir worker tarafından tekrar alınır ve bu da bir deneme sayılır.
+  İşler bu yüzden en az bir kez çalışır; aynı işin iki kez çalışması
+  zararsız olmalıdır.
+- **Geri çekilme**: hata alan iş ``base * 2^(deneme-1)`` saniye (en fazla
+  ``cap``, rastgele yarısına kadar kısaltılarak) sonra tekrar denenir.
+- **Tekillik anahtarı**: aynı anahtarlı iş kuyrukta bekliyor veya çalışıyorsa
+  yeni iş eklenmez, mevcut işin id'si döner. Biten işin anahtarı tekrar
+  kullanılabilir.
+
+Alma işlemi ``BEGIN IMMEDIATE`` transaction'ında yapılır; aynı işi iki
+worker alamaz. İşi bitiren worker, işi aldığı andaki deneme sayısını da
+koşul olarak verir; süresi dolup başka worker'a geçen işin sonucunu eski
+worker yazamaz.
+"""
+import json
+import multiprocessing
+import os
+import random
+import signal
+import sqlite3
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+STATES = ('queued', 'running', 'done', 'failed')
+JOB_COLUMNS = ('id', 'kind', 'payload', 'unique_key', 'state', 'attempts', 'max_attempts',
+               'run_at', 'worker', 'last_error', 'created_at', 'finished_at')
+
+Job = namedtuple('Job', 'id kind payload attempts max_attempts')
+JobType = namedtuple('JobType', 'function timeout max_attempts')
+
+
+def retry_delay(attempts, base, cap):
+    """``attempts``. denemeden sonra beklenecek süre (üstel, rastgele kısaltılmış)."""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobRegistry:
+    """İş türü adı -> çalıştırılacak fonksiyon, görünürlük süresi, deneme hakkı."""
+
+    def __init__(self):
+        self.types = {}
+
+    def handler(self, kind, timeout=60, max_attempts=5):
+        def decorator(function):
+            self.types[kind] = JobType(function, timeout, max_attempts)
+            return function
+        return decorator
+
+    def __getitem__(self, kind):
+        return self.types[kind]
+
+    def __contains__(self, kind):
+        return kind in self.types
+
+
+class JobQueue:
+    """Process'lerin paylaştığı kuyruk (her thread'in kendi bağlantısı vardır)."""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS job ('
+            'id INTEGER PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, unique_key TEXT, '
+            "state TEXT NOT NULL DEFAULT 'queued', attempts INTEGER NOT NULL DEFAULT 0, "
+            'max_attempts INTEGER NOT NULL, timeout REAL NOT NULL, run_at REAL NOT NULL, '
+            'worker TEXT, last_error TEXT, created_at REAL NOT NULL, finished_at REAL'
+            ')'
+        )
+        # run_at: bekleyen iş için çalışma zamanı, çalışan iş için görünürlük
+        # süresinin bittiği an. İkisi de geçmişteyse iş alınabilir
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_job_ready ON job (state, run_at)')
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_job_key ON job (unique_key) WHERE unique_key IS NOT NULL')
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_job_finished ON job (finished_at) '
+                           'WHERE finished_at IS NOT NULL')
+        connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=15, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # Kuyruğa yazılan iş kalıcı olmalı; WAL'da NORMAL, çökmede commit'i kaybetmez
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _connection(self):
+        # Bağlantı ilk kullanımda açılır; fork'tan önce açılan bağlantı taşınmaz
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+        return connection
+
+    def _write(self, work):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return result
+
+    def enqueue(self, kind, payload=None, key=None, delay=0, timeout=60, max_attempts=5):
+        """İşi kuyruğa ekler; ``(id, eklendi mi)`` döndürür.
+
+        ``key`` verilirse ve aynı anahtarlı iş bekliyor veya çalışıyorsa yeni iş
+        eklenmez, o işin id'si döner.
+        """
+        body = json.dumps(payload if payload is not None else {})
+        now = self._clock()
+
+        def work(connection):
+            if key is not None:
+                row = connection.execute(
+                    "SELECT id FROM job WHERE unique_key = ? AND state IN ('queued', 'running')", (key,)
+                ).fetchone()
+                if row is not None:
+                    return row[0], False
+            cursor = connection.execute(
+                'INSERT INTO job (kind, payload, unique_key, max_attempts, timeout, run_at, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (kind, body, key, max_attempts, timeout, now + delay, now)
+            )
+            return cursor.lastrowid, True
+
+        return self._write(work)
+
+    def claim(self, worker, kinds=None, limit=1):
+        """Çalışma zamanı gelmiş en fazla ``limit`` işi ``worker`` adına alır.
+
+        Görünürlük süresi dolmuş çalışan işler de alınır; deneme hakkı bitmiş
+        olanlar alınmak yerine ``failed`` olarak işaretlenir.
+        """
+        now = self._clock()
+        kind_filter, kind_params = '', []
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            kind_params = list(kinds)
+
+        def work(connection):
+            rows = connection.execute(
+                'SELECT id, kind, payload, attempts, max_attempts FROM job '
+                "WHERE state IN ('queued', 'running') AND run_at <= ?"
+                f'{kind_filter} ORDER BY run_at, id LIMIT ?',
+                [now, *kind_params, limit]
+            ).fetchall()
+            jobs = []
+            for job_id, kind, payload, attempts, max_attempts in rows:
+                if attempts >= max_attempts:
+                    connection.execute(
+                        "UPDATE job SET state = 'failed', finished_at = ?, "
+                        "last_error = COALESCE(last_error, '') || ? WHERE id = ?",
+                        (now, '\nGörünürlük süresi doldu, deneme hakkı bitti', job_id)
+                    )
+                    continue
+                connection.execute(
+                    "UPDATE job SET state = 'running', attempts = attempts + 1, run_at = ? + timeout, "
+                    'worker = ? WHERE id = ?',
+                    (now, worker, job_id)
+                )
+                jobs.append(Job(job_id, kind, json.loads(payload), attempts + 1, max_attempts))
+            return jobs
+
+        return self._write(work)
+
+    def complete(self, job):
+        """İşi bitmiş olarak işaretler; iş başka worker'a geçmişse False döner."""
+        def work(connection):
+            return connection.execute(
+                "UPDATE job SET state = 'done', finished_at = ?, last_error = NULL "
+                "WHERE id = ? AND state = 'running' AND attempts = ?",
+                (self._clock(), job.id, job.attempts)
+            ).rowcount == 1
+
+        return self._write(work)
+
+    def fail(self, job, error, retry_base=5, retry_cap=3600):
+        """Hatayı kaydeder; deneme hakkı varsa işi geri çekilmeyle tekrar kuyruğa koyar.
+
+        İşin yeni durumunu (``'queued'`` / ``'failed'``) veya iş başka
+        worker'a geçmişse None döndürür.
+        """
+        now = self._clock()
+        if job.attempts < job.max_attempts:
+            state, run_at, finished_at = 'queued', now + retry_delay(job.attempts, retry_base, retry_cap), None
+        else:
+            state, run_at, finished_at = 'failed', now, now
+
+        def work(connection):
+            updated = connection.execute(
+                'UPDATE job SET state = ?, run_at = ?, finished_at = ?, last_error = ? '
+                "WHERE id = ? AND state = 'running' AND attempts = ?",
+                (state, run_at, finished_at, error, job.id, job.attempts)
+            ).rowcount
+            return state if updated else None
+
+        return self._write(work)
+
+    def retry(self, job_ids=None):
+        """Başarısız işleri deneme sayısını sıfırlayıp hemen kuyruğa koyar (None: hepsi)."""
+        def work(connection):
+            query = ("UPDATE job SET state = 'queued', attempts = 0, run_at = ?, finished_at = NULL "
+                     "WHERE state = 'failed'")
+            params = [self._clock()]
+            if job_ids is not None:
+                query += f" AND id IN ({', '.join('?' * len(job_ids))})"
+                params.extend(job_ids)
+            return connection.execute(query, params).rowcount
+
+        return self._write(work)
+
+    def prune(self, older_than, include_failed=False):
+        """``older_than`` saniyeden önce biten işleri siler."""
+        states = ('done', 'failed') if include_failed else ('done',)
+
+        def work(connection):
+            return connection.execute(
+                f"DELETE FROM job WHERE finished_at < ? AND state IN ({', '.join('?' * len(states))})",
+                (self._clock() - older_than, *states)
+            ).rowcount
+
+        return self._write(work)
+
+    def jobs(self, state=None, kind=None, limit=50):
+        """En yeni işler önce; kuyruğu incelemek için."""
+        conditions, params = [], []
+        if state is not None:
+            conditions.append('state = ?')
+            params.append(state)
+        if kind is not None:
+            conditions.append('kind = ?')
+            params.append(kind)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        rows = self._connection().execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM job {where}ORDER BY id DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+    def get(self, job_id):
+        """Tek işin kaydı (``jobs`` ile aynı biçimde) veya None."""
+        row = self._connection().execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM job WHERE id = ?", (job_id,)
+        ).fetchone()
+        return dict(zip(JOB_COLUMNS, row)) if row is not None else None
+
+    @property
+    def stats(self):
+        connection = self._connection()
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(connection.execute('SELECT state, COUNT(*) FROM job GROUP BY state').fetchall())
+        # Çalışma zamanı gelmiş en eski bekleyen iş: worker'lar yetişemiyorsa büyür
+        now = self._clock()
+        oldest = connection.execute(
+            "SELECT MIN(run_at) FROM job WHERE state = 'queued' AND run_at <= ?", (now,)
+        ).fetchone()[0]
+        counts['lag_seconds'] = round(now - oldest, 3) if oldest is not None else 0
+        return counts
+
+
+class Worker:
+    """Kuyruktan iş alıp çalıştıran döngü (her worker process'inde bir tane).
+
+    ``context``, her işin içinde çalışacağı context manager'ı üreten fonksiyondur
+    (ör. ``app.app_context``); ``logger`` hataları yazar.
+    """
+
+    def __init__(self, queue, registry, name, context=None, logger=None, kinds=None,
+                 poll_interval=1.0, retry_base=5, retry_cap=3600):
+        self.queue = queue
+        self.registry = registry
+        self.name = name
+        self.context = context
+        self.logger = logger
+        self.kinds = kinds
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.processed = 0
+        self.failed = 0
+
+    def run_once(self):
+        """Bir iş alıp çalıştırır; iş yoksa False döner."""
+        jobs = self.queue.claim(self.name, self.kinds)
+        if not jobs:
+            return False
+        self.execute(jobs[0])
+        return True
+
+    def execute(self, job):
+        try:
+            function = self.registry[job.kind].function
+            if self.context is None:
+                function(job.payload)
+            else:
+                with self.context():
+                    function(job.payload)
+        except Exception as e:
+            self.failed += 1
+            state = self.queue.fail(job, f'{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}',
+                                    self.retry_base, self.retry_cap)
+            if self.logger is not None:
+                self.logger.warning('İş %s (%s) deneme %d/%d başarısız, durum: %s: %s', job.id, job.kind,
+                                    job.attempts, job.max_attempts, state, e)
+            return
+        self.processed += 1
+        if not self.queue.complete(job) and self.logger is not None:
+            self.logger.warning('İş %s (%s) görünürlük süresi dolduktan sonra bitti', job.id, job.kind)
+
+    def run(self, stop, burst=False):
+        """``stop`` (Event) kurulana kadar çalışır; ``burst`` ise kuyruk boşalınca döner."""
+        while not stop.is_set():
+            if self.run_once():
+                continue
+            if burst:
+                return
+            stop.wait(self.poll_interval * random.uniform(0.5, 1.5))
+
+
+def run_pool(target, args, processes, burst=False):
+    """``target(*args, stop, burst)`` fonksiyonunu ``processes`` ayrı process'te çalıştırır.
+
+    Beklenmedik şekilde ölen process yeniden başlatılır (``burst`` hariç).
+    SIGINT/SIGTERM gelince process'lere durmaları söylenir; ellerindeki işi
+    bitirip çıkarlar. Yarıda kalan işler görünürlük süresi dolunca tekrar alınır.
+    """
+    stop = multiprocessing.Event()
+
+    def start():
+        process = multiprocessing.Process(target=target, args=(*args, stop, burst), daemon=False)
+        process.start()
+        return process
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        pool = [start() for _ in range(processes)]
+        while pool:
+            for process in list(pool):
+                process.join(timeout=0.5 / len(pool))
+                if process.is_alive():
+                    continue
+                if stop.is_set() or burst or process.exitcode == 0:
+                    pool.remove(process)
+                else:
+                    pool[pool.index(process)] = start()
+    finally:
+        stop.set()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def worker_process_signals(stop):
+    """Worker process'inde çağrılır: sinyal işi yarıda kesmez, durma isteği olur."""
+    # Ctrl+C tüm process grubuna gider; ana process zaten durma isteğini iletir
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
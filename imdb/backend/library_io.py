@@ -0,0 +1,145 @@
+"""Kullanıcı kütüphanesini (favoriler ve puanlar) dışa ve içe aktarma.
+
+Dışa aktarma satırları CSV veya NDJSON olarak parça parça üretir; satırlar
+veritabanından gruplar halinde okunduğu için bellek kullanımı kütüphane
+boyutundan bağımsızdır.
+
+İçe aktarma yüklenen dosyayı satır satır okur ve her satırı bir kayda çevirir.
+Tanınan biçimler:
+
+    FilMix CSV     type,movie_id,movie_title,rating,movie_year,movie_poster,date
+    FilMix NDJSON  her satırda {"type": "rating" | "favorite", "movie_id": ...}
+    IMDb puanları  Const,Your Rating,Date Rated,Title,...  (1-10 -> 1.0-5.0)
+    IMDb listesi   Position,Const,Created,Modified,Description,Title,...  (favori olarak)
+"""
+import csv
+import io
+import json
+
+CSV_FIELDS = ('type', 'movie_id', 'movie_title', 'rating', 'movie_year', 'movie_poster', 'date')
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+
+class UnknownFormat(ValueError):
+    """Dosya biçimi tanınamadı."""
+
+
+# Yazılan CSV satırlarını yakalamak için tek satırlık tampon
+class _LineBuffer:
+    def __init__(self):
+        self.value = ''
+
+    def write(self, text):
+        self.value += text
+
+    def pop(self):
+        value, self.value = self.value, ''
+        return value
+
+
+def export_lines(records, fmt):
+    """Kayıtları (sözlük) CSV veya NDJSON satırları olarak üretir."""
+    if fmt == 'ndjson':
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+        return
+
+    buffer = _LineBuffer()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.pop()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.pop()
+
+
+def _imdb_rating(value):
+    # IMDb 1-10 ölçeğini 1.0-5.0 ölçeğine çevir (1 -> 1.0, 10 -> 5.0)
+    return max(float(value) / 2, 1.0)
+
+
+def _filmix_row(row):
+    kind = (row.get('type') or '').strip()
+    item = {
+        'movie_id': (row.get('movie_id') or '').strip(),
+        'movie_title': row.get('movie_title') or 'Unknown',
+        'movie_year': row.get('movie_year') or '',
+        'movie_poster': row.get('movie_poster') or '',
+    }
+    if kind == 'rating':
+        item['rating'] = row.get('rating')
+    elif kind != 'favorite':
+        raise ValueError(f"Bilinmeyen kayıt türü: {kind or '-'}")
+    return kind, item
+
+
+def _imdb_ratings_row(row):
+    return 'rating', {
+        'movie_id': (row.get('Const') or '').strip(),
+        'movie_title': row.get('Title') or 'Unknown',
+        'movie_year': row.get('Year') or '',
+        'rating': _imdb_rating(row['Your Rating']),
+    }
+
+
+def _imdb_list_row(row):
+    return 'favorite', {
+        'movie_id': (row.get('Const') or '').strip(),
+        'movie_title': row.get('Title') or 'Unknown',
+        'movie_year': row.get('Year') or '',
+    }
+
+
+def _csv_converter(fieldnames):
+    fields = set(fieldnames or ())
+    if {'type', 'movie_id'} <= fields:
+        return _filmix_row
+    if {'Const', 'Your Rating'} <= fields:
+        return _imdb_ratings_row
+    if 'Const' in fields:
+        return _imdb_list_row
+    raise UnknownFormat('Dosya biçimi tanınamadı (FilMix CSV/NDJSON, IMDb puan veya liste CSV)')
+
+
+def parse_import(stream, filename=''):
+    """Yüklenen dosyanın biçimini ilk satırdan tanır ve bir okuyucu döndürür.
+
+    Okuyucu (satır no, tür, kayıt) üçlüleri üretir; tür ``'rating'`` veya
+    ``'favorite'``dır. Okunamayan satırlar için tür ``None`` ve kayıt hata
+    mesajıdır. Dosya tanınmazsa hemen ``UnknownFormat`` fırlatılır.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    first = text.readline()
+    if filename.endswith(('.ndjson', '.jsonl')) or first.lstrip().startswith('{'):
+        return _parse_ndjson(first, text)
+
+    reader = csv.DictReader(_chain(first, text))
+    return _parse_csv(reader, _csv_converter(reader.fieldnames))
+
+
+def _parse_csv(reader, convert):
+    for row in reader:
+        try:
+            kind, item = convert(row)
+        except (KeyError, TypeError, ValueError) as e:
+            yield reader.line_num, None, f'Satır okunamadı: {e}'
+            continue
+        yield reader.line_num, kind, item
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _parse_ndjson(first, text):
+    for line_no, line in enumerate(_chain(first, text), 1):
+        if not line.strip():
+            continue
+        try:
+            kind, item = _filmix_row(json.loads(line))
+        except (AttributeError, TypeError, ValueError) as e:
+            yield line_no, None, f'Satır okunamadı: {e}'
+            continue
+        yield line_no, kind, item
@@ -0,0 +1,246 @@
+"""İstek ve SQL ölçümleri, Prometheus çıktısı ve örnekleyici profiler.
+
+Her istek için route, method ve durum koduna göre süre histogramı tutulur.
+SQLAlchemy motor olaylarıyla (``before_cursor_execute`` /
+``after_cursor_execute``) istek içinde çalışan SQL ifadeleri sayılır ve
+süreleri ölçülür. Route başına sorgu sayısı histogramı N+1 kalıplarını
+görünür kılar: liste boyutuyla birlikte artan sorgu sayısı yüksek kovalarda
+birikir. ``slow_request_report`` yavaş isteğin sorgularını metnine göre
+gruplar; aynı ifadenin onlarca kez tekrarı burada görülür.
+
+Değerler process başınadır. ``render`` her satıra ``worker`` etiketi (pid)
+ekler; gunicorn'da her worker kendi serisini raporlar ve Prometheus'ta
+toplam ``sum without (worker)`` ile alınır.
+
+``SamplingProfiler`` bir thread'in yığınını belirli aralıklarla örnekler ve
+flamegraph.pl, inferno veya speedscope'un okuduğu "folded" biçimde
+(``çerçeve;çerçeve;çerçeve adet``) döndürür.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from sqlalchemy import event
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+SQL_OPERATIONS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'BEGIN', 'COMMIT', 'ROLLBACK',
+                  'SAVEPOINT', 'RELEASE', 'PRAGMA'}
+
+# Yavaş istek raporunda saklanan en fazla ifade (sayım sınırsızdır)
+MAX_LOGGED_QUERIES = 500
+SLOW_REPORT_GROUPS = 20
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """Etiket değerleri başına kova sayıları, toplam ve adet tutan histogram."""
+
+    def __init__(self, name, description, labels, buckets):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # etiket değerleri -> [kova sayıları..., toplam, adet]
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def render(self, extra_names=(), extra_values=()):
+        names = self.labels + tuple(extra_names)
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.snapshot().items()):
+            values = labels + tuple(extra_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{format_labels(names + ("le",), values + (format_value(bound),))} '
+                             f'{cumulative}')
+            lines.append(f'{self.name}_bucket{format_labels(names + ("le",), values + ("+Inf",))} {series[-1]}')
+            lines.append(f'{self.name}_sum{format_labels(names, values)} {format_value(series[-2])}')
+            lines.append(f'{self.name}_count{format_labels(names, values)} {series[-1]}')
+        return lines
+
+
+class QueryLog:
+    """Bir istekte çalışan SQL ifadeleri: sayı, toplam süre ve ifade listesi."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if len(self.statements) < MAX_LOGGED_QUERIES:
+            self.statements.append((statement, seconds))
+
+
+def sql_operation(statement):
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ''
+    return operation if operation in SQL_OPERATIONS else 'OTHER'
+
+
+class Metrics:
+    def __init__(self):
+        self.requests = Histogram(
+            'filmix_http_request_duration_seconds', 'İstek süresi (yanıt gövdesi dahil)',
+            ('route', 'method', 'status'), DURATION_BUCKETS)
+        self.request_queries = Histogram(
+            'filmix_http_request_sql_queries', 'İstek başına çalışan SQL ifadesi sayısı',
+            ('route', 'method'), QUERY_COUNT_BUCKETS)
+        self.request_sql_seconds = Histogram(
+            'filmix_http_request_sql_seconds', 'İstek başına toplam SQL süresi',
+            ('route', 'method'), DURATION_BUCKETS)
+        self.queries = Histogram(
+            'filmix_sql_query_duration_seconds', 'SQL ifadesi süresi (istek dışındakiler dahil)',
+            ('operation',), SQL_DURATION_BUCKETS)
+        # (önek, açıklama, sayaç sözlüğü döndüren fonksiyon); ör. önbellek ve grup commit sayaçları
+        self._collectors = []
+
+    def add_collector(self, prefix, description, collect):
+        self._collectors.append((prefix, description, collect))
+
+    def observe_request(self, route, method, status, seconds, query_log):
+        self.requests.observe(seconds, route, method, str(status))
+        self.request_queries.observe(query_log.count, route, method)
+        self.request_sql_seconds.observe(query_log.seconds, route, method)
+
+    def observe_query(self, statement, seconds):
+        self.queries.observe(seconds, sql_operation(statement))
+
+    def render(self):
+        """Prometheus metin biçimi (0.0.4)."""
+        worker = (str(os.getpid()),)
+        lines = []
+        for histogram in (self.requests, self.request_queries, self.request_sql_seconds, self.queries):
+            lines.extend(histogram.render(('worker',), worker))
+        for prefix, description, collect in self._collectors:
+            for key, value in collect().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f'{prefix}_{key}'
+                lines.append(f'# HELP {name} {description}: {key}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f"{name}{format_labels(('worker',), worker)} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_engine(engine, metrics, current_log):
+    """Motorun çalıştırdığı her SQL ifadesini ölçer.
+
+    ``current_log`` o anki isteğin ``QueryLog``'unu (istek dışında None)
+    döndüren fonksiyondur.
+    """
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_start'].pop()
+        metrics.observe_query(statement, seconds)
+        log = current_log()
+        if log is not None:
+            log.add(statement, seconds)
+
+    def on_error(context):
+        # Hatalı ifadede after_cursor_execute çağrılmaz, başlangıç zamanı atılır
+        starts = context.connection.info.get('query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    event.listen(engine, 'after_cursor_execute', after_execute)
+    event.listen(engine, 'handle_error', on_error)
+
+
+def slow_request_report(method, path, status, seconds, query_log):
+    """Yavaş istek için günlük metni: aynı ifadeler gruplanır, en pahalı gruplar önce."""
+    groups = {}
+    for statement, elapsed in query_log.statements:
+        text = ' '.join(statement.split())
+        count, total = groups.get(text, (0, 0.0))
+        groups[text] = (count + 1, total + elapsed)
+
+    lines = [f'Yavaş istek: {method} {path} {status} {seconds * 1000:.1f} ms, '
+             f'{query_log.count} SQL ifadesi ({query_log.seconds * 1000:.1f} ms)']
+    ranked = sorted(groups.items(), key=lambda item: item[1][1], reverse=True)
+    for text, (count, total) in ranked[:SLOW_REPORT_GROUPS]:
+        lines.append(f'  {count} x {total * 1000:.1f} ms: {text[:300]}')
+    if len(ranked) > SLOW_REPORT_GROUPS:
+        lines.append(f'  ... {len(ranked) - SLOW_REPORT_GROUPS} farklı ifade daha')
+    return '\n'.join(lines)
+
+
+def frame_name(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """Bir thread'in yığınını ayrı bir thread'den ``interval`` saniyede bir örnekler."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='filmix-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        """flamegraph.pl / speedscope girdisi: her satır ``yığın adet``."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
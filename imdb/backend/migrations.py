@@ -0,0 +1,287 @@
+"""FilMix veritabanı şema migration'ları.
+
+Her migration bir sürüm numarası ve sırayla çalıştırılacak SQL ifadelerinden
+oluşur. Uygulanan son sürüm ``schema_version`` tablosunda tutulur, böylece
+mevcut bir ``filmix.db`` yerinde güncellenebilir.
+
+Kullanım:
+    python migrations.py                 # app.py'deki veritabanı
+    python migrations.py path/to/filmix.db
+    python migrations.py --check         # ilk sürüm şemasından tüm migration'lar
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+def add_column(table, column, ddl):
+    """Kolon yoksa ekleyen migration adımı (create_all ile oluşmuş tablolar için)."""
+    def step(conn):
+        columns = {c['name'] for c in inspect(conn).get_columns(table)}
+        if column not in columns:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+    return step
+
+# movie_stats tablosunu rating tablosundan tek geçişte yeniden hesaplar
+# (yıldız histogramı: puan aşağı yuvarlanır, 4.5 -> 4 yıldız)
+MOVIE_STATS_REBUILD = [
+    'DELETE FROM movie_stats',
+    '''INSERT INTO movie_stats (movie_id, rating_count, rating_sum, rating_sum_sq,
+                               stars_1, stars_2, stars_3, stars_4, stars_5)
+       SELECT movie_id, COUNT(*), SUM(rating), SUM(rating * rating),
+              SUM(CASE WHEN rating < 2 THEN 1 ELSE 0 END),
+              SUM(CASE WHEN rating >= 2 AND rating < 3 THEN 1 ELSE 0 END),
+              SUM(CASE WHEN rating >= 3 AND rating < 4 THEN 1 ELSE 0 END),
+              SUM(CASE WHEN rating >= 4 AND rating < 5 THEN 1 ELSE 0 END),
+              SUM(CASE WHEN rating >= 5 THEN 1 ELSE 0 END)
+       FROM rating GROUP BY movie_id''',
+]
+
+# Mevcut favori/puan satırlarına kullanıcı bazında artan sync_version verir ve
+# collection_version sayaçlarını en büyük değere çeker (sayaç hiç geri gitmez)
+SYNC_VERSION_BACKFILL = [
+    statement.format(table=table, collection=collection)
+    for table, collection in (('favorite', 'favorites'), ('rating', 'ratings'))
+    for statement in (
+        '''UPDATE {table} SET sync_version =
+               COALESCE((SELECT cv.version FROM collection_version cv
+                         WHERE cv.user_id = {table}.user_id AND cv.collection = '{collection}'), 0)
+               + (SELECT COUNT(*) FROM {table} t2
+                  WHERE t2.user_id = {table}.user_id AND t2.id <= {table}.id)
+           WHERE sync_version IS NULL''',
+        '''INSERT INTO collection_version (user_id, collection, version, updated_at)
+           SELECT user_id, '{collection}', MAX(sync_version), CURRENT_TIMESTAMP
+           FROM {table} WHERE sync_version IS NOT NULL GROUP BY user_id
+           ON CONFLICT (user_id, collection) DO UPDATE SET version =
+               CASE WHEN excluded.version > collection_version.version
+                    THEN excluded.version ELSE collection_version.version END''',
+    )
+]
+
+# (sürüm, açıklama, SQL ifadeleri veya conn alan fonksiyonlar) - yeni migration'lar sona eklenir
+MIGRATIONS = [
+    (1, 'Favori ve puan listeleri için bileşik indeksler', [
+        'CREATE INDEX IF NOT EXISTS ix_favorite_user_added ON favorite (user_id, added_at)',
+        'CREATE INDEX IF NOT EXISTS ix_favorite_movie ON favorite (movie_id)',
+        'CREATE INDEX IF NOT EXISTS ix_rating_user_updated ON rating (user_id, updated_at)',
+        'CREATE INDEX IF NOT EXISTS ix_rating_movie ON rating (movie_id)',
+    ]),
+    (2, 'Token iptali için kullanıcı token sürümü', [
+        add_column('user', 'token_version', 'INTEGER NOT NULL DEFAULT 0'),
+    ]),
+    (3, 'Film bazında puan istatistikleri', [
+        '''CREATE TABLE IF NOT EXISTS movie_stats (
+            movie_id VARCHAR(20) NOT NULL PRIMARY KEY,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum FLOAT NOT NULL DEFAULT 0,
+            rating_sum_sq FLOAT NOT NULL DEFAULT 0,
+            stars_1 INTEGER NOT NULL DEFAULT 0,
+            stars_2 INTEGER NOT NULL DEFAULT 0,
+            stars_3 INTEGER NOT NULL DEFAULT 0,
+            stars_4 INTEGER NOT NULL DEFAULT 0,
+            stars_5 INTEGER NOT NULL DEFAULT 0
+        )''',
+        *MOVIE_STATS_REBUILD,
+    ]),
+    (4, 'İçerik adresli profil fotoğrafı referans sayıları', [
+        '''CREATE TABLE IF NOT EXISTS photo_blob (
+            sha256 VARCHAR(64) NOT NULL PRIMARY KEY,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            upload_bytes INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP,
+            unreferenced_at TIMESTAMP
+        )''',
+        'CREATE INDEX IF NOT EXISTS ix_photo_blob_unreferenced ON photo_blob (unreferenced_at)',
+    ]),
+    (5, 'HTTP ETag için kullanıcı koleksiyon sürümleri', [
+        '''CREATE TABLE IF NOT EXISTS collection_version (
+            user_id INTEGER NOT NULL,
+            collection VARCHAR(20) NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP,
+            PRIMARY KEY (user_id, collection)
+        )''',
+    ]),
+    (6, 'Delta senkronizasyonu için satır sürümleri ve silme kayıtları', [
+        add_column('favorite', 'sync_version', 'INTEGER'),
+        add_column('rating', 'sync_version', 'INTEGER'),
+        *SYNC_VERSION_BACKFILL,
+        'CREATE INDEX IF NOT EXISTS ix_favorite_user_sync ON favorite (user_id, sync_version)',
+        'CREATE INDEX IF NOT EXISTS ix_rating_user_sync ON rating (user_id, sync_version)',
+        '''CREATE TABLE IF NOT EXISTS sync_tombstone (
+            user_id INTEGER NOT NULL,
+            collection VARCHAR(20) NOT NULL,
+            movie_id VARCHAR(20) NOT NULL,
+            version INTEGER NOT NULL,
+            deleted_at TIMESTAMP,
+            PRIMARY KEY (user_id, collection, movie_id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS ix_sync_tombstone_user_version ON sync_tombstone (user_id, collection, version)',
+        'CREATE INDEX IF NOT EXISTS ix_sync_tombstone_deleted ON sync_tombstone (deleted_at)',
+    ]),
+]
+
+# Endpoint'lerin çalıştırdığı sorgular (EXPLAIN QUERY PLAN raporu için)
+ENDPOINT_QUERIES = {
+    'GET /favorites':
+        'SELECT * FROM favorite WHERE user_id = 1 ORDER BY added_at DESC, id DESC',
+    'GET /favorites?cursor=':
+        "SELECT * FROM favorite WHERE user_id = 1 AND (added_at < '2024-01-01' "
+        "OR (added_at = '2024-01-01' AND id < 10)) ORDER BY added_at DESC, id DESC LIMIT 51",
+    'GET /favorites/check/<movie_id>':
+        "SELECT * FROM favorite WHERE user_id = 1 AND movie_id = 'tt0133093' LIMIT 1",
+    'GET /ratings':
+        'SELECT * FROM rating WHERE user_id = 1 ORDER BY updated_at DESC, id DESC',
+    'GET /ratings/<movie_id>':
+        "SELECT * FROM rating WHERE user_id = 1 AND movie_id = 'tt0133093' LIMIT 1",
+    'POST /ratings/lookup':
+        'SELECT * FROM rating WHERE user_id = 1 AND movie_id IN '
+        '(SELECT movie_id FROM favorite WHERE user_id = 1)',
+    'GET /sync':
+        'SELECT * FROM favorite WHERE user_id = 1 AND sync_version > 10 ORDER BY sync_version LIMIT 501',
+    'GET /sync (silinenler)':
+        "SELECT movie_id, version FROM sync_tombstone WHERE user_id = 1 AND collection = 'favorites' "
+        'AND version > 10 ORDER BY version LIMIT 501',
+    'movie_id bazlı sorgular':
+        "SELECT user_id FROM rating WHERE movie_id = 'tt0133093'",
+}
+
+# Migration'lardan önceki ilk sürüm şeması; --check bu şemadan başlar
+BASELINE_SCHEMA = [
+    '''CREATE TABLE user (
+        id INTEGER NOT NULL PRIMARY KEY,
+        username VARCHAR(80) NOT NULL UNIQUE,
+        email VARCHAR(120) NOT NULL UNIQUE,
+        password_hash VARCHAR(128) NOT NULL,
+        profile_photo VARCHAR(200),
+        created_at DATETIME
+    )''',
+    '''CREATE TABLE favorite (
+        id INTEGER NOT NULL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES user (id),
+        movie_id VARCHAR(20) NOT NULL,
+        movie_title VARCHAR(200) NOT NULL,
+        movie_poster VARCHAR(500),
+        movie_year VARCHAR(10),
+        added_at DATETIME,
+        CONSTRAINT unique_user_movie UNIQUE (user_id, movie_id)
+    )''',
+    '''CREATE TABLE rating (
+        id INTEGER NOT NULL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES user (id),
+        movie_id VARCHAR(20) NOT NULL,
+        rating FLOAT NOT NULL,
+        movie_title VARCHAR(200) NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        CONSTRAINT unique_user_movie_rating UNIQUE (user_id, movie_id)
+    )''',
+    "INSERT INTO user VALUES (1, 'check', 'check@filmix.local', 'x', 'default.png', '2024-01-01')",
+    "INSERT INTO favorite VALUES (1, 1, 'tt0133093', 'The Matrix', NULL, '1999', '2024-01-01')",
+    "INSERT INTO rating VALUES (1, 1, 'tt0133093', 4.5, 'The Matrix', '2024-01-01', '2024-01-01')",
+]
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_version ('
+        'version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)'
+    ))
+
+def current_version(conn):
+    _ensure_version_table(conn)
+    return conn.execute(text('SELECT COALESCE(MAX(version), 0) FROM schema_version')).scalar()
+
+def explain(conn, sql):
+    """Sorgunun SQLite planını satır listesi olarak döndürür.
+
+    Sorgunun kullandığı tablo veya kolon henüz yoksa (ör. migration'lardan
+    önceki rapor) plan yerine bunu belirten tek satır döner.
+    """
+    try:
+        rows = conn.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+    except OperationalError as e:
+        return [f'henüz kullanılamıyor ({e.orig})']
+    return [row[-1] for row in rows]
+
+def query_plans(conn):
+    return {name: explain(conn, sql) for name, sql in ENDPOINT_QUERIES.items()}
+
+def migrate(engine, report=False):
+    """Eksik migration'ları sırayla uygular, uygulanan sürümleri döndürür."""
+    is_sqlite = engine.dialect.name == 'sqlite'
+    applied = []
+    
+    with engine.begin() as conn:
+        before = query_plans(conn) if report and is_sqlite else None
+        version = current_version(conn)
+        
+        for number, description, statements in MIGRATIONS:
+            if number <= version:
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(
+                text('INSERT INTO schema_version (version, description, applied_at) '
+                     'VALUES (:version, :description, :applied_at)'),
+                {'version': number, 'description': description, 'applied_at': datetime.utcnow()}
+            )
+            applied.append(number)
+        
+        if before is not None:
+            after = query_plans(conn)
+            for name in ENDPOINT_QUERIES:
+                print(f'== {name}')
+                print('   önce : ' + ' | '.join(before[name]))
+                print('   sonra: ' + ' | '.join(after[name]))
+    
+    return applied
+
+def check():
+    """İlk sürüm şemasıyla geçici bir veritabanı kurup tüm migration'ları raporla
+    uygular; uygulanan sürümleri doğrular ve ikinci çalıştırmanın boş geçtiğini
+    kontrol eder."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'baseline.db')}")
+        with engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.execute(text(statement))
+        
+        applied = migrate(engine, report=True)
+        expected = [number for number, _, _ in MIGRATIONS]
+        if applied != expected:
+            raise SystemExit(f"Beklenen migration'lar {expected}, uygulanan {applied}")
+        if migrate(engine):
+            raise SystemExit("İkinci çalıştırmada migration uygulanmamalıydı")
+        with engine.connect() as conn:
+            versions = conn.execute(text('SELECT sync_version FROM favorite')).scalars().all()
+        if versions != [1]:
+            raise SystemExit(f'sync_version doldurulmadı: {versions}')
+        engine.dispose()
+    print(f"İlk sürüm şemasından migration'lar uygulandı: {', '.join(map(str, applied))}")
+
+def main(argv):
+    if len(argv) > 1 and argv[1] == '--check':
+        check()
+        return
+    if len(argv) > 1:
+        engine = create_engine(f'sqlite:///{argv[1]}')
+    else:
+        from app import create_app, db
+        with create_app().app_context():
+            db.create_all()
+            engine = db.engine
+    
+    applied = migrate(engine, report=True)
+    if applied:
+        print(f"Uygulanan migration'lar: {', '.join(map(str, applied))}")
+    else:
+        print('Veritabanı şeması güncel.')
+
+if __name__ == '__main__':
+    main(sys.argv)
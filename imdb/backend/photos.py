@@ -0,0 +1,144 @@
+"""Profil fotoğrafı işleme ve içerik adresli saklama.
+
+Yükleme diske yazılırken SHA-256'sı hesaplanır ve fotoğraf bu hash ile
+adlandırılır (``photo_id``); aynı resim kaç kez yüklenirse yüklensin bir kez
+saklanır ve URL'si içerik değişmediği için kalıcıdır.
+
+Yüklenen dosya uzantısına göre değil içeriğine göre doğrulanır, ardından bir
+process havuzunda EXIF/metadata atılarak kare kırpılır ve sabit boyutlarda
+WebP ve JPEG olarak yeniden kodlanır:
+
+    <klasör>/<photo_id>_64.webp, <photo_id>_64.jpg, ..._256..., ..._512...
+
+İşlem bitince ``originals/`` altındaki orijinal yükleme silinir.
+"""
+import hashlib
+import os
+import re
+import threading
+import uuid
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+VARIANT_SIZES = (64, 256, 512)
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+ALLOWED_FORMATS = {'PNG', 'JPEG', 'GIF', 'WEBP'}
+MAX_PIXELS = 40_000_000  # Sıkıştırma bombalarına karşı üst sınır
+QUALITY = 85
+CHUNK_SIZE = 64 * 1024
+
+PHOTO_ID_RE = re.compile(r'[0-9a-f]{64}')
+VARIANT_RE = re.compile(r'([0-9a-f]{64})_\d+\.(?:webp|jpg)')
+TEMP_PREFIX = '.tmp-'
+
+
+class InvalidImage(Exception):
+    """Dosya desteklenen bir resim değil veya bozuk."""
+
+
+def inspect_image(path):
+    """Dosyanın gerçekten desteklenen bir resim olduğunu doğrular, formatını döndürür."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(path) as image:
+                image_format = image.format
+                width, height = image.size
+                image.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombWarning,
+            Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise InvalidImage(str(e)) from e
+    
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidImage(f'Desteklenmeyen format: {image_format}')
+    if width * height > MAX_PIXELS:
+        raise InvalidImage('Resim çok büyük')
+    return image_format
+
+
+def variant_name(photo_id, size, extension):
+    return f'{photo_id}_{size}.{extension}'
+
+
+def variant_paths(folder, photo_id):
+    return [os.path.join(folder, variant_name(photo_id, size, extension))
+            for size in VARIANT_SIZES for extension in VARIANT_FORMATS]
+
+
+def has_variants(folder, photo_id):
+    return all(os.path.exists(path) for path in variant_paths(folder, photo_id))
+
+
+def save_upload(stream, directory):
+    """Yüklemeyi parça parça geçici dosyaya yazarken SHA-256'sını hesaplar.
+
+    (geçici dosya yolu, hex hash, bayt sayısı) döndürür.
+    """
+    temp_path = os.path.join(directory, f'{TEMP_PREFIX}{uuid.uuid4().hex}')
+    digest = hashlib.sha256()
+    size = 0
+    with open(temp_path, 'wb') as out:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return temp_path, digest.hexdigest(), size
+
+
+def process_photo(source, output_dir, photo_id):
+    """Orijinalden tüm boyut/format varyantlarını üretir (process havuzunda çalışır)."""
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    with Image.open(source) as image:
+        # EXIF yönünü piksellere uygula; kaydederken metadata yazılmaz
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        
+        for size in sorted(VARIANT_SIZES, reverse=True):
+            resized = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            for extension, image_format in VARIANT_FORMATS.items():
+                frame = resized
+                if image_format == 'JPEG' and frame.mode != 'RGB':
+                    # JPEG saydamlık desteklemez, beyaz zemine oturt
+                    background = Image.new('RGB', frame.size, (255, 255, 255))
+                    background.paste(frame, mask=frame.getchannel('A'))
+                    frame = background
+                target = os.path.join(output_dir, variant_name(photo_id, size, extension))
+                temp = target + '.tmp'
+                frame.save(temp, image_format, quality=QUALITY, optimize=image_format == 'JPEG')
+                os.replace(temp, target)
+    
+    os.remove(source)
+    return photo_id
+
+
+class PhotoProcessor:
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def submit(self, source, output_dir, photo_id):
+        """İşlemi havuza gönderir; workers=0 ise hemen bu thread'de çalıştırır."""
+        if self.workers == 0:
+            process_photo(source, output_dir, photo_id)
+            return None
+        return self._get_pool().submit(process_photo, source, output_dir, photo_id)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
@@ -0,0 +1,226 @@
+"""İstek hız sınırı (token bucket) ve eşzamanlılık sınırı.
+
+Her kural bir kapsam (``ip`` veya ``user``), kova kapasitesi ve saniyedeki
+dolum hızından oluşur. İstek geldiğinde ilgili kovaların hepsinde jeton
+varsa her birinden birer jeton alınır; birinde bile yoksa hiçbirinden
+alınmaz ve istek gövdesi okunmadan, şifre hash'i hesaplanmadan 429 döner.
+Böylece reddedilen istek diğer kapsamların kotasını harcamaz.
+``Retry-After``, bir jetonun dolmasına kalan süredir.
+
+Kova durumu yalnızca iki sayıdır (jeton, son güncelleme zamanı). Dolmuş bir
+kova varsayılan durumla aynı olduğundan ``capacity / rate`` saniye sonra
+silinebilir; bellek kullanımı o an aktif istemci sayısıyla sınırlı kalır.
+
+İki depolama seçeneği vardır:
+
+- ``MemoryBuckets``: process belleği. gunicorn'da her worker kendi kovasını
+  tutar, yani etkin sınır worker sayısıyla çarpılır.
+- ``SQLiteBuckets``: worker'ların paylaştığı bir SQLite dosyası. Durumun
+  kalıcı olması gerekmediğinden ``synchronous=OFF`` kullanılır; dosya
+  ``/dev/shm`` gibi bellek tabanlı bir dizine konursa diske hiç yazılmaz.
+
+``ConcurrencyLimit`` aynı anda işlenen istek sayısını sınırlar; sınır
+doluysa istek beklemez, hemen reddedilir (yük atma).
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def refill(state, capacity, rate, cost, now):
+    """Kovayı ``now`` anına doldurup jeton almayı dener.
+
+    ``(izin, yeni jeton sayısı, bekleme süresi)`` döndürür; ``state`` yoksa kova doludur.
+    """
+    if state is None:
+        tokens = capacity
+    else:
+        tokens, updated = state
+        tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+class MemoryBuckets:
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        # anahtar -> (jeton, son güncelleme, silinebileceği an); en eski kullanılan başta
+        self._buckets = OrderedDict()
+
+    def take(self, requests, cost=1):
+        """``requests``: [(anahtar, kapasite, dolum hızı), ...]; ``(izin, bekleme)`` döndürür.
+
+        Jeton ya hepsinden alınır ya hiçbirinden.
+        """
+        now = self._clock()
+        with self._lock:
+            results = [refill(self._buckets[key][:2] if key in self._buckets else None, capacity, rate, cost, now)
+                       for key, capacity, rate in requests]
+            refused = [wait for allowed, _, wait in results if not allowed]
+            if refused:
+                return False, max(refused)
+            for (key, capacity, rate), (_, tokens, _) in zip(requests, results):
+                self._buckets.pop(key, None)
+                self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+        return True, 0.0
+
+    def _evict(self, now):
+        for key in [key for key, state in self._buckets.items() if state[2] <= now]:
+            del self._buckets[key]
+        # Hâlâ fazlaysa en uzun süredir kullanılmayanlar atılır (o istemciler dolu kovayla başlar)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBuckets:
+    """Worker process'lerinin paylaştığı kovalar (her thread'in kendi bağlantısı vardır)."""
+
+    def __init__(self, path, sweep_every=1000, clock=time.time):
+        self.path = path
+        self.sweep_every = sweep_every
+        self._clock = clock
+        self._local = threading.local()
+        self._calls = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS bucket ('
+            'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, expires REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_bucket_expires ON bucket (expires)')
+        connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=OFF')
+        return connection
+
+    def _connection(self):
+        # Bağlantı ilk kullanımda açılır; fork'tan önce açılan bağlantı taşınmaz
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+        return connection
+
+    def take(self, requests, cost=1):
+        """``MemoryBuckets.take`` ile aynı; kontrol ve jeton alma tek transaction'dadır."""
+        connection = self._connection()
+        now = self._clock()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            results = [
+                refill(connection.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone(),
+                       capacity, rate, cost, now)
+                for key, capacity, rate in requests
+            ]
+            refused = [wait for allowed, _, wait in results if not allowed]
+            if not refused:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO bucket (key, tokens, updated, expires) VALUES (?, ?, ?, ?)',
+                    [(key, tokens, now, now + (capacity - tokens) / rate)
+                     for (key, capacity, rate), (_, tokens, _) in zip(requests, results)]
+                )
+            self._calls += 1
+            if self._calls % self.sweep_every == 0:
+                connection.execute('DELETE FROM bucket WHERE expires <= ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return (False, max(refused)) if refused else (True, 0.0)
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM bucket').fetchone()[0]
+
+
+class RateLimiter:
+    """Endpoint adına göre kuralları uygular ve sayaçları tutar.
+
+    ``rules``: endpoint -> [(kapsam, kapasite, saniyede dolum), ...]. ``'*'``
+    anahtarı kendi kuralı olmayan yazma isteklerine (POST/PUT/PATCH/DELETE)
+    uygulanır.
+    """
+
+    WRITE_METHODS = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+
+    def __init__(self, buckets, rules):
+        self.buckets = buckets
+        self.rules = {endpoint: [tuple(rule) for rule in limits] for endpoint, limits in rules.items()}
+        self.allowed = 0
+        self.limited = 0
+
+    def rules_for(self, endpoint, method):
+        if endpoint in self.rules:
+            return self.rules[endpoint]
+        if method in self.WRITE_METHODS:
+            return self.rules.get('*', [])
+        return []
+
+    def check(self, endpoint, method, identities):
+        """İzin verilirse None, verilmezse saniye cinsinden Retry-After döndürür.
+
+        ``identities``: kapsam -> kimlik (ör. ``{'ip': '1.2.3.4', 'user': 7}``);
+        kimliği olmayan kapsamın kuralı atlanır.
+        """
+        requests = []
+        for scope, capacity, rate in self.rules_for(endpoint, method):
+            identity = identities.get(scope)
+            if identity is not None:
+                requests.append((f'{endpoint}:{scope}:{identity}', capacity, rate))
+        if requests:
+            allowed, wait = self.buckets.take(requests)
+            if not allowed:
+                self.limited += 1
+                return max(1, math.ceil(wait))
+        self.allowed += 1
+        return None
+
+    @property
+    def stats(self):
+        return {'allowed': self.allowed, 'limited': self.limited, 'buckets': len(self.buckets)}
+
+
+class ConcurrencyLimit:
+    """En fazla ``limit`` eşzamanlı iş; dolu sınırda beklemeden reddeder (None: sınırsız)."""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit) if limit else None
+        self.active = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.shed += 1
+            return False
+        with self._lock:
+            self.active += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    @property
+    def stats(self):
+        return {'limit': self.limit or 0, 'active': self.active, 'shed': self.shed}
@@ -0,0 +1,203 @@
+"""Item-item film önerileri.
+
+Model çevrimdışı bir işle kurulur: ``Rating`` ve ``Favorite`` satırlarından
+seyrek bir kullanıcı x film matrisi oluşturulur, sütunlar L2 normalize edilir
+ve kosinüs benzerlikleri film blokları halinde SciPy seyrek çarpımıyla
+hesaplanır. Her film için en benzer K film ``neighbors.npy`` (int32) ve
+``scores.npy`` (float32) dosyalarına yazılır; sunucu bunları
+``mmap_mode='r'`` ile açar, istek başına sadece birkaç satır okunur.
+
+Modeller ``<dizin>/<sürüm>/`` altına yazılır ve ``<dizin>/CURRENT`` dosyası
+atomik olarak yeni sürüme çevrilir; çalışan sunucu yeni modeli bir sonraki
+istekte kendiliğinden yükler.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+# Favoriye eklenmiş ama puanlanmamış filmlerin matristeki değeri
+FAVORITE_WEIGHT = 4.0
+DEFAULT_TOP_K = 50
+BLOCK_SIZE = 256
+
+
+def build_matrix(ratings, favorites):
+    """(user_id, movie_id, puan) ve (user_id, movie_id) akışlarından CSR matris kurar.
+
+    Aynı kullanıcı/film için puan ve favori varsa büyük olan değer kullanılır.
+    ``(matris, movie_id listesi)`` döndürür.
+    """
+    user_index, movie_index = {}, {}
+    users, movies, values = [], [], []
+    
+    def add(user_id, movie_id, value):
+        users.append(user_index.setdefault(user_id, len(user_index)))
+        movies.append(movie_index.setdefault(movie_id, len(movie_index)))
+        values.append(value)
+    
+    for user_id, movie_id, rating in ratings:
+        add(user_id, movie_id, rating)
+    for user_id, movie_id in favorites:
+        add(user_id, movie_id, FAVORITE_WEIGHT)
+    
+    coo = sparse.coo_matrix(
+        (np.asarray(values, dtype=np.float32),
+         (np.asarray(users, dtype=np.int32), np.asarray(movies, dtype=np.int32))),
+        shape=(len(user_index), len(movie_index))
+    )
+    # Tekrarlanan (kullanıcı, film) çiftlerinde toplamak yerine en büyüğünü al
+    csr = coo.tocsr()
+    if csr.nnz != coo.nnz:
+        order = np.lexsort((-coo.data, coo.col, coo.row))
+        row, col, data = coo.row[order], coo.col[order], coo.data[order]
+        keep = np.ones(len(row), dtype=bool)
+        keep[1:] = (row[1:] != row[:-1]) | (col[1:] != col[:-1])
+        csr = sparse.csr_matrix((data[keep], (row[keep], col[keep])), shape=coo.shape)
+    
+    movie_ids = [None] * len(movie_index)
+    for movie_id, index in movie_index.items():
+        movie_ids[index] = movie_id
+    return csr, movie_ids
+
+
+def top_k_similar(matrix, k=DEFAULT_TOP_K, block_size=BLOCK_SIZE):
+    """Her film için en benzer k filmi (komşu indeksleri, kosinüs skorları) döndürür."""
+    n_movies = matrix.shape[1]
+    k = min(k, max(n_movies - 1, 1))
+    
+    # Sütunları L2 normalize et: X^T X doğrudan kosinüs benzerliği olur
+    csc = matrix.tocsc().astype(np.float32)
+    norms = np.sqrt(np.asarray(csc.multiply(csc).sum(axis=0))).ravel()
+    norms[norms == 0] = 1.0
+    normalized = csc @ sparse.diags(1.0 / norms)
+    item_rows = normalized.T.tocsr()
+    normalized = normalized.tocsc()
+    
+    neighbors = np.zeros((n_movies, k), dtype=np.int32)
+    scores = np.zeros((n_movies, k), dtype=np.float32)
+    
+    for start in range(0, n_movies, block_size):
+        stop = min(start + block_size, n_movies)
+        block = (item_rows[start:stop] @ normalized).toarray()
+        block[np.arange(stop - start), np.arange(start, stop)] = 0.0  # kendisi hariç
+        
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+    
+    return neighbors, scores
+
+
+def write_model(directory, neighbors, scores, movie_ids, titles=None):
+    """Modeli yeni bir sürüm dizinine yazar ve CURRENT'ı ona çevirir."""
+    version = time.strftime('%Y%m%d%H%M%S') + f'_{os.getpid()}'
+    target = os.path.join(directory, version)
+    os.makedirs(target)
+    
+    np.save(os.path.join(target, 'neighbors.npy'), neighbors)
+    np.save(os.path.join(target, 'scores.npy'), scores)
+    titles = titles or {}
+    with open(os.path.join(target, 'movies.json'), 'w', encoding='utf-8') as f:
+        json.dump([{'movie_id': m, 'title': titles.get(m)} for m in movie_ids], f, ensure_ascii=False)
+    
+    pointer = os.path.join(directory, 'CURRENT')
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(version)
+    os.replace(pointer + '.tmp', pointer)
+    
+    # Eski sürümleri temizle (yeni ve bir önceki kalsın)
+    versions = sorted(name for name in os.listdir(directory)
+                      if os.path.isdir(os.path.join(directory, name)))
+    for name in versions[:-2]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    return version
+
+
+class RecommendationModel:
+    def __init__(self, path):
+        self.neighbors = np.load(os.path.join(path, 'neighbors.npy'), mmap_mode='r')
+        self.scores = np.load(os.path.join(path, 'scores.npy'), mmap_mode='r')
+        with open(os.path.join(path, 'movies.json'), encoding='utf-8') as f:
+            movies = json.load(f)
+        self.movie_ids = [m['movie_id'] for m in movies]
+        self.titles = [m['title'] for m in movies]
+        self.index = {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+
+    def _item(self, i, score, because_of=None):
+        item = {'movie_id': self.movie_ids[i], 'movie_title': self.titles[i], 'score': round(float(score), 4)}
+        if because_of is not None:
+            item['because_of'] = self.movie_ids[because_of]
+        return item
+
+    def similar(self, movie_id, n=20):
+        i = self.index.get(movie_id)
+        if i is None:
+            return []
+        return [self._item(j, s) for j, s in zip(self.neighbors[i, :n], self.scores[i, :n]) if s > 0]
+
+    def for_user(self, seeds, exclude=(), n=20):
+        """seeds: {movie_id: ağırlık}. Komşu skorlarının ağırlıklı toplamına göre öneri."""
+        seed_items = [(self.index[m], w) for m, w in seeds.items() if m in self.index]
+        if not seed_items:
+            return []
+        
+        rows = np.fromiter((i for i, _ in seed_items), dtype=np.int64, count=len(seed_items))
+        weights = np.fromiter((w for _, w in seed_items), dtype=np.float32, count=len(seed_items))
+        width = self.neighbors.shape[1]
+        neighbor_rows = np.asarray(self.neighbors[rows]).ravel()
+        contributions = (np.asarray(self.scores[rows]) * weights[:, None]).ravel()
+        
+        # Adaylar yalnızca seed'lerin komşularıdır; skorlar tüm film sayısı yerine
+        # seed x K eleman üzerinden toplanır
+        candidates, inverse = np.unique(neighbor_rows, return_inverse=True)
+        totals = np.bincount(inverse, contributions, minlength=len(candidates))
+        totals[np.isin(candidates, rows)] = 0
+        excluded = [self.index[m] for m in exclude if m in self.index]
+        if excluded:
+            totals[np.isin(candidates, excluded)] = 0
+        
+        n = min(n, int(np.count_nonzero(totals > 0)))
+        if n == 0:
+            return []
+        top = np.argpartition(-totals, n - 1)[:n]
+        top = top[np.argsort(-totals[top])]
+        
+        # "X'i beğendiğin için": seçilen adaylara katkıları tek sıralamada
+        # (aday, azalan katkı) dizilir, her adayın ilk kaydı en çok katkı veren seed'dir
+        selected = np.flatnonzero(np.isin(inverse, top))
+        order = selected[np.lexsort((-contributions[selected], inverse[selected]))]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = inverse[order[1:]] != inverse[order[:-1]]
+        best_seed = dict(zip(inverse[order[first]].tolist(), rows[order[first] // width].tolist()))
+        
+        return [self._item(candidates[c], totals[c], because_of=best_seed[c]) for c in top.tolist()]
+
+
+class ModelStore:
+    """CURRENT dosyası değiştiğinde modeli yeniden yükleyen tembel yükleyici."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._version = None
+        self._model = None
+
+    def get(self):
+        try:
+            with open(os.path.join(self.directory, 'CURRENT')) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._model = RecommendationModel(os.path.join(self.directory, version))
+                    self._version = version
+        return self._model
@@ -0,0 +1,227 @@
+"""Film arama indeksi (SQLite FTS5).
+
+Katalog önbelleğinden gelen TMDB filmleri ile kullanıcıların favori ve
+puanlarındaki film adları tek bir FTS5 indeksinde tutulur. Başlık, yıl ve tür
+adları aranabilir; son kelime önek olarak eşleşir (yazarken arama). İndeks
+tüm kullanıcılar için ortaktır: kullanıcı verisi yalnızca indekste olmayan
+filmleri ekler, var olan (ör. katalogdan gelen) başlıkları değiştiremez.
+
+Türkçe karakterler indekslemeden ve sorgudan önce aynı biçime katlanır
+(İ/I/ı/i -> i, ş -> s, ğ -> g, ...), böylece "ISTANBUL", "istanbul" ve
+"İstanbul" aynı sonucu verir.
+
+Kullanım:
+    python search.py rebuild    # katalog önbelleği ve favori/puan tablolarından indeksi yeniden kur
+"""
+import re
+import sqlite3
+import sys
+import threading
+
+_TR_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i', 'Î': 'i', 'î': 'i',
+    'Ş': 's', 'ş': 's', 'Ğ': 'g', 'ğ': 'g', 'Ç': 'c', 'ç': 'c',
+    'Ö': 'o', 'ö': 'o', 'Ü': 'u', 'ü': 'u', 'Â': 'a', 'â': 'a', 'Û': 'u', 'û': 'u',
+})
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Eşleşme sayısı bunu aşan (çok genel) sorgularda bm25 sıralaması yapılmaz;
+# on binlerce eşleşmenin hepsini puanlamak yerine ilk sonuçlar döner
+RANK_CANDIDATE_LIMIT = 1000
+
+_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS movie_docs (
+        rowid INTEGER PRIMARY KEY,
+        movie_id TEXT NOT NULL UNIQUE,
+        title TEXT NOT NULL,
+        year TEXT NOT NULL DEFAULT '',
+        genres TEXT NOT NULL DEFAULT '',
+        title_key TEXT NOT NULL,
+        genres_key TEXT NOT NULL DEFAULT ''
+    )''',
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS movie_fts USING fts5(
+        title_key, year, genres_key,
+        content='movie_docs', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS movie_docs_ai AFTER INSERT ON movie_docs BEGIN
+        INSERT INTO movie_fts (rowid, title_key, year, genres_key)
+        VALUES (new.rowid, new.title_key, new.year, new.genres_key);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS movie_docs_ad AFTER DELETE ON movie_docs BEGIN
+        INSERT INTO movie_fts (movie_fts, rowid, title_key, year, genres_key)
+        VALUES ('delete', old.rowid, old.title_key, old.year, old.genres_key);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS movie_docs_au AFTER UPDATE ON movie_docs BEGIN
+        INSERT INTO movie_fts (movie_fts, rowid, title_key, year, genres_key)
+        VALUES ('delete', old.rowid, old.title_key, old.year, old.genres_key);
+        INSERT INTO movie_fts (rowid, title_key, year, genres_key)
+        VALUES (new.rowid, new.title_key, new.year, new.genres_key);
+    END''',
+    'CREATE TABLE IF NOT EXISTS genres (id INTEGER PRIMARY KEY, name TEXT NOT NULL)',
+]
+
+# Katalog (TMDB) kaydı: başlık güncellenir, boş gelen alanlar (ör. tür yok)
+# mevcut değeri ezmez
+_CATALOG_UPSERT = '''
+    INSERT INTO movie_docs (movie_id, title, year, genres, title_key, genres_key)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (movie_id) DO UPDATE SET
+        title = excluded.title,
+        title_key = excluded.title_key,
+        year = CASE WHEN excluded.year != '' THEN excluded.year ELSE year END,
+        genres = CASE WHEN excluded.genres != '' THEN excluded.genres ELSE genres END,
+        genres_key = CASE WHEN excluded.genres_key != '' THEN excluded.genres_key ELSE genres_key END
+    WHERE excluded.title != title OR excluded.year NOT IN ('', year)
+        OR excluded.genres NOT IN ('', genres)
+'''
+
+# Kullanıcı verisi (favori/puan gövdesindeki başlık) indeks herkes için ortak
+# olduğundan mevcut kaydı değiştirmez: film indekste yoksa eklenir, varsa
+# yalnızca boş yıl doldurulur
+_USER_UPSERT = '''
+    INSERT INTO movie_docs (movie_id, title, year, genres, title_key, genres_key)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (movie_id) DO UPDATE SET year = excluded.year
+    WHERE year = '' AND excluded.year != ''
+'''
+
+
+def fold(text):
+    """Türkçe duyarlı büyük/küçük harf ve aksan katlaması"""
+    return (text or '').translate(_TR_FOLD).lower()
+
+
+def build_match_query(text):
+    """Kullanıcı sorgusunu FTS5 MATCH ifadesine çevirir (son kelime önek)."""
+    tokens = _TOKEN_RE.findall(fold(text))
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._connect()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def add_movies(self, movies, catalog=False):
+        """(movie_id, başlık, yıl, tür adları listesi) demetlerini indeksler.
+
+        ``catalog`` değilse (kullanıcı verisi) indekste olan filmlerin başlığı değişmez.
+        """
+        rows = []
+        for movie_id, title, year, genres in movies:
+            if not movie_id or not title:
+                continue
+            genre_text = ', '.join(genres or [])
+            rows.append((str(movie_id), title, (year or '')[:4], genre_text, fold(title), fold(genre_text)))
+        if not rows:
+            return 0
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(_CATALOG_UPSERT if catalog else _USER_UPSERT, rows)
+        return len(rows)
+
+    def set_genres(self, genres):
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO genres (id, name) VALUES (?, ?)',
+                    [(g['id'], g['name']) for g in genres]
+                )
+
+    def genre_names(self, genre_ids):
+        if not genre_ids:
+            return []
+        placeholders = ', '.join('?' * len(genre_ids))
+        rows = self._connect().execute(
+            f'SELECT id, name FROM genres WHERE id IN ({placeholders})', list(genre_ids)
+        ).fetchall()
+        names = dict(rows)
+        return [names[g] for g in genre_ids if g in names]
+
+    def add_catalog_results(self, results):
+        """TMDB liste yanıtındaki filmleri indeksler."""
+        return self.add_movies((
+            (m.get('id'), m.get('title'), m.get('release_date'), self.genre_names(m.get('genre_ids')))
+            for m in results
+        ), catalog=True)
+
+    def search(self, text, limit=20):
+        match = build_match_query(text)
+        if match is None:
+            return []
+        conn = self._connect()
+        candidates = conn.execute(
+            'SELECT COUNT(*) FROM (SELECT rowid FROM movie_fts WHERE movie_fts MATCH ? LIMIT ?)',
+            (match, RANK_CANDIDATE_LIMIT + 1)
+        ).fetchone()[0]
+        order = 'ORDER BY rank' if candidates <= RANK_CANDIDATE_LIMIT else ''
+        rows = conn.execute(
+            f'''SELECT d.movie_id, d.title, d.year, d.genres
+                FROM movie_fts JOIN movie_docs d ON d.rowid = movie_fts.rowid
+                WHERE movie_fts MATCH ? {order} LIMIT ?''',
+            (match, limit)
+        ).fetchall()
+        return [
+            {'movie_id': movie_id, 'title': title, 'year': year, 'genres': genres}
+            for movie_id, title, year, genres in rows
+        ]
+
+    def count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM movie_docs').fetchone()[0]
+
+    def clear(self):
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute('DELETE FROM movie_docs')
+                conn.execute("INSERT INTO movie_fts (movie_fts) VALUES ('rebuild')")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+
+def main(argv):
+    if argv[1:] != ['rebuild']:
+        print(__doc__)
+        return
+    
+    from app import create_app, db, search_index, catalog_cache, Favorite, Rating
+    with create_app().app_context():
+        search_index.clear()
+        # Önce türler, sonra önbellekteki katalog sayfaları
+        entries = list(catalog_cache.iter_entries())
+        for key, data in entries:
+            if key.startswith('genre/movie/list?'):
+                search_index.set_genres(data.get('genres', []))
+        total = 0
+        for key, data in entries:
+            total += search_index.add_catalog_results(data.get('results', []))
+        
+        favorites = db.session.query(
+            Favorite.movie_id, Favorite.movie_title, Favorite.movie_year
+        ).yield_per(1000)
+        total += search_index.add_movies((m, t, y, None) for m, t, y in favorites)
+        ratings = db.session.query(Rating.movie_id, Rating.movie_title).yield_per(1000)
+        total += search_index.add_movies((m, t, None, None) for m, t in ratings)
+    print(f'{total} kayıt işlendi, indekste {search_index.count()} film var.')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,82 @@
+"""FilMix production başlatıcısı.
+
+Geliştirme sunucusu (``python app.py``) yerine bunu kullanın:
+
+    FILMIX_SECRET_KEY=... python serve.py
+    FILMIX_WORKERS=4 FILMIX_THREADS=8 FILMIX_BIND=0.0.0.0:5000 python serve.py
+
+Linux/macOS'ta gunicorn ile ``FILMIX_WORKERS`` process ve her birinde
+``FILMIX_THREADS`` thread (gthread worker'ları) çalışır. Windows'ta gunicorn
+olmadığından waitress ile tek process ve ``FILMIX_THREADS`` thread çalışır.
+
+Worker'lar başlamadan önce tablolar oluşturulur ve eksik migration'lar bir
+kez uygulanır. Her worker uygulamayı ``create_app()`` ile kendisi kurar;
+veritabanı bağlantıları ve process havuzları fork'tan sonra açılır.
+"""
+import os
+import sys
+
+from config import INSECURE_SECRET_KEY
+
+BIND = os.environ.get('FILMIX_BIND', '0.0.0.0:5000')
+WORKERS = int(os.environ.get('FILMIX_WORKERS', (os.cpu_count() or 1) + 1))
+THREADS = int(os.environ.get('FILMIX_THREADS', 8))
+TIMEOUT = int(os.environ.get('FILMIX_TIMEOUT', 60))
+
+
+def prepare():
+    from app import create_app, prepare_database, db
+
+    app = create_app()
+    if app.config['SECRET_KEY'] == INSECURE_SECRET_KEY:
+        sys.exit('FILMIX_SECRET_KEY ayarlanmadan production sunucusu başlatılamaz.')
+    applied = prepare_database(app)
+    if applied:
+        print(f"Şema migration'ları uygulandı: {applied}")
+    # Ana process'te açılan bağlantılar worker'lara fork ile taşınmamalı
+    with app.app_context():
+        db.engine.dispose()
+
+
+def worker_app():
+    from app import create_app, start_maintenance
+
+    app = create_app()
+    start_maintenance(app)
+    return app
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class FilmixApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', BIND)
+            self.cfg.set('workers', WORKERS)
+            self.cfg.set('threads', THREADS)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', TIMEOUT)
+            self.cfg.set('accesslog', '-')
+
+        def load(self):
+            return worker_app()
+
+    FilmixApplication().run()
+
+
+def run_waitress():
+    from waitress import serve
+
+    if WORKERS > 1:
+        print('Windows: waitress tek process çalıştırır, FILMIX_WORKERS yok sayıldı.')
+    host, port = BIND.rsplit(':', 1)
+    serve(worker_app(), host=host, port=int(port), threads=THREADS)
+
+
+if __name__ == '__main__':
+    prepare()
+    print(f'FilMix Backend başlatılıyor: {BIND}, {WORKERS} process x {THREADS} thread')
+    if sys.platform == 'win32':
+        run_waitress()
+    else:
+        run_gunicorn()
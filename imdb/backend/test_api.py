@@ -1,112 +1,426 @@
-import requests
+"""FilMix API testleri (Flask test client, geçici veritabanı).
+
+Kayıt/giriş/profil akışı eski elle çalıştırılan test_api.py'den taşındı;
+ardından eklenen token iptali, sayfalama, senkronizasyon, toplu yazım, grup
+commit, hız sınırı, iş kuyruğu, trend ve fotoğraf davranışları da burada
+denenir. Birden fazla worker process'i gerektiren durumlar test_workers.py'dedir.
+"""
+import io
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from app import job_types
+from conftest import PASSWORD
+from jobs import Worker
+
+
+def run_jobs(app):
+    """Kuyruktaki işleri bu process'te sırayla çalıştırır (worker --burst gibi)."""
+    worker = Worker(app.extensions['filmix']['job_queue'], job_types, 'test',
+                    context=app.app_context, logger=app.logger)
+    worker.run(threading.Event(), burst=True)
+    return worker
+
 
-# Backend URL
-BASE_URL = "http://localhost:5000"
+def png_upload(color):
+    data = io.BytesIO()
+    Image.new('RGB', (320, 240), color).save(data, 'PNG')
+    data.seek(0)
+    return {'file': (data, 'photo.png')}
 
-def test_register():
+
+# ==================== KAYIT, GİRİŞ VE PROFİL ====================
+
+def test_register(client):
     """Kullanıcı kaydı testi"""
-    print("=== Kullanıcı Kaydı Testi ===")
-    
-    data = {
-        "username": "testuser",
-        "email": "test@example.com",
-        "password": "123456"
-    }
-    
-    response = requests.post(f"{BASE_URL}/register", json=data)
-    print(f"Status Code: {response.status_code}")
-    print(f"Response: {response.json()}")
-    print()
-
-def test_login():
+    data = {'username': 'testuser', 'email': 'test@example.com', 'password': '123456'}
+    response = client.post('/register', json=data)
+    assert response.status_code == 201
+    assert response.get_json()['user']['username'] == 'testuser'
+
+    assert client.post('/register', json=data).status_code == 400
+    response = client.post('/register', json={**data, 'username': 'other', 'email': 'o@example.com',
+                                              'password': '123'})
+    assert response.status_code == 400
+
+
+def test_login(client, signup):
     """Kullanıcı girişi testi"""
-    print("=== Kullanıcı Girişi Testi ===")
-    
-    data = {
-        "username": "testuser",
-        "password": "123456"
-    }
-    
-    response = requests.post(f"{BASE_URL}/login", json=data)
-    print(f"Status Code: {response.status_code}")
-    result = response.json()
-    print(f"Response: {result}")
-    
-    # Token'ı döndür
-    if response.status_code == 200:
-        return result.get('token')
-    return None
-
-def test_profile(token):
+    session = signup(client, 'testuser')
+    assert session['token'] and session['refresh_token']
+    assert session['expires_in'] > 0
+
+    response = client.post('/login', json={'username': 'testuser', 'password': 'yanlis-sifre'})
+    assert response.status_code == 401
+    # Email ile de giriş yapılabilir
+    response = client.post('/login', json={'username': 'testuser@example.com', 'password': PASSWORD})
+    assert response.status_code == 200
+
+
+def test_profile(client, signup):
     """Profil bilgileri testi"""
-    print("=== Profil Bilgileri Testi ===")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(f"{BASE_URL}/profile", headers=headers)
-    print(f"Status Code: {response.status_code}")
-    print(f"Response: {response.json()}")
-    print()
-
-def test_update_profile(token):
+    session = signup(client, 'testuser')
+    response = client.get('/profile', headers=session['headers'])
+    assert response.status_code == 200
+    assert response.get_json()['user']['email'] == 'testuser@example.com'
+
+    etag = response.headers['ETag']
+    response = client.get('/profile', headers={**session['headers'], 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    assert client.get('/profile').status_code == 401
+    assert client.get('/profile', headers={'Authorization': 'Bearer bozuk'}).status_code == 401
+
+
+def test_update_profile(client, signup):
     """Profil güncelleme testi"""
-    print("=== Profil Güncelleme Testi ===")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    data = {
-        "username": "testuser_updated"
-    }
-    
-    response = requests.put(f"{BASE_URL}/profile", json=data, headers=headers)
-    print(f"Status Code: {response.status_code}")
-    print(f"Response: {response.json()}")
-    print()
-
-def test_change_password(token):
-    """Şifre değiştirme testi"""
-    print("=== Şifre Değiştirme Testi ===")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    data = {
-        "current_password": "123456",
-        "new_password": "newpassword123"
-    }
-    
-    response = requests.post(f"{BASE_URL}/change_password", json=data, headers=headers)
-    print(f"Status Code: {response.status_code}")
-    print(f"Response: {response.json()}")
-    print()
-
-def main():
-    """Ana test fonksiyonu"""
-    print("FilMix Backend API Test Başlatılıyor...\n")
-    
-    try:
-        # API durumunu kontrol et
-        response = requests.get(BASE_URL)
-        if response.status_code != 200:
-            print("Backend servisi çalışmıyor!")
-            return
-        
-        print("Backend servisi çalışıyor ✓\n")
-        
-        # Testleri çalıştır
-        test_register()
-        token = test_login()
-        
-        if token:
-            test_profile(token)
-            test_update_profile(token)
-            test_change_password(token)
-            print("Tüm testler başarıyla tamamlandı! ✓")
-        else:
-            print("Token alınamadı, diğer testler atlandı!")
-            
-    except requests.exceptions.ConnectionError:
-        print("Backend servisine bağlanılamıyor!")
-        print("Lütfen önce 'python app.py' ile backend'i başlatın.")
-    except Exception as e:
-        print(f"Test sırasında hata oluştu: {e}")
-
-if __name__ == "__main__":
-    main()
+    session = signup(client, 'testuser')
+    signup(client, 'taken')
+
+    response = client.put('/profile', json={'username': 'testuser_updated'}, headers=session['headers'])
+    assert response.status_code == 200
+    assert response.get_json()['user']['username'] == 'testuser_updated'
+    # Önbellekteki kullanıcı da güncellenmiş olmalı
+    assert client.get('/profile', headers=session['headers']).get_json()['user']['username'] == 'testuser_updated'
+
+    response = client.put('/profile', json={'username': 'taken'}, headers=session['headers'])
+    assert response.status_code == 400
+
+
+def test_change_password(client, signup):
+    """Şifre değiştirme testi: eski token'lar iptal edilir, yenileri çalışır"""
+    session = signup(client, 'testuser')
+    response = client.post('/change_password', json={
+        'current_password': 'yanlis', 'new_password': 'newpassword123'
+    }, headers=session['headers'])
+    assert response.status_code == 400
+
+    response = client.post('/change_password', json={
+        'current_password': PASSWORD, 'new_password': 'newpassword123'
+    }, headers=session['headers'])
+    assert response.status_code == 200
+    new_token = response.get_json()['token']
+
+    assert client.get('/profile', headers=session['headers']).status_code == 401
+    assert client.post('/token/refresh', json={'refresh_token': session['refresh_token']}).status_code == 401
+    assert client.get('/profile', headers={'Authorization': f'Bearer {new_token}'}).status_code == 200
+
+    assert client.post('/login', json={'username': 'testuser', 'password': PASSWORD}).status_code == 401
+    assert client.post('/login', json={'username': 'testuser', 'password': 'newpassword123'}).status_code == 200
+
+
+def test_refresh_token(client, signup):
+    session = signup(client, 'testuser')
+    response = client.post('/token/refresh', json={'refresh_token': session['refresh_token']})
+    assert response.status_code == 200
+    token = response.get_json()['token']
+    assert client.get('/profile', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+    # Erişim token'ı yenileme token'ı yerine, yenileme token'ı erişim token'ı yerine geçmez
+    assert client.post('/token/refresh', json={'refresh_token': session['token']}).status_code == 401
+    headers = {'Authorization': f"Bearer {session['refresh_token']}"}
+    assert client.get('/profile', headers=headers).status_code == 401
+
+
+# ==================== FAVORİLER VE PUANLAR ====================
+
+def test_favorites_pagination(client, signup):
+    session = signup(client, 'testuser')
+    for movie_id in range(1, 6):
+        response = client.post('/favorites', json={'movie_id': movie_id, 'movie_title': f'Film {movie_id}'},
+                               headers=session['headers'])
+        assert response.status_code == 201
+    assert client.post('/favorites', json={'movie_id': '3'}, headers=session['headers']).status_code == 400
+
+    seen, cursor = [], None
+    while True:
+        query = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        body = client.get('/favorites', query_string=query, headers=session['headers']).get_json()
+        seen.extend(favorite['movie_id'] for favorite in body['favorites'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert seen == ['5', '4', '3', '2', '1']
+
+    response = client.get('/favorites?format=ndjson', headers=session['headers'])
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line)['movie_id'] for line in response.get_data(as_text=True).splitlines()] == seen
+
+    assert client.get('/favorites?limit=0', headers=session['headers']).status_code == 400
+    assert client.get('/favorites?cursor=bozuk', headers=session['headers']).status_code == 400
+
+
+def test_rating_lookup_accepts_numeric_ids(client, signup):
+    session = signup(client, 'testuser')
+    client.post('/ratings', json={'movie_id': 603, 'rating': 4, 'movie_title': 'Matrix'}, headers=session['headers'])
+    client.post('/favorites', json={'movie_id': 603}, headers=session['headers'])
+
+    response = client.post('/ratings/lookup', json={'movie_ids': [603, '27205']}, headers=session['headers'])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 1 and body['ratings']['603']['rating'] == 4.0
+
+    # movie_ids verilmezse favorilerin puanları döner
+    body = client.post('/ratings/lookup', json={}, headers=session['headers']).get_json()
+    assert list(body['ratings']) == ['603']
+
+    response = client.post('/ratings/lookup', json={'movie_ids': [None]}, headers=session['headers'])
+    assert response.status_code == 400
+    assert client.post('/movies/stats', json={'movie_ids': [603]}).get_json()['stats']['603']['rating_count'] == 1
+
+
+def test_bulk_upserts(client, signup):
+    session = signup(client, 'testuser')
+    response = client.post('/favorites/bulk', json={'items': [
+        {'movie_id': 1, 'movie_title': 'Bir'},
+        {'movie_id': '2', 'movie_title': 'İki'},
+        {'movie_id': '1', 'movie_title': 'Bir tekrar'},
+        {'movie_title': 'Id yok'},
+    ]}, headers=session['headers'])
+    assert response.status_code == 200
+    statuses = [result['status'] for result in response.get_json()['results']]
+    assert statuses == ['duplicate', 'created', 'created', 'error']
+
+    response = client.post('/favorites/bulk', json={'items': [{'movie_id': '2'}, {'movie_id': '3'}]},
+                           headers=session['headers'])
+    assert [result['status'] for result in response.get_json()['results']] == ['exists', 'created']
+
+    items = [{'movie_id': '10', 'rating': 5}, {'movie_id': '11', 'rating': 2}]
+    response = client.post('/ratings/bulk', json={'items': items}, headers=session['headers'])
+    assert [result['status'] for result in response.get_json()['results']] == ['created', 'created']
+    items = [{'movie_id': '10', 'rating': 3}, {'movie_id': '12', 'rating': 9}]
+    response = client.post('/ratings/bulk', json={'items': items}, headers=session['headers'])
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['updated', 'error']
+    assert results[0]['rating']['rating'] == 3.0
+
+    # Film istatistikleri toplu yazımla birlikte güncellenir
+    stats = client.get('/movies/10/stats').get_json()['stats']
+    assert stats['rating_count'] == 1 and stats['average'] == 3.0
+
+
+def test_duplicate_favorites_keep_etag(client, signup):
+    session = signup(client, 'testuser')
+    items = [{'movie_id': str(movie_id)} for movie_id in range(3)]
+    client.post('/favorites/bulk', json={'items': items}, headers=session['headers'])
+    response = client.get('/favorites', headers=session['headers'])
+    etag = response.headers['ETag']
+
+    client.post('/favorites/bulk', json={'items': items}, headers=session['headers'])
+    client.post('/favorites', json={'movie_id': '1'}, headers=session['headers'])
+    response = client.get('/favorites', headers={**session['headers'], 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    client.post('/favorites/bulk', json={'items': items + [{'movie_id': '9'}]}, headers=session['headers'])
+    response = client.get('/favorites', headers={**session['headers'], 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 4
+
+
+def test_sync_changes_and_tombstones(client, signup):
+    session = signup(client, 'testuser')
+    headers = session['headers']
+    client.post('/favorites', json={'movie_id': '1', 'movie_title': 'Bir'}, headers=headers)
+    client.post('/ratings', json={'movie_id': '2', 'rating': 4}, headers=headers)
+
+    body = client.get('/sync', headers=headers).get_json()
+    assert body['reset'] is True and body['has_more'] is False
+    assert [item['movie_id'] for item in body['favorites']['changed']] == ['1']
+    assert [item['movie_id'] for item in body['ratings']['changed']] == ['2']
+    token = body['next_token']
+
+    body = client.get('/sync', query_string={'since': token}, headers=headers).get_json()
+    assert body['favorites'] == {'changed': [], 'deleted': []}
+
+    client.delete('/favorites/1', headers=headers)
+    client.post('/ratings', json={'movie_id': '2', 'rating': 5}, headers=headers)
+    client.post('/favorites', json={'movie_id': '3'}, headers=headers)
+    body = client.get('/sync', query_string={'since': token}, headers=headers).get_json()
+    assert body['reset'] is False
+    assert body['favorites']['deleted'] == ['1']
+    assert [item['movie_id'] for item in body['favorites']['changed']] == ['3']
+    assert body['ratings']['changed'][0]['rating'] == 5.0
+
+    # Sayfalı senkronizasyon: her sayfa bir sonrakinin token'ını verir
+    client.post('/favorites', json={'movie_id': '4'}, headers=headers)
+    pages, token = [], None
+    while True:
+        body = client.get('/sync', query_string={'limit': 1, **({'since': token} if token else {})},
+                          headers=headers).get_json()
+        pages.append(body)
+        token = body['next_token']
+        if not body['has_more']:
+            break
+    assert [[item['movie_id'] for item in page['favorites']['changed']] for page in pages] == [['3'], ['4']]
+    assert client.get('/sync?since=bozuk', headers=headers).status_code == 400
+
+
+def test_group_commit(make_app, signup):
+    app = make_app(GROUP_COMMIT=True, GROUP_COMMIT_WINDOW=0.02)
+    client = app.test_client()
+    session = signup(client, 'testuser')
+
+    def rate(movie_id):
+        response = app.test_client().post('/ratings', json={'movie_id': str(movie_id), 'rating': 3},
+                                          headers=session['headers'])
+        return response.status_code
+
+    with ThreadPoolExecutor(8) as pool:
+        assert set(pool.map(rate, range(40))) == {201}
+
+    assert client.get('/ratings', headers=session['headers']).get_json()['count'] == 40
+    stats = client.get('/stats/group_commit').get_json()
+    assert stats['enabled'] and stats['jobs'] == 40 and stats['failed_batches'] == 0
+    # Favori zaten varsa yalnızca o işin SAVEPOINT'i geri alınır
+    client.post('/favorites', json={'movie_id': '1'}, headers=session['headers'])
+    assert client.post('/favorites', json={'movie_id': '1'}, headers=session['headers']).status_code == 400
+    assert client.get('/favorites', headers=session['headers']).get_json()['count'] == 1
+
+
+# ==================== HIZ SINIRI ====================
+
+def test_rate_limit(make_app, signup):
+    app = make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS={
+        'api.login': [['ip', 1, 0.001]],
+        'api.register': [['ip', 10, 0.001]],
+        '*': [['user', 2, 0.001], ['ip', 3, 0.001]],
+    })
+    client = app.test_client()
+    first = signup(client, 'first', REMOTE_ADDR='10.0.0.1')
+    second = signup(client, 'second', REMOTE_ADDR='10.0.0.2')
+
+    response = client.post('/login', json={'username': 'first', 'password': PASSWORD},
+                           environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+    def write(session, movie_id):
+        return client.post('/favorites', json={'movie_id': movie_id}, headers=session['headers'],
+                           environ_base={'REMOTE_ADDR': '10.0.0.9'}).status_code
+
+    assert [write(first, movie_id) for movie_id in '123'] == [201, 201, 429]
+    # Kullanıcı kovası dolu olduğu için reddedilen istek IP kovasından jeton almadı
+    assert [write(second, movie_id) for movie_id in '12'] == [201, 429]
+    # Okuma isteklerine '*' kuralı uygulanmaz
+    response = client.get('/favorites', headers=first['headers'], environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    assert response.status_code == 200
+
+
+# ==================== İŞ KUYRUĞU VE İÇE AKTARMA ====================
+
+def test_queued_import(make_app, signup):
+    app = make_app(JOB_QUEUE_ENABLED=True, IMPORT_QUEUE_MIN_BYTES=1)
+    client = app.test_client()
+    session = signup(client, 'testuser')
+    other = signup(client, 'other')
+
+    body = 'Const,Your Rating,Date Rated,Title\n' + ''.join(
+        f'tt{index:07d},{index % 10 + 1},2024-01-01,Film {index}\n' for index in range(50)
+    ) + 'bozuk satır\n'
+    response = client.post('/import', headers=session['headers'], content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(body.encode()), 'ratings.csv')})
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+
+    assert client.get(status_url, headers=session['headers']).get_json()['state'] == 'queued'
+    assert client.get(status_url, headers=other['headers']).status_code == 404
+
+    assert run_jobs(app).processed == 1
+    status = client.get(status_url, headers=session['headers']).get_json()
+    assert status['state'] == 'done'
+    assert status['result']['type'] == 'done'
+    assert len(status['result']['error_lines']) == 1
+    assert client.get('/ratings', headers=session['headers']).get_json()['count'] == 50
+
+    response = client.post('/import', headers=session['headers'], content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(b'tanimsiz'), 'x.txt')})
+    assert response.status_code == 400
+
+
+def test_direct_import_streams_progress(client, signup):
+    session = signup(client, 'testuser')
+    lines = [json.dumps({'type': 'favorite', 'movie_id': str(index), 'movie_title': f'Film {index}'})
+             for index in range(3)]
+    response = client.post('/import', headers=session['headers'], content_type='multipart/form-data',
+                           data={'file': (io.BytesIO('\n'.join(lines).encode()), 'library.ndjson')})
+    assert response.status_code == 200
+    last = json.loads(response.get_data(as_text=True).strip().splitlines()[-1])
+    assert last['type'] == 'done'
+    assert client.get('/favorites', headers=session['headers']).get_json()['count'] == 3
+
+
+# ==================== TREND, ARAMA, FOTOĞRAF ====================
+
+def test_trending(client, signup):
+    first = signup(client, 'first')
+    second = signup(client, 'second')
+    for session in (first, second):
+        client.post('/favorites', json={'movie_id': '603', 'movie_title': 'Matrix'}, headers=session['headers'])
+    client.post('/ratings', json={'movie_id': '155', 'rating': 5, 'movie_title': 'Kara Şövalye'},
+                headers=first['headers'])
+
+    body = client.get('/trending?window=day').get_json()
+    assert [result['movie_id'] for result in body['results']] == ['603', '155']
+    assert body['results'][0]['movie_title'] == 'Matrix'
+    body = client.get('/trending?window=hour&kind=ratings').get_json()
+    assert [result['movie_id'] for result in body['results']] == ['155']
+    assert client.get('/trending?window=year').status_code == 400
+
+
+def test_search_keeps_catalog_titles(client, signup):
+    session = signup(client, 'testuser')
+    assert client.get('/catalog/popular').status_code == 200
+
+    client.post('/favorites', json={'movie_id': '603', 'movie_title': 'Kötü Başlık'}, headers=session['headers'])
+    client.post('/favorites', json={'movie_id': '999001', 'movie_title': 'Katalogda Olmayan'},
+                headers=session['headers'])
+
+    assert [result['title'] for result in client.get('/search?q=matr').get_json()['results']] == ['Matrix']
+    assert client.get('/search?q=kötü').get_json()['count'] == 0
+    assert [result['movie_id'] for result in client.get('/search?q=katalogda').get_json()['results']] == ['999001']
+
+
+def test_photo_served_only_after_processing(make_app, signup):
+    app = make_app(JOB_QUEUE_ENABLED=True)
+    client = app.test_client()
+    session = signup(client, 'testuser')
+
+    response = client.post('/upload_photo', data=png_upload('red'), headers=session['headers'],
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    photo_id = response.get_json()['profile_photo']
+
+    # Varyantlar üretilene kadar orijinal (EXIF'li) dosya sunulmaz
+    response = client.get(f'/profile_photos/{photo_id}?size=64')
+    assert response.status_code == 404
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    run_jobs(app)
+    response = client.get(f'/profile_photos/{photo_id}?size=64&format=webp')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert 'immutable' in response.headers['Cache-Control']
+    with Image.open(io.BytesIO(response.data)) as image:
+        assert image.size == (64, 64)
+
+    response = client.post('/upload_photo', data={'file': (io.BytesIO(b'resim degil'), 'x.png')},
+                           headers=session['headers'], content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+def test_stats_endpoints_are_internal(make_app):
+    client = make_app().test_client()
+    assert client.get('/stats/jobs').status_code == 200
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.5'}).status_code == 403
+    assert client.get('/stats/rate_limit', headers={'X-Forwarded-For': '203.0.113.5'}).status_code == 403
+
+    client = make_app(METRICS_TOKEN='izleme').test_client()
+    assert client.get('/stats/auth_cache').status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer izleme'},
+                          environ_base={'REMOTE_ADDR': '203.0.113.5'})
+    assert response.status_code == 200
+    assert b'filmix_http_request_duration_seconds' in response.data
@@ -0,0 +1,197 @@
+"""Aynı veritabanını paylaşan worker'lar arası tutarlılık testleri.
+
+Her ``make_app()`` çağrısı ayrı bir gunicorn worker'ı gibidir: aynı SQLite
+veritabanını ve instance klasörünü kullanır, ama token önbelleği, token sürümü
+eşlemesi, SQLAlchemy oturumu ve trend sayaçları kendisinindir. Son test gerçek
+bir fork ile worker'ların master'da açılmış servis nesnelerini devraldığı
+durumu dener.
+"""
+import io
+import multiprocessing
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from app import db, prepare_database, PhotoBlob
+from conftest import PASSWORD
+from jobs import JobQueue
+from ratelimit import SQLiteBuckets
+from trending import TrendingCounters
+
+
+def png_upload(color):
+    data = io.BytesIO()
+    Image.new('RGB', (320, 240), color).save(data, 'PNG')
+    data.seek(0)
+    return {'file': (data, 'photo.png')}
+
+
+def test_migrations_run_once(make_app):
+    app = make_app()
+    # Diğer worker'lar şemayı hazır bulur
+    assert prepare_database(make_app()) == []
+    assert prepare_database(app) == []
+
+
+def test_password_change_revokes_tokens_on_other_worker(make_app, signup):
+    first, second = make_app(AUTH_CACHE_TTL=0.2), make_app(AUTH_CACHE_TTL=0.2)
+    client_a, client_b = first.test_client(), second.test_client()
+    session = signup(client_a, 'testuser')
+    # İkinci worker token'ı doğrulayıp önbelleğe alır
+    assert client_b.get('/profile', headers=session['headers']).status_code == 200
+
+    response = client_a.post('/change_password', json={
+        'current_password': PASSWORD, 'new_password': 'newpassword123'
+    }, headers=session['headers'])
+    assert response.status_code == 200
+    new_token = response.get_json()['token']
+
+    # Yenileme token'ı her zaman veritabanından kontrol edilir
+    assert client_b.post('/token/refresh', json={'refresh_token': session['refresh_token']}).status_code == 401
+    # Eski erişim token'ı diğer worker'da en geç AUTH_CACHE_TTL sonra reddedilir
+    time.sleep(0.3)
+    assert client_b.get('/profile', headers=session['headers']).status_code == 401
+    assert client_b.get('/profile', headers={'Authorization': f'Bearer {new_token}'}).status_code == 200
+    response = client_b.post('/login', json={'username': 'testuser', 'password': 'newpassword123'})
+    assert response.status_code == 200
+
+
+def test_collection_version_is_shared(make_app, signup):
+    first, second = make_app(), make_app()
+    client_a, client_b = first.test_client(), second.test_client()
+    session = signup(client_a, 'testuser')
+
+    response = client_b.get('/favorites', headers=session['headers'])
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client_a.post('/favorites', json={'movie_id': '603', 'movie_title': 'Matrix'},
+                             headers=session['headers'])
+    assert response.status_code == 201
+    # Diğer worker'ın yazdığı favori ETag'i değiştirir; eski ETag 304 almaz
+    response = client_b.get('/favorites', headers={**session['headers'], 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [item['movie_id'] for item in response.get_json()['favorites']] == ['603']
+    etag = response.headers['ETag']
+    response = client_a.get('/favorites', headers={**session['headers'], 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    response = client_b.delete('/favorites/603', headers=session['headers'])
+    assert response.status_code == 200
+    response = client_a.get('/favorites', headers={**session['headers'], 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['favorites'] == []
+
+
+def test_rate_limit_buckets_are_shared(make_app, signup, tmp_path):
+    config = {
+        'RATE_LIMIT_ENABLED': True,
+        'RATE_LIMIT_DATABASE': str(tmp_path / 'ratelimit.db'),
+        'RATE_LIMITS': {'api.login': [['ip', 3, 0.001]], 'api.register': [['ip', 10, 0.001]]},
+    }
+    first, second = make_app(**config), make_app(**config)
+    client_a, client_b = first.test_client(), second.test_client()
+    # Kayıt ve ilk giriş 10.0.0.1'den; sayılan girişler 10.0.0.2'den
+    signup(client_a, 'testuser', REMOTE_ADDR='10.0.0.1')
+
+    def login(client):
+        return client.post('/login', json={'username': 'testuser', 'password': PASSWORD},
+                           environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code
+
+    assert [login(client_a), login(client_a), login(client_b)] == [200, 200, 200]
+    assert login(client_b) == 429
+    assert login(client_a) == 429
+
+
+def test_photo_refs_with_stale_user_on_other_worker(make_app, signup):
+    first, second = make_app(), make_app()
+    client_a, client_b = first.test_client(), second.test_client()
+    session = signup(client_a, 'testuser')
+    # İkinci worker kullanıcıyı varsayılan fotoğrafla önbelleğe alır
+    assert client_b.get('/profile', headers=session['headers']).status_code == 200
+
+    def upload(client, color):
+        response = client.post('/upload_photo', data=png_upload(color), headers=session['headers'],
+                               content_type='multipart/form-data')
+        assert response.status_code == 200
+        return response.get_json()['profile_photo']
+
+    def refs():
+        with first.app_context():
+            return {blob.sha256: blob.ref_count for blob in db.session.query(PhotoBlob)}
+
+    red = upload(client_a, 'red')
+    blue = upload(client_b, 'blue')
+    assert refs() == {red: 0, blue: 1}
+    assert client_a.post('/reset_photo', headers=session['headers']).status_code == 200
+    assert refs() == {red: 0, blue: 0}
+
+
+def test_trending_merges_worker_counts(make_app, signup):
+    first, second = make_app(), make_app()
+    client_a, client_b = first.test_client(), second.test_client()
+    session = signup(client_a, 'testuser')
+    other = signup(client_b, 'other')
+
+    client_a.post('/favorites', json={'movie_id': '603', 'movie_title': 'Matrix'}, headers=session['headers'])
+    client_b.post('/favorites', json={'movie_id': '603', 'movie_title': 'Matrix'}, headers=other['headers'])
+    client_b.post('/ratings', json={'movie_id': '155', 'rating': 5, 'movie_title': 'Kara Şövalye'},
+                  headers=other['headers'])
+    for app in (first, second, first):
+        app.extensions['filmix']['trending'].checkpoint()
+
+    for client in (client_a, client_b):
+        body = client.get('/trending?window=day&kind=favorites').get_json()
+        assert [(result['movie_id'], result['score']) for result in body['results']] == [('603', 2)]
+        body = client.get('/trending?window=day&kind=ratings').get_json()
+        assert [result['movie_id'] for result in body['results']] == ['155']
+
+
+def _use_after_fork(buckets, queue, trending, results):
+    try:
+        results.put((
+            buckets.take([('ip:10.0.0.1', 3, 0.001)]),
+            queue.enqueue('child', {'pid': os.getpid()})[1],
+            [job.kind for job in queue.claim('child')],
+            trending.record('favorites', '603', title='Matrix'),
+        ))
+        trending.checkpoint()
+    except BaseException as error:
+        results.put(repr(error))
+        raise
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="fork yok")
+def test_services_reopen_connections_after_fork(tmp_path):
+    # Master'da açılmış (ve kullanılmış) bağlantılar fork edilen worker'da
+    # paylaşılmamalı; her process kendi bağlantısını açar
+    buckets = SQLiteBuckets(str(tmp_path / 'ratelimit.db'))
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    trending = TrendingCounters(str(tmp_path / 'trending.db'), {'day': [3600, 24, 1.0]},
+                                {'favorites': 2.0, 'ratings': 1.0}, checkpoint_interval=0)
+    assert buckets.take([('ip:10.0.0.1', 3, 0.001)]) == (True, 0.0)
+    queue.enqueue('parent')
+    trending.record('favorites', '603', title='Matrix')
+    trending.checkpoint()
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    child = context.Process(target=_use_after_fork, args=(buckets, queue, trending, results))
+    child.start()
+    result = results.get(timeout=30)
+    child.join(30)
+    assert child.exitcode == 0, result
+    allowed, enqueued, claimed, _ = result
+    assert allowed == (True, 0.0) and enqueued
+    assert claimed == ['parent']
+
+    # Çocuğun yazdıkları ebeveynin bağlantılarından görünür
+    assert buckets.take([('ip:10.0.0.1', 3, 0.001)]) == (True, 0.0)
+    assert buckets.take([('ip:10.0.0.1', 3, 0.001)])[0] is False
+    stats = queue.stats
+    assert (stats['queued'], stats['running']) == (1, 1)
+    trending.checkpoint()
+    assert [(movie_id, score) for movie_id, score, _ in trending.top('day', 'favorites')] == [('603', 2)]
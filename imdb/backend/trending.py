@@ -0,0 +1,368 @@
+"""Trend listeleri: zaman kovalı, sönümlenen favori/puan sayaçları.
+
+Her favori ekleme ve yeni puan ``RESOLUTION`` saniyelik (5 dk) bir zaman
+kovasına sayılır. Her pencere (ör. saat, gün, hafta) bu kovaları kendi kova
+genişliğinde gruplar ve ``N`` kovayı tutar; film skoru
+
+    sum(sayı * sönüm ** kovanın yaşı)
+
+olur, yani yeni etkileşimler eskilerden ağır basar ve ``N`` kovadan eski
+etkileşimler pencereden tamamen çıkar.
+
+Skorlar yalnızca pencerenin kovası ilerlediğinde (sönüm, en eski kovanın
+düşmesi) azalır; bu yeniden hesaplama kova başına bir kez yapılır. Arada
+yalnızca artış olduğundan her liste ilk ``size`` filmi sıralı tutan bir
+``Leaderboard``'dur: skoru artan film ya yerini değiştirir ya da listenin
+sonundakini dışarı atar. Liste her zaman tam doğrudur; ilk K film O(K)'de
+döner, favori/puan tabloları taranmaz.
+
+Sayaçlar process belleğindedir ve ``checkpoint_interval`` saniyede bir
+paylaşılan bir SQLite dosyasına yazılır. Aynı yazımda diğer worker
+process'lerinin son kontrol noktasından beri yazdığı artışlar okunup belleğe
+eklenir; her process kendi etkileşimlerini hemen, diğerlerininkini en geç bir
+aralık sonra görür. Yeniden başlatmada sayaçlar dosyadan yüklenir.
+"""
+import atexit
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+RESOLUTION = 300  # saniye; diskteki ve bellekteki en küçük kova
+KINDS = ('favorites', 'ratings')
+BOARD_KINDS = ('all',) + KINDS
+
+
+class Window:
+    def __init__(self, name, bucket_seconds, buckets, decay):
+        if bucket_seconds % RESOLUTION:
+            raise ValueError(f'{name}: kova genişliği {RESOLUTION} saniyenin katı olmalı')
+        self.name = name
+        self.ratio = bucket_seconds // RESOLUTION
+        self.buckets = buckets
+        self.weights = [decay ** age for age in range(buckets)]
+
+    def index(self, fine):
+        return fine // self.ratio
+
+    def oldest_fine(self, index):
+        """Pencerede kalan en eski ince kova."""
+        return (index - self.buckets + 1) * self.ratio
+
+
+class Leaderboard:
+    """Skorları yalnızca artan filmlerin ilk ``size`` tanesini sıralı tutar."""
+
+    def __init__(self, size):
+        self.size = size
+        self.scores = {}
+        self._ranked = []  # (-skor, film), artan sırada
+
+    def reset(self, scores):
+        self.scores = scores
+        self._ranked = heapq.nsmallest(self.size, ((-score, movie_id) for movie_id, score in scores.items()))
+
+    def add(self, movie_id, amount):
+        old = self.scores.get(movie_id)
+        new = (old or 0.0) + amount
+        self.scores[movie_id] = new
+        ranked = self._ranked
+        if old is not None:
+            index = bisect_left(ranked, (-old, movie_id))
+            if index < len(ranked) and ranked[index] == (-old, movie_id):
+                del ranked[index]
+        # Listede olmayan her filmin skoru listenin sonundakinden küçüktür;
+        # yalnızca bu film arttığı için listeye girmesi için son sırayı geçmesi yeter
+        if len(ranked) < self.size or (-new, movie_id) < ranked[-1]:
+            insort(ranked, (-new, movie_id))
+            if len(ranked) > self.size:
+                ranked.pop()
+
+    def top(self, k):
+        return [(movie_id, -score) for score, movie_id in self._ranked[:k]]
+
+
+class TrendingCounters:
+    """``windows``: ad -> (kova genişliği sn, kova sayısı, kova başına sönüm).
+
+    ``weights``: ``'all'`` listesinde favori ve puanın ağırlığı.
+    """
+
+    def __init__(self, path, windows, weights, size=100, checkpoint_interval=10, logger=None, clock=time.time):
+        self.path = path
+        self.windows = [Window(name, *spec) for name, spec in windows.items()]
+        self.weights = weights
+        self.size = size
+        self.checkpoint_interval = checkpoint_interval
+        self.logger = logger
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._connection = None
+        self._pid = None
+        # ince kova -> {(tür, film): sayı}; diskteki ve henüz yazılmamış sayılar
+        self._counts = {}
+        # Henüz diske yazılmamış artışlar ve film bilgileri
+        self._pending = Counter()
+        self._pending_movies = {}
+        self._movies = {}  # film -> (başlık, poster, yıl)
+        self._boards = {(window.name, kind): Leaderboard(size) for window in self.windows for kind in BOARD_KINDS}
+        self._index = {}  # pencere -> skorların hesaplandığı kova
+        self._version = 0
+        self._generation = None
+        self.recorded = 0
+        self.checkpoints = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    # ---- bellek ----
+
+    def record(self, kind, movie_id, title=None, poster=None, year=None, when=None):
+        """Bir favori ekleme (``'favorites'``) veya yeni puanı (``'ratings'``) sayar."""
+        self._ensure_loaded()
+        now = self._clock()
+        fine = int((now if when is None else when) // RESOLUTION)
+        with self._lock:
+            self._advance(now)
+            key = (kind, movie_id)
+            bucket = self._counts.setdefault(fine, Counter())
+            bucket[key] += 1
+            self._pending[(fine, kind, movie_id)] += 1
+            self._bump(fine, kind, movie_id, 1)
+            if title:
+                info = self._movies.get(movie_id, (None, None, None))
+                info = (title, poster or info[1], year or info[2])
+                self._movies[movie_id] = self._pending_movies[movie_id] = info
+            self.recorded += 1
+
+    def top(self, window, kind='all', k=20):
+        """Pencerede ilk ``k`` film: ``[(film, skor, (başlık, poster, yıl)), ...]``."""
+        self._ensure_loaded()
+        with self._lock:
+            self._advance(self._clock())
+            return [(movie_id, score, self._movies.get(movie_id, (None, None, None)))
+                    for movie_id, score in self._boards[(window, kind)].top(k)]
+
+    def _bump(self, fine, kind, movie_id, count):
+        for window in self.windows:
+            age = max(0, self._index[window.name] - window.index(fine))
+            if age >= window.buckets:
+                continue
+            amount = count * window.weights[age]
+            self._boards[(window.name, kind)].add(movie_id, amount)
+            self._boards[(window.name, 'all')].add(movie_id, amount * self.weights[kind])
+
+    def _advance(self, now):
+        """Kovası ilerleyen pencerelerin skorlarını baştan hesaplar."""
+        fine_now = int(now // RESOLUTION)
+        changed = False
+        for window in self.windows:
+            index = window.index(fine_now)
+            if self._index.get(window.name) != index:
+                self._index[window.name] = index
+                self._recompute(window)
+                changed = True
+        if changed:
+            # Hiçbir pencerede kalmayan kovalar ve filmler bellekten atılır
+            oldest = min(window.oldest_fine(self._index[window.name]) for window in self.windows)
+            for fine in [fine for fine in self._counts if fine < oldest]:
+                del self._counts[fine]
+            active = set().union(*(self._boards[(window.name, 'all')].scores for window in self.windows))
+            self._movies = {movie_id: info for movie_id, info in self._movies.items() if movie_id in active}
+
+    def _recompute(self, window):
+        index = self._index[window.name]
+        scores = {kind: Counter() for kind in BOARD_KINDS}
+        for fine, bucket in self._counts.items():
+            age = max(0, index - window.index(fine))
+            if age >= window.buckets:
+                continue
+            weight = window.weights[age]
+            for (kind, movie_id), count in bucket.items():
+                scores[kind][movie_id] += count * weight
+                scores['all'][movie_id] += count * weight * self.weights[kind]
+        for kind in BOARD_KINDS:
+            self._boards[(window.name, kind)].reset(dict(scores[kind]))
+
+    def _recompute_all(self):
+        for window in self.windows:
+            self._index[window.name] = window.index(int(self._clock() // RESOLUTION))
+            self._recompute(window)
+
+    # ---- disk ----
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=15, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # Kaybolan son kontrol noktası rebuild-trending ile geri kazanılır
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS counter ('
+            'bucket INTEGER NOT NULL, kind TEXT NOT NULL, movie_id TEXT NOT NULL, '
+            'count INTEGER NOT NULL, version INTEGER NOT NULL, PRIMARY KEY (bucket, kind, movie_id)'
+            ') WITHOUT ROWID'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_counter_version ON counter (version)')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS movie ('
+            'movie_id TEXT PRIMARY KEY, title TEXT, poster TEXT, year TEXT, version INTEGER NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_movie_version ON movie (version)')
+        connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        connection.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0), ('generation', 0)")
+        return connection
+
+    def _ensure_loaded(self):
+        # Fork'tan sonra her process dosyayı kendisi yükler ve kendi kontrol noktası thread'ini başlatır
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._connection = self._connect()
+            self._pending.clear()
+            self._pending_movies.clear()
+            self._generation = None
+            self._pid = os.getpid()
+            self.checkpoint()
+            if self.checkpoint_interval:
+                threading.Thread(target=self._run, name='trending-checkpoint', daemon=True).start()
+                atexit.register(self.checkpoint)
+
+    def _run(self):
+        while True:
+            time.sleep(self.checkpoint_interval)
+            try:
+                self.checkpoint()
+            except Exception:
+                # Bir sonraki turda tekrar denenir; artışlar bellekte bekler
+                if self.logger is not None:
+                    self.logger.exception('Trend sayaçları diske yazılamadı')
+
+    def _oldest_fine(self):
+        fine_now = int(self._clock() // RESOLUTION)
+        return min(window.oldest_fine(window.index(fine_now)) for window in self.windows)
+
+    def checkpoint(self):
+        """Bekleyen artışları yazar, diğer process'lerin artışlarını belleğe ekler."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            pending_movies, self._pending_movies = self._pending_movies, {}
+            since, generation = self._version, self._generation
+        oldest = self._oldest_fine()
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            version = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0] + 1
+            connection.execute("UPDATE meta SET value = ? WHERE key = 'version'", (version,))
+            connection.executemany(
+                'INSERT INTO counter (bucket, kind, movie_id, count, version) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (bucket, kind, movie_id) DO UPDATE SET '
+                'count = count + excluded.count, version = excluded.version',
+                [(fine, kind, movie_id, count, version) for (fine, kind, movie_id), count in pending.items()
+                 if fine >= oldest]
+            )
+            connection.executemany(
+                'INSERT INTO movie (movie_id, title, poster, year, version) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (movie_id) DO UPDATE SET title = excluded.title, '
+                'poster = COALESCE(excluded.poster, poster), year = COALESCE(excluded.year, year), '
+                'version = excluded.version',
+                [(movie_id, *info, version) for movie_id, info in pending_movies.items()]
+            )
+            if connection.execute('DELETE FROM counter WHERE bucket < ?', (oldest,)).rowcount:
+                connection.execute('DELETE FROM movie WHERE movie_id NOT IN (SELECT movie_id FROM counter)')
+            disk_generation = connection.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+            full = disk_generation != generation
+            condition, params = ('bucket >= ?', (oldest,)) if full else ('version > ?', (since,))
+            counters = connection.execute(
+                f'SELECT bucket, kind, movie_id, count FROM counter WHERE {condition}', params).fetchall()
+            movies = connection.execute(
+                f"SELECT movie_id, title, poster, year FROM movie{' WHERE version > ?' if not full else ''}",
+                () if full else (since,)).fetchall()
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            with self._lock:
+                self._pending.update(pending)
+                self._pending_movies = {**pending_movies, **self._pending_movies}
+            raise
+
+        with self._lock:
+            self._version, self._generation = version, disk_generation
+            if full:
+                self._movies = {}
+            for movie_id, *info in movies:
+                self._movies[movie_id] = tuple(info)
+            self._movies.update(self._pending_movies)
+            if full:
+                # Yalnızca bu yazımdan sonra gelen artışlar bellekte kalır
+                self._counts = {}
+                for fine, kind, movie_id, count in counters:
+                    self._counts.setdefault(fine, Counter())[(kind, movie_id)] = count
+                for (fine, kind, movie_id), count in self._pending.items():
+                    self._counts.setdefault(fine, Counter())[(kind, movie_id)] += count
+                self._recompute_all()
+            else:
+                self._advance(self._clock())
+                for fine, kind, movie_id, count in counters:
+                    bucket = self._counts.setdefault(fine, Counter())
+                    # Bellekteki sayı, yazıldıktan sonra gelen artışlar hariç diskteki sayıya eşit olmalı
+                    delta = count - (bucket[(kind, movie_id)] - self._pending[(fine, kind, movie_id)])
+                    if delta > 0:
+                        bucket[(kind, movie_id)] += delta
+                        self._bump(fine, kind, movie_id, delta)
+            self.checkpoints += 1
+
+    def rebuild(self, events):
+        """Sayaçları geçmişten baştan kurar.
+
+        ``events``: ``(tür, film, zaman, başlık, poster, yıl)``. Diğer
+        process'ler bir sonraki kontrol noktasında yeni sayaçları yükler.
+        """
+        self._ensure_loaded()
+        oldest = self._oldest_fine()
+        counts, movies = Counter(), {}
+        for kind, movie_id, when, title, poster, year in events:
+            fine = int(when // RESOLUTION)
+            if fine < oldest:
+                continue
+            counts[(fine, kind, movie_id)] += 1
+            info = movies.get(movie_id, (None, None, None))
+            movies[movie_id] = (title or info[0], poster or info[1], year or info[2])
+
+        connection = self._connection
+        with self._lock:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                version = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0] + 1
+                connection.execute("UPDATE meta SET value = ? WHERE key = 'version'", (version,))
+                connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+                connection.execute('DELETE FROM counter')
+                connection.execute('DELETE FROM movie')
+                connection.executemany(
+                    'INSERT INTO counter (bucket, kind, movie_id, count, version) VALUES (?, ?, ?, ?, ?)',
+                    [(*key, count, version) for key, count in counts.items()]
+                )
+                connection.executemany(
+                    'INSERT INTO movie (movie_id, title, poster, year, version) VALUES (?, ?, ?, ?, ?)',
+                    [(movie_id, *info, version) for movie_id, info in movies.items()]
+                )
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            # Geçmiş tablolardan okunduğu için bu process'in bekleyen artışları zaten sayıldı
+            self._pending.clear()
+            self._pending_movies.clear()
+        self.checkpoint()
+        return sum(counts.values())
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {'recorded': self.recorded, 'checkpoints': self.checkpoints, 'pending': sum(self._pending.values()),
+                    'buckets': len(self._counts), 'movies': len(self._movies)}
@@ -4,7 +4,13 @@ import 'package:http/http.dart' as http;
 class AuthService {
   static const String _baseUrl = 'http://localhost:5000';
   static String? _token;
+  static String? _refreshToken;
+  static DateTime? _tokenExpiry;
   static Map<String, dynamic>? _user;
+  // ETag and body of the last 200 response per GET path
+  static final Map<String, MapEntry<String, String>> _etagCache = {};
+  // Token returned by the last /sync call
+  static String? _syncToken;
 
   // Get current token
   static String? get token => _token;
@@ -15,6 +21,67 @@ class AuthService {
   // Check if user is logged in
   static bool get isLoggedIn => _token != null;
 
+  // Store access/refresh tokens from a login, refresh or password change
+  static void _saveTokens(Map<String, dynamic> data) {
+    _token = data['token'];
+    _refreshToken = data['refresh_token'];
+    final expiresIn = data['expires_in'];
+    _tokenExpiry = expiresIn == null
+        ? null
+        : DateTime.now().add(Duration(seconds: expiresIn));
+  }
+
+  // Refresh the access token shortly before it expires
+  static Future<void> _ensureFreshToken() async {
+    if (_refreshToken == null || _tokenExpiry == null) return;
+    final refreshAt = _tokenExpiry!.subtract(const Duration(seconds: 30));
+    if (DateTime.now().isBefore(refreshAt)) return;
+    await refreshAccessToken();
+  }
+
+  // GET with If-None-Match; a 304 is answered from the cached body
+  static Future<http.Response> _cachedGet(String path) async {
+    final cached = _etagCache[path];
+    final response = await http.get(
+      Uri.parse('$_baseUrl$path'),
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': 'Bearer $_token',
+        if (cached != null) 'If-None-Match': cached.key,
+      },
+    );
+
+    if (response.statusCode == 304 && cached != null) {
+      return http.Response(cached.value, 200, headers: response.headers);
+    }
+    final etag = response.headers['etag'];
+    if (response.statusCode == 200 && etag != null) {
+      _etagCache[path] = MapEntry(etag, response.body);
+    }
+    return response;
+  }
+
+  // Refresh access token
+  static Future<bool> refreshAccessToken() async {
+    if (_refreshToken == null) return false;
+
+    try {
+      final response = await http.post(
+        Uri.parse('$_baseUrl/token/refresh'),
+        headers: {'Content-Type': 'application/json'},
+        body: json.encode({'refresh_token': _refreshToken}),
+      );
+
+      if (response.statusCode == 200) {
+        _saveTokens(json.decode(response.body));
+        return true;
+      }
+      return false;
+    } catch (e) {
+      return false;
+    }
+  }
+
   // Login
   static Future<Map<String, dynamic>> login(
     String username,
@@ -30,7 +97,7 @@ class AuthService {
       final data = json.decode(response.body);
 
       if (response.statusCode == 200) {
-        _token = data['token'];
+        _saveTokens(data);
         _user = data['user'];
         return {'success': true, 'message': 'Giriş başarılı!', 'user': _user};
       } else {
@@ -85,15 +152,10 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Token bulunamadı!'};
     }
+    await _ensureFreshToken();
 
     try {
-      final response = await http.get(
-        Uri.parse('$_baseUrl/profile'),
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': 'Bearer $_token',
-        },
-      );
+      final response = await _cachedGet('/profile');
 
       final data = json.decode(response.body);
 
@@ -119,6 +181,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Token bulunamadı!'};
     }
+    await _ensureFreshToken();
 
     try {
       final response = await http.put(
@@ -158,6 +221,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Token bulunamadı!'};
     }
+    await _ensureFreshToken();
 
     try {
       final response = await http.post(
@@ -175,6 +239,8 @@ class AuthService {
       final data = json.decode(response.body);
 
       if (response.statusCode == 200) {
+        // Şifre değişince eski token'lar iptal edilir, yenileri kullanılır
+        _saveTokens(data);
         return {'success': true, 'message': 'Şifre değiştirildi!'};
       } else {
         return {
@@ -194,6 +260,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Token bulunamadı!'};
     }
+    await _ensureFreshToken();
 
     try {
       var request = http.MultipartRequest(
@@ -230,6 +297,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Token bulunamadı!'};
     }
+    await _ensureFreshToken();
 
     try {
       final response = await http.post(
@@ -263,15 +331,20 @@ class AuthService {
   // Logout
   static void logout() {
     _token = null;
+    _refreshToken = null;
+    _tokenExpiry = null;
     _user = null;
+    _etagCache.clear();
+    _syncToken = null;
   }
 
   // Get profile photo URL
-  static String getProfilePhotoUrl(String? filename) {
+  // size: gösterilecek kenar uzunluğu (px), backend en yakın varyantı seçer
+  static String getProfilePhotoUrl(String? filename, {int size = 256}) {
     if (filename == null || filename == 'default.png') {
       return '';
     }
-    return '$_baseUrl/profile_photos/$filename';
+    return '$_baseUrl/profile_photos/$filename?size=$size';
   }
 
   // ==================== FAVORİLER ====================
@@ -286,6 +359,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Giriş yapılmamış!'};
     }
+    await _ensureFreshToken();
 
     try {
       final response = await http.post(
@@ -328,6 +402,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Giriş yapılmamış!'};
     }
+    await _ensureFreshToken();
 
     try {
       final response = await http.delete(
@@ -358,15 +433,10 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Giriş yapılmamış!'};
     }
+    await _ensureFreshToken();
 
     try {
-      final response = await http.get(
-        Uri.parse('$_baseUrl/favorites'),
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': 'Bearer $_token',
-        },
-      );
+      final response = await _cachedGet('/favorites');
 
       final data = json.decode(response.body);
 
@@ -390,15 +460,10 @@ class AuthService {
   // Film favoride mi kontrol
   static Future<bool> isFavorite(String movieId) async {
     if (_token == null) return false;
+    await _ensureFreshToken();
 
     try {
-      final response = await http.get(
-        Uri.parse('$_baseUrl/favorites/check/$movieId'),
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': 'Bearer $_token',
-        },
-      );
+      final response = await _cachedGet('/favorites/check/$movieId');
 
       if (response.statusCode == 200) {
         final data = json.decode(response.body);
@@ -421,6 +486,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Giriş yapılmamış!'};
     }
+    await _ensureFreshToken();
 
     try {
       final response = await http.post(
@@ -458,25 +524,106 @@ class AuthService {
   // Film puanını alma
   static Future<double?> getMovieRating(String movieId) async {
     if (_token == null) return null;
+    await _ensureFreshToken();
 
     try {
-      final response = await http.get(
-        Uri.parse('$_baseUrl/ratings/$movieId'),
+      final response = await _cachedGet('/ratings/$movieId');
+
+      if (response.statusCode == 200) {
+        final data = json.decode(response.body);
+        if (data['rating'] != null) {
+          return data['rating']['rating']?.toDouble();
+        }
+      }
+      return null;
+    } catch (e) {
+      return null;
+    }
+  }
+
+  // Birden fazla filmin puanını tek istekte alma
+  // movieIds verilmezse tüm favori filmlerin puanları döner
+  static Future<Map<String, double>> getMovieRatings([
+    List<String>? movieIds,
+  ]) async {
+    if (_token == null) return {};
+    await _ensureFreshToken();
+
+    try {
+      final response = await http.post(
+        Uri.parse('$_baseUrl/ratings/lookup'),
         headers: {
           'Content-Type': 'application/json',
           'Authorization': 'Bearer $_token',
         },
+        body: json.encode(movieIds == null ? {} : {'movie_ids': movieIds}),
       );
 
       if (response.statusCode == 200) {
         final data = json.decode(response.body);
-        if (data['rating'] != null) {
-          return data['rating']['rating']?.toDouble();
+        final ratings = Map<String, dynamic>.from(data['ratings']);
+        return ratings.map(
+          (movieId, rating) =>
+              MapEntry(movieId, (rating['rating'] as num).toDouble()),
+        );
+      }
+      return {};
+    } catch (e) {
+      return {};
+    }
+  }
+
+  // Son senkronizasyondan bu yana değişen favori ve puanlar.
+  // 'reset' true ise istemci yerel listeyi silip gelenlerle yeniden kurmalı.
+  static Future<Map<String, dynamic>> syncLibrary() async {
+    if (_token == null) {
+      return {'success': false, 'message': 'Giriş yapılmamış!'};
+    }
+    await _ensureFreshToken();
+
+    final favorites = {'changed': <dynamic>[], 'deleted': <dynamic>[]};
+    final ratings = {'changed': <dynamic>[], 'deleted': <dynamic>[]};
+    var reset = false;
+
+    try {
+      while (true) {
+        final query = _syncToken == null ? '' : '?since=$_syncToken';
+        final response = await http.get(
+          Uri.parse('$_baseUrl/sync$query'),
+          headers: {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer $_token',
+          },
+        );
+
+        final data = json.decode(response.body);
+        if (response.statusCode != 200) {
+          return {
+            'success': false,
+            'message': data['message'] ?? 'Senkronizasyon başarısız!',
+          };
+        }
+
+        reset = reset || data['reset'] == true;
+        for (final entry in [
+          MapEntry(favorites, data['favorites']),
+          MapEntry(ratings, data['ratings']),
+        ]) {
+          entry.key['changed']!.addAll(entry.value['changed']);
+          entry.key['deleted']!.addAll(entry.value['deleted']);
         }
+        _syncToken = data['next_token'];
+        if (data['has_more'] != true) break;
       }
-      return null;
+
+      return {
+        'success': true,
+        'reset': reset,
+        'favorites': favorites,
+        'ratings': ratings,
+      };
     } catch (e) {
-      return null;
+      return {'success': false, 'message': 'Bağlantı hatası: $e'};
     }
   }
 
@@ -485,15 +632,10 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Giriş yapılmamış!'};
     }
+    await _ensureFreshToken();
 
     try {
-      final response = await http.get(
-        Uri.parse('$_baseUrl/ratings'),
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': 'Bearer $_token',
-        },
-      );
+      final response = await _cachedGet('/ratings');
 
       final data = json.decode(response.body);
 
@@ -519,6 +661,7 @@ class AuthService {
     if (_token == null) {
       return {'success': false, 'message': 'Giriş yapılmamış!'};
     }
+    await _ensureFreshToken();
 
     try {
       final response = await http.delete(
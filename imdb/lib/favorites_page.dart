@@ -33,7 +33,7 @@ class _FavoritesPageState extends State<FavoritesPage> {
         _favorites = List<Map<String, dynamic>>.from(result['favorites']);
       });
 
-      // Load ratings for each favorite movie
+      // Load ratings for all favorite movies
       await _loadRatings();
     } else {
       ScaffoldMessenger.of(context).showSnackBar(
@@ -51,12 +51,8 @@ class _FavoritesPageState extends State<FavoritesPage> {
       _isLoadingRatings = true;
     });
 
-    for (var favorite in _favorites) {
-      final rating = await AuthService.getMovieRating(favorite['movie_id']);
-      if (rating != null) {
-        _ratings[favorite['movie_id']] = rating;
-      }
-    }
+    // Tüm favorilerin puanları tek istekte gelir
+    _ratings = await AuthService.getMovieRatings();
 
     setState(() {
       _isLoadingRatings = false;
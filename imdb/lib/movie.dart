@@ -52,27 +52,21 @@ class _MovieState extends State<Movie> with SingleTickerProviderStateMixin {
   }
 
   Future<void> _fetchMovies() async {
-    // API anahtarının geçerli olup olmadığını kontrol et
-    if (!MovieService.isApiKeyValid) {
-      setState(() {
-        isLoading = false;
-      });
-      ScaffoldMessenger.of(context).showSnackBar(
-        SnackBar(
-          content: Text(
-            'TMDb API anahtarı geçerli değil. Lütfen API_CONFIG.md dosyasını kontrol edin.',
-          ),
-          backgroundColor: Colors.red,
-          duration: Duration(seconds: 5),
-        ),
-      );
-      return;
-    }
-
     setState(() {
       isLoading = true;
     });
-    final nowPlaying = await _movieService.fetchNowPlayingMovies();
+    // Gündemdekiler: kullanıcıların bugün en çok favorilediği/puanladığı filmler;
+    // henüz yeterince etkileşim yoksa vizyondaki filmler gösterilir
+    List<model.Movie> trending = [];
+    try {
+      trending = await _movieService.fetchTrendingMovies();
+    } catch (e) {
+      trending = [];
+    }
+    final nowPlaying =
+        trending.length >= 4
+            ? trending
+            : await _movieService.fetchNowPlayingMovies();
     final randoms = await _movieService.fetchRandomMovies(10);
     final genresData = await _movieService.fetchGenres();
     setState(() {
@@ -16,4 +16,13 @@ class Movie {
       overview: json['overview'],
     );
   }
+
+  // Backend /trending sonucu (favori/puan kayıtlarındaki alan adları)
+  factory Movie.fromTrendingJson(Map<String, dynamic> json) {
+    return Movie(
+      title: json['movie_title'] ?? '',
+      posterPath: json['movie_poster'] ?? '',
+      overview: '',
+    );
+  }
 }
@@ -3,24 +3,13 @@ import 'package:http/http.dart' as http;
 import 'movie_model.dart';
 
 class MovieService {
-  // API anahtarını environment variable'dan al, yoksa default değer kullan
-  // Kullanım: flutter run --dart-define=TMDB_API_KEY=your_api_key
-  static const String _apiKey = String.fromEnvironment(
-    'TMDB_API_KEY',
-    defaultValue: 'BURAYA_TMDB_API_ANAHTARINIZI_YAZIN',
-  );
-  static const String _baseUrl = 'https://api.themoviedb.org/3';
-
-  // API anahtarının geçerli olup olmadığını kontrol et
-  static bool get isApiKeyValid =>
-      _apiKey != 'BURAYA_TMDB_API_ANAHTARINIZI_YAZIN' && _apiKey.isNotEmpty;
+  // TMDB istekleri backend'in katalog önbelleği üzerinden yapılır,
+  // API anahtarı backend'de TMDB_API_KEY ortam değişkeninde tutulur
+  static const String _baseUrl = 'http://localhost:5000/catalog';
+  static const String _trendingUrl = 'http://localhost:5000/trending';
 
   Future<List<Movie>> fetchPopularMovies() async {
-    final response = await http.get(
-      Uri.parse(
-        '$_baseUrl/movie/popular?api_key=$_apiKey&language=tr-TR&page=1',
-      ),
-    );
+    final response = await http.get(Uri.parse('$_baseUrl/popular?page=1'));
 
     if (response.statusCode == 200) {
       final json = jsonDecode(response.body);
@@ -32,11 +21,7 @@ class MovieService {
   }
 
   Future<List<Movie>> fetchNowPlayingMovies() async {
-    final response = await http.get(
-      Uri.parse(
-        '$_baseUrl/movie/now_playing?api_key=$_apiKey&language=tr-TR&page=1',
-      ),
-    );
+    final response = await http.get(Uri.parse('$_baseUrl/now_playing?page=1'));
     if (response.statusCode == 200) {
       final json = jsonDecode(response.body);
       final List results = json['results'];
@@ -46,26 +31,34 @@ class MovieService {
     }
   }
 
-  Future<List<Movie>> fetchRandomMovies(int count) async {
+  // FilMix kullanıcılarının son saatte/günde/haftada en çok favorilediği ve puanladığı filmler
+  Future<List<Movie>> fetchTrendingMovies({String window = 'day', int limit = 20}) async {
     final response = await http.get(
-      Uri.parse(
-        '$_baseUrl/movie/popular?api_key=$_apiKey&language=tr-TR&page=1',
-      ),
+      Uri.parse('$_trendingUrl?window=$window&limit=$limit'),
     );
     if (response.statusCode == 200) {
       final json = jsonDecode(response.body);
       final List results = json['results'];
-      results.shuffle();
-      return results.take(count).map((m) => Movie.fromJson(m)).toList();
+      return results.map((m) => Movie.fromTrendingJson(m)).toList();
+    } else {
+      throw Exception('Trend filmler alınamadı');
+    }
+  }
+
+  Future<List<Movie>> fetchRandomMovies(int count) async {
+    // Karıştırma backend'de yapılır, sadece istenen sayıda film iner
+    final response = await http.get(Uri.parse('$_baseUrl/random?count=$count'));
+    if (response.statusCode == 200) {
+      final json = jsonDecode(response.body);
+      final List results = json['results'];
+      return results.map((m) => Movie.fromJson(m)).toList();
     } else {
       throw Exception('Rastgele filmler alınamadı');
     }
   }
 
   Future<Map<String, dynamic>> fetchGenres() async {
-    final response = await http.get(
-      Uri.parse('$_baseUrl/genre/movie/list?api_key=$_apiKey&language=tr-TR'),
-    );
+    final response = await http.get(Uri.parse('$_baseUrl/genres'));
     if (response.statusCode == 200) {
       final json = jsonDecode(response.body);
       return json;
@@ -76,9 +69,7 @@ class MovieService {
 
   Future<List<Movie>> fetchMoviesByGenre(int genreId) async {
     final response = await http.get(
-      Uri.parse(
-        '$_baseUrl/discover/movie?api_key=$_apiKey&language=tr-TR&with_genres=$genreId&page=1',
-      ),
+      Uri.parse('$_baseUrl/discover?with_genres=$genreId&page=1'),
     );
     if (response.statusCode == 200) {
       final json = jsonDecode(response.body);